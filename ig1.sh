@@ -17,6 +17,11 @@ PCLP_CO_NAME="./$GRES_FOLDER/ig_co-gcc"
 MAKEFILES_NAME="./$GRES_FOLDER/ig_makefiles.txt"
 # File where global results (for all makefiles) are stored
 GRES_OUT_FILE="./$GRES_FOLDER/ig_global_results.txt"
+# File where the Makefiles of the shard are stored (SHARD="i/N" set)
+SHARD_MAKEFILES_NAME="./$GRES_FOLDER/ig_makefiles_shard.txt"
+# Sample of test cases (SAMPLE=<fraction> set) and the Makefiles of the sample
+SAMPLE_FILE="./$GRES_FOLDER/ig_sample.json"
+SAMPLE_MAKEFILES_NAME="./$GRES_FOLDER/ig_makefiles_sample.txt"
 
 #--- Local (for every makefile) ------------------------------------------------
 
@@ -61,11 +66,14 @@ fi
 WORKING_DIR=$(pwd)
 echo "[INFO] WORKING_DIR=$WORKING_DIR"
 
-# Delete old global results (if exists)
-if [[ -d "$GRES_FOLDER" ]]; then
+# Delete old global results (if exists), except in shard mode: all the shards
+# write their local results in the same global results folder
+if [[ -n "$SHARD" ]]; then
+    echo "[INFO] SHARD=$SHARD"
+elif [[ -d "$GRES_FOLDER" ]]; then
     rm -rf "$GRES_FOLDER"
 fi
-mkdir "$GRES_FOLDER"
+mkdir -p "$GRES_FOLDER"
 if [[ $? -ne 0 ]]; then
     echo "[ERROR] Cannot create global output folder: $GRES_FOLDER"
     exit 1
@@ -127,74 +135,82 @@ fi
 
 #-------------------------------------------------------------------------------
 # Find all Makefiles in all subdirectories (store in ig_makfiles.txt)
+# and the C sources of every Makefile (store in ig_sources.json)
 #-------------------------------------------------------------------------------
-find "$WORKING_DIR" -name "Makefile" > "$MAKEFILES_NAME"
-
-MAKEFILES_COUNT=$(wc -l < "$MAKEFILES_NAME")
-if [[ $MAKEFILES_COUNT -le 0 ]]; then
-    echo "[INFO] No Makefiles found, nothing to do"
-    exit 0
+python3 "$SCRIPT_PATH/scripts/discovery.py" "$WORKING_DIR" "$WORKING_DIR/$GRES_FOLDER"
+if [[ $? -ne 0 ]]; then
+    echo "[ERROR] Error searching Makefiles"
+    exit 1
 fi
 
-#-------------------------------------------------------------------------------
-# For every directory that contains a Makefile:
-#   - build the code (invoke make -e) with imposter
-#   - generate project config using data from imposter (invoke pclp_config.py)
-#   - analyze the code (invoke $PCLP_EXE)
-#-------------------------------------------------------------------------------
-MAKEFILE_IDX=0
-while read make_file; do
-
-    MAKEFILE_IDX=$((MAKEFILE_IDX + 1))
-    printf "[%3d/%-3d] %s\n" $MAKEFILE_IDX $MAKEFILES_COUNT $make_file
-    MAKE_DIR=$(dirname "$make_file")
-    cd "$MAKE_DIR"
-
-    # Get the relative path between Makefile and working directory
-    # and create a respective directory in the results folder (local results folder)
-    RELATIVE_PATH=$(realpath -s --relative-to="$WORKING_DIR" . )
-    LRES_FOLDER="$WORKING_DIR/$GRES_FOLDER/$RELATIVE_PATH"
-    mkdir -p "$LRES_FOLDER"
+LINT_MAKEFILES_NAME="$MAKEFILES_NAME"
 
+# Sample mode (SAMPLE=<fraction>, optional SEED=<N>): analyze only a stratified random
+# sample of the test cases of every CWE, used by: reduced.py --sample
+if [[ -n "$SAMPLE" ]]; then
+    echo "[INFO] SAMPLE=$SAMPLE SEED=${SEED:-1}"
+    python3 "$SCRIPT_PATH/scripts/sampling.py" "$MAKEFILES_NAME" "$SAMPLE_FILE" "$SAMPLE" "${SEED:-1}" > "$SAMPLE_MAKEFILES_NAME"
     if [[ $? -ne 0 ]]; then
-        echo "[ERROR] Cannot create local results folder: $LRES_FOLDER"
+        echo "[ERROR] Error creating the sample"
         exit 1
     fi
+    LINT_MAKEFILES_NAME="$SAMPLE_MAKEFILES_NAME"
+fi
 
-    export IMPOSTER_LOG="$LRES_FOLDER/$IMPO_OUT_FILE"
-    make -e > "$LRES_FOLDER/$MAKE_OUT_FILE"
-
-    # Generate project configuration
-    python3 "$PCLP_PATH/config/pclp_config.py" \
-            --compiler=gcc \
-            --imposter-file="$LRES_FOLDER/$IMPO_OUT_FILE" \
-            --config-output-lnt-file="$LRES_FOLDER/$PCLP_PRJ_FILE" \
-            --generate-project-config
-
-    # Analyze project, default options:
-    # -b - suppress banner output
-    # -"width(256)" - sets the maximum output width and indentation level for continuations
-    # -"format=%f, %l, %t, %n" - sets the message format for height 3 or less
-    # -h1 - adjusts message height options
-    ${PCLP_NAME} -b -"width(256)" -"format=%f, %l, %t, %n" -h1 "$PCLP_ARGS" "$PCLP_CO_LNT" "$LRES_FOLDER/$PCLP_PRJ_FILE" > "$LRES_FOLDER/$PCLP_OUT_FILE"
-
+# Shard mode (SHARD="i/N"): process only the Makefiles of the shard i of N,
+# the same partition is used by: reduced.py --shard=i/N
+if [[ -n "$SHARD" ]]; then
+    python3 "$SCRIPT_PATH/scripts/shard.py" "$LINT_MAKEFILES_NAME" "$SHARD" $SHARD_WEIGHT > "$SHARD_MAKEFILES_NAME"
     if [[ $? -ne 0 ]]; then
-        echo "[ERROR] $PCLP_NAME finished with error:"
-        cat "$LRES_FOLDER/$PCLP_OUT_FILE"
+        echo "[ERROR] Invalid shard: $SHARD"
         exit 1
     fi
+    LINT_MAKEFILES_NAME="$SHARD_MAKEFILES_NAME"
+fi
 
-    if [[ ! -f "$LRES_FOLDER/$PCLP_OUT_FILE" ]]; then
-        echo "[ERROR] Error invoking $PCLP_NAME, the output file not generated"
-        exit 1
-    fi
+MAKEFILES_COUNT=$(wc -l < "$LINT_MAKEFILES_NAME")
+if [[ $MAKEFILES_COUNT -le 0 ]]; then
+    echo "[INFO] No Makefiles found, nothing to do"
+    exit 0
+fi
 
-    # Interpret the output generated by PC-lint
-    #python3 "$SCRIPT_PATH/scripts/processor.py" "$LRES_FOLDER/$PCLP_OUT_FILE" "$MAKE_DIR" "$WORKING_DIR/$GRES_OUT_FILE" "$LRES_FOLDER/$INTR_OUT_FILE"
+#-------------------------------------------------------------------------------
+# For every directory that contains a Makefile (JOBS makefiles in parallel, default 1):
+#   - build the code (invoke make -e) with imposter
+#   - generate project config using data from imposter (invoke pclp_config.py)
+#   - analyze the code (invoke $PCLP_EXE)
+# The first failed Makefile stops the analysis (KEEP_GOING=1: analyze all Makefiles)
+# The outputs of make and pclp_config.py are reused from the build cache if the
+# inputs of the build didn't change (BUILD_CACHE=0: don't use the build cache)
+# BATCH=<N>: the projects of N Makefiles are analyzed with one $PCLP_EXE invocation
+# The Makefiles are analyzed longest first, using the durations of the previous runs
+# (SCHEDULE=0: analyze the Makefiles in the order of the list)
+# The live progress (throughput, ETA, utilization) is shown (PROGRESS=0: not shown)
+#-------------------------------------------------------------------------------
+ORCHESTRATOR_OPTIONS=(--jobs="${JOBS:-1}" --batch="${BATCH:-1}")
+if [[ -n "$PCLP_ARGS" ]]; then
+    ORCHESTRATOR_OPTIONS+=(--args="$PCLP_ARGS")
+fi
+if [[ -n "$SAMPLE" ]]; then
+    ORCHESTRATOR_OPTIONS+=(--sample="$WORKING_DIR/$SAMPLE_FILE")
+fi
+if [[ -n "$KEEP_GOING" ]]; then
+    ORCHESTRATOR_OPTIONS+=(--keep-going)
+fi
+if [[ "$BUILD_CACHE" != "0" ]]; then
+    ORCHESTRATOR_OPTIONS+=(--build-cache="$WORKING_DIR/ig_build_cache" --gcc="$GCC_EXE")
+fi
+if [[ "$SCHEDULE" != "0" ]]; then
+    ORCHESTRATOR_OPTIONS+=(--durations="$WORKING_DIR/ig_durations.json")
+fi
+if [[ "$PROGRESS" != "0" ]]; then
+    ORCHESTRATOR_OPTIONS+=(--progress)
+fi
 
-    #if [[ $? -ne 0 ]]; then
-    #    echo "[ERROR] pclp_out_interpret finished with error"
-    #    exit 1
-    #fi
+python3 "$SCRIPT_PATH/scripts/lint_orchestrator.py" "$WORKING_DIR" "$WORKING_DIR/$LINT_MAKEFILES_NAME" \
+        "$PCLP_EXE" "$PCLP_CO_LNT" "${ORCHESTRATOR_OPTIONS[@]}"
 
-done < "$WORKING_DIR/$MAKEFILES_NAME"
+if [[ $? -ne 0 ]]; then
+    echo "[ERROR] Analysis of the Makefiles failed"
+    exit 1
+fi
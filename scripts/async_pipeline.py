@@ -0,0 +1,256 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" async_pipeline - asyncio pipeline prefetching the PClint outputs and the
+    C sources of the next makefiles while the current makefile is processed,
+    so the file reads (slow on network filesystems) overlap the parsing.
+"""
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+
+import path_resolver
+import tracing
+from pclp_out_interpret_src import PclpInterpreter
+
+# Default count of makefiles prefetched ahead of the processed makefile
+PREFETCH_MAKEFILES = 4
+# Default limit of the prefetched (read, not yet processed) bytes
+PREFETCH_BYTES = 64 * 1024 * 1024
+# Count of threads reading files
+PREFETCH_IO_THREADS = 8
+
+#-------------------------------------------------------------------------------
+class PrefetchStats:
+    """ PrefetchStats - statistics of the prefetch pipeline:
+            files_cnt, bytes_cnt - count of files and bytes prefetched
+            io_time - time spent reading files (sum over all reads)
+            wait_time - time the processing waited for prefetched files
+            cpu_time - time spent processing the makefiles
+        The I/O time not waited for (io_time - wait_time) is hidden behind the processing.
+    """
+
+    def __init__(self):
+        self.files_cnt = 0
+        self.bytes_cnt = 0
+        self.io_time = 0.0
+        self.wait_time = 0.0
+        self.cpu_time = 0.0
+        self.lock = threading.Lock()
+
+    def add_read(self, io_time, size):
+        """ Add a file read (in an I/O thread) in io_time seconds """
+        with self.lock:
+            self.files_cnt += 1
+            self.bytes_cnt += size
+            self.io_time += io_time
+
+    def __str__(self):
+        hidden_time = max(self.io_time - self.wait_time, 0.0)
+        hidden_pc = (100.0 * hidden_time / self.io_time) if self.io_time else 0.0
+        return f'prefetched {self.files_cnt} files ({self.bytes_cnt / 1048576.0:.1f} MB), ' + \
+               f'I/O {self.io_time:.2f}s, waited {self.wait_time:.2f}s, ' + \
+               f'hidden {hidden_time:.2f}s ({hidden_pc:.0f}%), processing {self.cpu_time:.2f}s'
+
+#-------------------------------------------------------------------------------
+class ByteBudget:
+    """ ByteBudget - limits the bytes prefetched but not yet processed.
+        The makefile processed next (head) may always exceed the budget,
+        otherwise a big makefile would wait forever for the smaller ones.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+        self.head = 0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self, size, makefile_idx):
+        """ Wait until size bytes (of makefile makefile_idx) can be prefetched """
+        async with self.condition:
+            await self.condition.wait_for(lambda: makefile_idx <= self.head or \
+                                          self.in_flight + size <= self.max_bytes)
+            self.in_flight += size
+
+    async def release(self, size, next_head):
+        """ Release size bytes (makefile processed), next_head is processed next """
+        async with self.condition:
+            self.in_flight -= size
+            self.head = next_head
+            self.condition.notify_all()
+
+#-------------------------------------------------------------------------------
+def read_file(filename, stats):
+    """ Read a text file (in an I/O thread), returns the content or None on error.
+        A file which cannot be read is not prefetched, the processing reads
+        it again and reports the error.
+    """
+    time_start = time.perf_counter()
+    try:
+        with open(filename, encoding='UTF-8') as file:
+            content = file.read()
+    except (OSError, ValueError):
+        return None
+    stats.add_read(time.perf_counter() - time_start, len(content))
+    return content
+
+#-------------------------------------------------------------------------------
+def get_file_size(filename):
+    """ Return the size of a file or 0 if the file doesn't exist """
+    try:
+        return os.stat(filename).st_size
+    except OSError:
+        return 0
+
+#-------------------------------------------------------------------------------
+def get_module_sources(pclp_out_filename, pclp_out_content, makefile_path, module_ignore_list):
+    """ Interpret a PClint output, returns a tuple (modules, sources) where:
+            modules - the modules of the PClint output (PclpInterpreter.modules,
+                reused by Processor.interpret) or None on error
+            sources - the C sources processed: the modules with issues (full path,
+                as resolved by Processor.interpret), except the ignored modules
+    """
+    pclp_interp = PclpInterpreter()
+    with tracing.span("pclint_read", "stage", {"file" : pclp_out_filename}):
+        if pclp_interp.process_file(pclp_out_filename, pclp_out_content):
+            return (None, [])
+    sources = []
+    resolve_cnt = path_resolver.resolver.resolve_cnt
+    for module_name, _, module_issues in pclp_interp.modules:
+        module_name = path_resolver.realpath(os.path.join(makefile_path, module_name))
+        if module_issues and module_name.endswith((".c", ".C")) and \
+                not (module_ignore_list and module_name in module_ignore_list):
+            sources.append(module_name)
+    # Runs in the processing thread (not during Processor.interpret): the count is exact
+    tracing.count("realpath_resolved", path_resolver.resolver.resolve_cnt - resolve_cnt)
+    return (pclp_interp.modules, sources)
+
+#-------------------------------------------------------------------------------
+class PrefetchPipeline:
+    """ PrefetchPipeline - processes the makefiles (in order) with prefetching.
+
+        A producer task prefetches the makefiles one after another, at most
+        prefetch_cnt makefiles ahead and at most max_bytes not yet processed:
+        reads the PClint output of the makefile, interprets it (in the processing
+        thread, the I/O threads only read), then reads all the C sources
+        referenced in it (in parallel, in the I/O threads).
+        The processing (CPU) of a makefile runs in a separate executor thread,
+        with the prefetched files (file_cache: {filename : content}, and the
+        interpreted PClint output: {(pclp_out_filename, "modules") : modules}),
+        while the next makefiles are read.
+
+        locate_func(makefile) - returns (pclp_out_filename, makefile_path)
+        process_func(makefile, file_cache) - processes a makefile, the results
+            are yielded in the order of the makefiles
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self, locate_func, process_func, module_ignore_list = None,\
+                 prefetch_cnt = PREFETCH_MAKEFILES, max_bytes = PREFETCH_BYTES):
+        self.locate_func = locate_func
+        self.process_func = process_func
+        self.module_ignore_list = module_ignore_list
+        self.prefetch_cnt = max(prefetch_cnt, 1)
+        self.max_bytes = max_bytes
+        self.stats = PrefetchStats()
+
+    #---------------------------------------------------------------------------
+    async def prefetch_makefile(self, loop, executors, budget, makefile, makefile_idx):
+        """ Prefetch the files of a makefile, executors is a tuple (io_executor, cpu_executor).
+            Returns a tuple (file_cache, size): the files read and their total size.
+        """
+        io_executor, cpu_executor = executors
+        pclp_out_filename, makefile_path = self.locate_func(makefile)
+        file_cache = {}
+        size = await loop.run_in_executor(io_executor, get_file_size, pclp_out_filename)
+        await budget.acquire(size, makefile_idx)
+        content = await loop.run_in_executor(io_executor, read_file, pclp_out_filename, self.stats)
+        if content is None:
+            return (file_cache, size)
+        file_cache[pclp_out_filename] = content
+
+        # Parsing is CPU work: run it in the processing thread, not in the I/O
+        # threads where it would compete for the GIL with the processing
+        modules, sources = await loop.run_in_executor(cpu_executor, get_module_sources,\
+            pclp_out_filename, content, makefile_path, self.module_ignore_list)
+        if modules is not None:
+            # Interpreted once: Processor.interpret uses the modules
+            file_cache[(pclp_out_filename, "modules")] = modules
+        sources_size = sum(await asyncio.gather(*[loop.run_in_executor(\
+            io_executor, get_file_size, source) for source in sources]))
+        await budget.acquire(sources_size, makefile_idx)
+        size += sources_size
+
+        contents = await asyncio.gather(*[loop.run_in_executor(\
+            io_executor, read_file, source, self.stats) for source in sources])
+        for source, content in zip(sources, contents):
+            if content is not None:
+                file_cache[source] = content
+        return (file_cache, size)
+
+    #---------------------------------------------------------------------------
+    async def producer(self, loop, executors, budget, ahead, makefiles, prefetched):
+        """ Prefetch the makefiles one after another, at most prefetch_cnt ahead """
+        for makefile_idx, makefile in enumerate(makefiles):
+            await ahead.acquire()
+            try:
+                res = await self.prefetch_makefile(loop, executors, budget,\
+                                                   makefile, makefile_idx)
+            except (OSError, ValueError):
+                # Nothing prefetched, the processing reads the files (and reports the error)
+                res = ({}, 0)
+            prefetched[makefile_idx].set_result(res)
+
+    #---------------------------------------------------------------------------
+    def run(self, makefiles):
+        """ Process all makefiles, yields the result of process_func for every makefile """
+        loop = asyncio.new_event_loop()
+        io_executor = concurrent.futures.ThreadPoolExecutor(max_workers = PREFETCH_IO_THREADS)
+        cpu_executor = concurrent.futures.ThreadPoolExecutor(max_workers = 1)
+        producer_task = None
+        try:
+            budget = ByteBudget(self.max_bytes)
+            ahead = asyncio.Semaphore(self.prefetch_cnt)
+            prefetched = [loop.create_future() for _ in makefiles]
+            producer_task = loop.create_task(self.producer(loop, (io_executor, cpu_executor), budget,\
+                                                           ahead, makefiles, prefetched))
+
+            async def process_next(makefile_idx):
+                time_start = time.perf_counter()
+                file_cache, size = await prefetched[makefile_idx]
+                time_ready = time.perf_counter()
+                self.stats.wait_time += time_ready - time_start
+                res = await loop.run_in_executor(cpu_executor, self.process_func,\
+                                                 makefiles[makefile_idx], file_cache)
+                self.stats.cpu_time += time.perf_counter() - time_ready
+                ahead.release()
+                await budget.release(size, makefile_idx + 1)
+                return res
+
+            # The event loop runs while a makefile is processed, the producer
+            # (and the reads in the I/O threads) continue in the background
+            for makefile_idx in range(len(makefiles)):
+                yield loop.run_until_complete(process_next(makefile_idx))
+
+            loop.run_until_complete(producer_task)
+        finally:
+            if producer_task and not producer_task.done():
+                producer_task.cancel()
+                loop.run_until_complete(asyncio.gather(producer_task, return_exceptions = True))
+            io_executor.shutdown(wait = True)
+            cpu_executor.shutdown(wait = True)
+            loop.close()
@@ -0,0 +1,298 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" benchmark - measures the throughput of the processing stages (C parser,
+    PClint output interpreter, Processor, ignore list, charts) and of a complete
+    reduced.py run on a synthetic corpus (gen_corpus.py), saves the results as
+    the baseline of the machine (JSON) and compares a new run with the baseline.
+    The import time of the command line scripts is checked with an absolute
+    limit (import_time_check.py).
+"""
+import contextlib
+import gc
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import gen_corpus
+import import_time_check
+import results_state
+from c_parser_src import CParser
+from c_parser_src.canalyzer import CAnalyzer
+from pclp_out_interpret_src import PclpInterpreter
+from processor import Processor
+from ignore_list import IgnoreModuleList
+
+# Folder of the baselines (one JSON file per machine)
+BENCH_BASELINE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks")
+# Default count of modules of the corpus
+BENCH_MODULES = 1000
+# Default count of runs of every benchmark (the fastest is used)
+BENCH_REPEAT = 5
+# Default regression threshold: a rate lower than the baseline by more than
+# the threshold (fraction) is a regression
+BENCH_THRESHOLD = 0.10
+# Count of modules used by the micro-benchmarks of the C parser
+BENCH_PARSER_MODULES = 200
+# Count of issues added by the Processor benchmark
+BENCH_ISSUES = 200000
+
+#-------------------------------------------------------------------------------
+def get_machine_id():
+    """ Return the identifier of the machine (host, architecture, Python version) """
+    return f'{platform.node()}-{platform.machine()}-py{sys.version_info[0]}.{sys.version_info[1]}'
+
+#-------------------------------------------------------------------------------
+class BenchCorpus:
+    """ BenchCorpus - the synthetic corpus of the benchmarks and the data prepared
+        from it (read once, the benchmarks measure only the processing).
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self, corpus_path, modules_cnt, seed = 1):
+        self.corpus_path = corpus_path
+        self.makefiles = gen_corpus.gen_corpus(corpus_path, modules_cnt, seed)
+        self.pclint_outs = {}
+        self.modules = {}
+        for makefile in self.makefiles:
+            pclint_out_file = gen_corpus.get_pclint_out_file(corpus_path, makefile)
+            with open(pclint_out_file, encoding='UTF-8') as file:
+                self.pclint_outs[pclint_out_file] = file.read()
+            with os.scandir(os.path.dirname(makefile)) as dir_it:
+                for entry in dir_it:
+                    if entry.name.endswith(".c"):
+                        with open(entry.path, encoding='UTF-8') as file:
+                            self.modules[entry.path] = file.read()
+        self.parser_modules = dict(sorted(self.modules.items())[:BENCH_PARSER_MODULES])
+
+#-------------------------------------------------------------------------------
+def bench_c_analyzer_analyze(corpus):
+    """ CAnalyzer.analyze: bytes of C sources analyzed """
+    for module_name, content in corpus.parser_modules.items():
+        CAnalyzer().analyze(module_name, content)
+    return sum(len(content) for content in corpus.parser_modules.values())
+
+#-------------------------------------------------------------------------------
+def bench_c_analyzer_extract_functions(corpus):
+    """ CAnalyzer.extract_functions: functions extracted (the modules are analyzed
+        once, the first time)
+    """
+    if not hasattr(corpus, "analyzers"):
+        corpus.analyzers = []
+        for module_name, content in corpus.parser_modules.items():
+            analyzer = CAnalyzer()
+            analyzer.analyze(module_name, content)
+            corpus.analyzers.append(analyzer)
+    return sum(len(analyzer.extract_functions()) for analyzer in corpus.analyzers)
+
+#-------------------------------------------------------------------------------
+def bench_c_parser_check_file_line(corpus):
+    """ CParser.check_file_line: lookups of every line of the modules """
+    if not hasattr(corpus, "c_parser"):
+        corpus.c_parser = CParser()
+        for module_name, content in corpus.parser_modules.items():
+            corpus.c_parser.process_file(module_name, content)
+    lookups_cnt = 0
+    for module_name, content in corpus.parser_modules.items():
+        lines_cnt = content.count("\n")
+        for line_idx in range(1, lines_cnt + 1):
+            corpus.c_parser.check_file_line(module_name, line_idx)
+        lookups_cnt += lines_cnt
+    return lookups_cnt
+
+#-------------------------------------------------------------------------------
+def bench_pclp_interpreter(corpus):
+    """ PclpInterpreter.process_file: lines of PClint output interpreted """
+    for pclint_out_file, content in corpus.pclint_outs.items():
+        PclpInterpreter().process_file(pclint_out_file, content)
+    return sum(content.count("\n") for content in corpus.pclint_outs.values())
+
+#-------------------------------------------------------------------------------
+def bench_processor_add_issue(corpus):
+    """ Processor.add_issue: issues added (bad, good and other functions) """
+    if not hasattr(corpus, "issues"):
+        rand = random.Random(1)
+        module_names = sorted(corpus.modules)
+        corpus.issues = [(rand.choice(module_names), rand.choice((774, 534, 793, 746, 528)),\
+                          rand.choice(("CWE121_bad", "goodG2B", "goodB2G", "main")),\
+                          rand.randint(1, 200)) for _ in range(BENCH_ISSUES)]
+    proc = Processor()
+    for module_name, issue_nr, func_name, line_nr in corpus.issues:
+        proc.add_issue(module_name, issue_nr, func_name, line_nr)
+    return len(corpus.issues)
+
+#-------------------------------------------------------------------------------
+def bench_ignore_list_load(corpus):
+    """ IgnoreModuleList.load: modules of the ignore list (every module listed) """
+    ignore_filename = os.path.join(corpus.corpus_path, "ig_bench_ignore.txt")
+    if not os.path.isfile(ignore_filename):
+        with open(ignore_filename, "w", encoding='UTF-8') as file:
+            for module_name in sorted(corpus.modules):
+                print(os.path.relpath(module_name, corpus.corpus_path), file = file)
+    ignore_modules = IgnoreModuleList()
+    ignore_modules.load(ignore_filename, corpus.corpus_path)
+    return len(ignore_modules.ignore_list)
+
+#-------------------------------------------------------------------------------
+def bench_charts(corpus):
+    """ Chart rendering (generate_pie, generate_bars): charts written """
+    import reduced
+    generate_pie, generate_bars = reduced.import_chart_modules()
+    random.seed(1)
+    # The charts print their data: not part of the benchmark output
+    with contextlib.redirect_stdout(None):
+        pie_data = generate_pie.gen_random_pie_data("Benchmark")
+        bars1 = generate_bars.gen_random_bars_data(15, 100, 30, 10, 3)
+        bars2 = generate_bars.gen_random_bars_data(10, 100, 20, 10)
+        generate_pie.gen_pie(pie_data, os.path.join(corpus.corpus_path, "ig_bench_pie.jpg"))
+        generate_bars.gen_bars(bars1, bars2, title = "Benchmark", limit_cnt = 16,\
+                               filename = os.path.join(corpus.corpus_path, "ig_bench_bars.jpg"))
+    return 2
+
+#-------------------------------------------------------------------------------
+def bench_reduced(corpus):
+    """ reduced.py (end-to-end, without charts): modules processed """
+    res = subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),\
+                          "reduced.py"), corpus.corpus_path, "--no-charts"],\
+                         cwd = corpus.corpus_path, stdout = subprocess.DEVNULL,\
+                         stderr = subprocess.PIPE, text = True, check = False)
+    if res.returncode:
+        raise ValueError("reduced.py failed: " + res.stderr.strip()[-200:])
+    return len(corpus.modules)
+
+# Benchmarks: name : (function, unit, runs) (runs: None - the repeat count,
+# the slow benchmarks run less often)
+BENCHMARKS = {
+    "c_analyzer_analyze" : (bench_c_analyzer_analyze, "bytes/s", None),
+    "c_analyzer_extract_functions" : (bench_c_analyzer_extract_functions, "functions/s", None),
+    "c_parser_check_file_line" : (bench_c_parser_check_file_line, "lookups/s", None),
+    "pclp_interpreter" : (bench_pclp_interpreter, "lines/s", None),
+    "processor_add_issue" : (bench_processor_add_issue, "issues/s", None),
+    "ignore_list_load" : (bench_ignore_list_load, "modules/s", None),
+    "charts" : (bench_charts, "charts/s", 3),
+    "reduced" : (bench_reduced, "modules/s", 3)
+}
+
+#-------------------------------------------------------------------------------
+def run_benchmarks(names, modules_cnt = BENCH_MODULES, repeat = BENCH_REPEAT):
+    """ Run the benchmarks on a corpus of modules_cnt modules, every benchmark
+        repeat times (the fastest run is used, the garbage collector is disabled
+        during the runs, like timeit).
+        Returns {name : {"rate" : units_per_second, "unit" : unit, "seconds" : seconds}}
+        (a benchmark which cannot run, example: matplotlib not installed, is skipped)
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as corpus_path:
+        corpus = BenchCorpus(corpus_path, modules_cnt)
+        pclp_msg_list = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",\
+                                     "pclp_msg_list.txt")
+        if os.path.isfile(pclp_msg_list):
+            shutil.copy(pclp_msg_list, corpus_path)
+        for name in names:
+            bench_func, unit, runs = BENCHMARKS[name]
+            # First run: warm up (prepares the data of the benchmark)
+            try:
+                units_cnt = bench_func(corpus)
+            except ImportError as ex:
+                print(f'{name:<30} skipped: {ex}')
+                continue
+            seconds = float("inf")
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                for _ in range(min(runs or repeat, repeat)):
+                    time_start = time.perf_counter()
+                    bench_func(corpus)
+                    seconds = min(seconds, time.perf_counter() - time_start)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+            results[name] = {"rate" : units_cnt / seconds, "unit" : unit, "seconds" : seconds}
+    return results
+
+#-------------------------------------------------------------------------------
+def compare_results(results, baseline, threshold = BENCH_THRESHOLD, output = sys.stdout):
+    """ Print the results and the change relative to the baseline (if any).
+        Returns the list of the benchmarks slower than the baseline by more
+        than the threshold (regressions).
+    """
+    regressions = []
+    print(f'{"benchmark":<30}{"rate":>14} {"unit":<12}{"baseline":>14}{"change":>9}', file = output)
+    for name, res in results.items():
+        line = f'{name:<30}{res["rate"]:>14.1f} {res["unit"]:<12}'
+        base = (baseline or {}).get(name)
+        if base:
+            change = res["rate"] / base["rate"] - 1.0
+            line += f'{base["rate"]:>14.1f}{change:>+8.1%}'
+            if change < -threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line, file = output)
+    return regressions
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # <---- 0 ---->|<------ 1 ------>|<----- 2 ---->|<------- 3 ------->|
+    # benchmark.py  [--modules=<N>]   [--repeat=<N>] [--only=<name,...>]
+    #               [--save] [--baseline=<file>] [--threshold=<fraction>]
+    #               [--no-import-check]
+    #
+    # --save - save the results as the baseline of the machine
+    # --baseline=<file> - compare with this baseline (default: the baseline of the
+    #       machine, benchmarks/<machine>.json)
+    # --threshold=<fraction> - a rate lower than the baseline by more than the
+    #       threshold is a regression (default 0.10), exit code 1
+    # --no-import-check - don't check the import time of the command line scripts
+    #       (import_time_check.py, a script over the limit fails, exit code 1)
+
+    options = dict(arg[2:].partition("=")[::2] for arg in sys.argv if arg.startswith("--"))
+    names_arg = options["only"].split(",") if options.get("only") else list(BENCHMARKS)
+    for name_arg in names_arg:
+        if name_arg not in BENCHMARKS:
+            print("Error: unknown benchmark:", name_arg, "(" + ", ".join(BENCHMARKS) + ")")
+            sys.exit(1)
+
+    baseline_file = options.get("baseline") or \
+        os.path.join(BENCH_BASELINE_FOLDER, get_machine_id() + ".json")
+    modules_arg = int(options.get("modules") or BENCH_MODULES)
+    print("Machine:", get_machine_id(), "- modules:", modules_arg)
+
+    results_arg = run_benchmarks(names_arg, modules_arg, int(options.get("repeat") or BENCH_REPEAT))
+    baseline_arg = results_state.load(baseline_file)
+    if baseline_arg and baseline_arg.get("modules") != modules_arg:
+        print("Baseline ignored (corpus of", baseline_arg.get("modules"), "modules):", baseline_file)
+        baseline_arg = None
+    regressions_arg = compare_results(results_arg, (baseline_arg or {}).get("results"),\
+                                      float(options.get("threshold") or BENCH_THRESHOLD))
+
+    if "save" in options:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline_file)), exist_ok = True)
+        results_state.save(baseline_file, {"machine" : get_machine_id(), "modules" : modules_arg,\
+                                           "time" : time.strftime("%Y-%m-%d %H:%M:%S"),\
+                                           "results" : results_arg})
+        print("Baseline saved:", baseline_file)
+    if "no-import-check" not in options:
+        print("Import time of the command line scripts:")
+        if not import_time_check.check_import_time():
+            regressions_arg.append("import time")
+    if regressions_arg:
+        print("Error: regression of:", ", ".join(regressions_arg), file = sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,153 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" build_cache - content-addressed cache of the build outputs of every makefile
+    (imposter output and project configuration), used by lint_orchestrator.py
+    to skip the build (make with the imposter, pclp_config.py) when its inputs
+    didn't change.
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+import run_history
+
+# Build cache folder (inside of the working directory, outside of the global
+# results folder, so it is not deleted by ig1.sh)
+BUILD_CACHE_FOLDER = "ig_build_cache"
+# Files of the makefile directory which are inputs of the build (beside the Makefile)
+BUILD_INPUT_EXTENSIONS = (".c", ".cpp", ".h")
+
+#-------------------------------------------------------------------------------
+def get_gcc_version(gcc_exe = "gcc"):
+    """ Return the version text of gcc (first line of gcc --version) or "unknown" """
+    try:
+        res = subprocess.run([gcc_exe, "--version"], capture_output = True, text = True,\
+                             timeout = 30, check = False)
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+    return (res.stdout.splitlines() or ["unknown"])[0]
+
+#-------------------------------------------------------------------------------
+class BuildCache:
+    """ BuildCache - the build outputs of every makefile, stored under a key
+        (sha256) computed from all inputs of the build:
+            - the compiler configuration (ig_co-gcc.lnt, ig_co-gcc.h), the gcc
+              version and pclp_config.py (common to all makefiles)
+            - the path and the content of the Makefile
+            - the list of the sources (names) in the directory of the Makefile
+        A changed input gives a new key (the old entries are never updated).
+        Every entry is a folder <cache_path>/<key[:2]>/<key>/ with the cached files.
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self, cache_path, common_files, gcc_version):
+        """ cache_path - the build cache folder
+            common_files - the inputs common to all makefiles (compiler configuration,
+                pclp_config.py)
+            gcc_version - the version of the compiler
+        """
+        self.cache_path = cache_path
+        self.common_text = gcc_version + "\n" + \
+            "\n".join(run_history.file_hash(filename) for filename in common_files)
+        self.hit_cnt = 0
+        self.miss_cnt = 0
+        self.count_lock = threading.Lock()
+
+    #---------------------------------------------------------------------------
+    def get_key(self, makefile):
+        """ Return the key of the build outputs of a makefile """
+        key_hash = hashlib.sha256(self.common_text.encode('UTF-8'))
+        key_hash.update(b"\n" + makefile.encode('UTF-8') + b"\n")
+        with open(makefile, "rb") as file:
+            key_hash.update(file.read())
+        with os.scandir(os.path.dirname(makefile)) as dir_it:
+            sources = sorted(entry.name for entry in dir_it\
+                             if entry.name.endswith(BUILD_INPUT_EXTENSIONS))
+        key_hash.update(("\n" + "\n".join(sources)).encode('UTF-8'))
+        return key_hash.hexdigest()
+
+    #---------------------------------------------------------------------------
+    def get_entry_path(self, key):
+        """ Return the folder of a cache entry """
+        return os.path.join(self.cache_path, key[:2], key)
+
+    #---------------------------------------------------------------------------
+    def replay(self, key, lres_path, filenames):
+        """ Copy the cached files of an entry into the local results folder.
+            Returns True if the entry was found (cache hit).
+        """
+        entry_path = self.get_entry_path(key)
+        found = all(os.path.isfile(os.path.join(entry_path, filename)) for filename in filenames)
+        if found:
+            for filename in filenames:
+                shutil.copyfile(os.path.join(entry_path, filename),\
+                                os.path.join(lres_path, filename))
+        with self.count_lock:
+            if found:
+                self.hit_cnt += 1
+            else:
+                self.miss_cnt += 1
+        return found
+
+    #---------------------------------------------------------------------------
+    def store(self, key, lres_path, filenames):
+        """ Store the files of the local results folder as the entry key
+            (written in a temporary folder and renamed, a concurrent store of the
+            same entry or an interrupted store doesn't leave a partial entry).
+        """
+        if not all(os.path.isfile(os.path.join(lres_path, filename)) for filename in filenames):
+            return
+        entry_path = self.get_entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok = True)
+        tmp_path = tempfile.mkdtemp(dir = os.path.dirname(entry_path))
+        for filename in filenames:
+            shutil.copyfile(os.path.join(lres_path, filename), os.path.join(tmp_path, filename))
+        try:
+            os.rename(tmp_path, entry_path)
+        except OSError:
+            # Entry already stored
+            shutil.rmtree(tmp_path, ignore_errors = True)
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # <----- 0 ---->|<---- 1 ----->|<-- 2 -->|
+    # build_cache.py <cache_folder> [--clear]
+    #
+    # Print the count and the size of the cache entries (--clear: delete all entries)
+
+    if len(sys.argv) >= 2:
+
+        if "--clear" in sys.argv[2:]:
+            shutil.rmtree(sys.argv[1], ignore_errors = True)
+            print("Build cache cleared:", sys.argv[1])
+            sys.exit(0)
+
+        entries_cnt = 0
+        size_total = 0
+        for dir_path, _, filenames in os.walk(sys.argv[1]):
+            if filenames:
+                entries_cnt += 1
+                size_total += sum(os.path.getsize(os.path.join(dir_path, filename))\
+                                  for filename in filenames)
+        print("Build cache:", sys.argv[1], "-", entries_cnt, "entries,",\
+              f'{size_total / 1048576.0:.1f} MB')
+    else:
+        print("Usage: python build_cache.py <cache_folder> [--clear]")
@@ -16,7 +16,9 @@
 """ c_parser_src - parses C-files and extracts info about defined functions.
     __init__ function
 """
+import os
 import sys
+import profiling
 from .c_parser import CParser
 
 #-------------------------------------------------------------------------------
@@ -24,14 +26,25 @@ def main():
     """ Init function called when the module is invoked direct from command line:
 
         > cd "scripts"
-        > python3 -m c_parser_src <path_to_analyse>
+        > python3 -m c_parser_src <path_to_analyse> [--profile=<cpu|mem|both>]
     """
     print('c_parser_src::__init__.main()')
 
-    if len(sys.argv) > 1:
+    args_list = [arg for arg in sys.argv if not arg.startswith("--")]
+    profile_mode = profiling.parse_profile_option(sys.argv)
+    if profile_mode is None:
+        print("Error: invalid --profile, expected:", "|".join(profiling.PROFILE_MODES))
+        sys.exit(1)
+
+    if len(args_list) > 1:
+        if profile_mode:
+            profiling.profiler.start(profile_mode)
         parser = CParser()
-        parser.process_path(sys.argv[1])
+        with profiling.stage("parse"):
+            parser.process_path(args_list[1])
         parser.show_results(None, sys.stdout)
+        # The profiles are written to the current directory
+        profiling.profiler.finish(os.getcwd(), sys.stdout)
     else:
         print("Nothing to process.")
         print("Specify as argument the path to files to be analyzed.")
@@ -16,6 +16,8 @@
 """ cparser - definition of CParser class
 """
 import os
+import path_resolver
+import tracing
 from .canalyzer import CAnalyzer
 
 #-------------------------------------------------------------------------------
@@ -32,19 +34,26 @@ class CParser:
         """
         self.c_analyzed_dict.clear()
 
-    def analyze(self, filename):
+    def analyze(self, filename, content = None):
         """ Analize a given C file and extract the list of functions.
             filename - the name of the C file to analyze (without path)
             path - full path to the file filename 
+            content - the content of the C file if already read (or None)
         """
         # If file already processed, don't process it again
         if filename in self.c_analyzed_dict:
+            tracing.count("c_parse_cache_hits")
             return
         # if not, process it now
-        analyzer = CAnalyzer()
-        analyzer.analyze(filename)
-        #analyzer.dump_statements(filename + "_out.txt", 0)
-        func_list = analyzer.extract_functions()
+        with tracing.span("c_parse", "module", {"file" : filename}):
+            analyzer = CAnalyzer()
+            analyzer.analyze(filename, content)
+            #analyzer.dump_statements(filename + "_out.txt", 0)
+            func_list = analyzer.extract_functions()
+        if tracing.enabled():
+            tracing.count("c_files_parsed")
+            tracing.count("c_bytes_scanned", len(content) if content is not None \
+                          else os.path.getsize(filename))
         # Add analzed results to dictionary
         if func_list:
             self.c_analyzed_dict[filename] = func_list
@@ -68,12 +77,13 @@ class CParser:
                 for func in func_list:
                     print(func, file = output)
 
-    def process_file(self, filename):
+    def process_file(self, filename, content = None):
         """ Processor main function. 
             filename - file to be analyzed 
+            content - the content of the file if already read (or None)
         """
         if filename.endswith(".c") or filename.endswith(".C"):
-            self.analyze(filename)
+            self.analyze(filename, content)
 
     def process_path(self, path):
         """ Processor main function. 
@@ -87,7 +97,7 @@ class CParser:
             for filename in entry[2]:
                 if filename.endswith(".c") or filename.endswith(".C"):
                     filename = os.path.join(entry[0], filename)
-                    filename = os.path.realpath(filename)
+                    filename = path_resolver.realpath(filename)
                     self.analyze(filename)
 
     def check_file_line(self, filename, line_idx):
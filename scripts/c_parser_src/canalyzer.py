@@ -16,6 +16,7 @@
 """ canalyzer - definition of main CAnallyzer class and extra AnalyzerException
     and CFunction classes.
 """
+import io
 from .block_def import BlockDef
 from .statements import StatementList
 from .statements import StatementType
@@ -63,8 +64,9 @@ class CAnalyzer:
         self.block_def = BlockDef()
         self.statements = StatementList(self.block_def)
 
-    def analyze(self, file_name):
+    def analyze(self, file_name, content = None):
         """ Analyze a C-file and generate the list of statements 
+            content - if not None: the content of the C-file (already read)
         """
         line_idx = 0
 
@@ -77,7 +79,8 @@ class CAnalyzer:
         self.block_def.clear()
         self.statements.clear()
 
-        with open(file_name, encoding='UTF-8') as file:
+        with io.StringIO(content) if content is not None \
+                else open(file_name, encoding='UTF-8') as file:
             for line in file:
                 line_idx += 1
                 line = line.rstrip()
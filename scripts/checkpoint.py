@@ -0,0 +1,91 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" checkpoint - periodic checkpoints of a reduced.py run (processed makefiles
+    and the results so far), used to resume an interrupted run.
+"""
+import hashlib
+import os
+import time
+
+import results_state
+
+# Checkpoint file (in the global results folder)
+CHECKPOINT_FILE = "ig_checkpoint.json"
+# Default interval (in seconds) between two checkpoints
+CHECKPOINT_INTERVAL = 60.0
+
+#-------------------------------------------------------------------------------
+def get_run_key(makefiles, module_ignore_list, config_text):
+    """ Return a key identifying the input of a run: the list of makefiles, the
+        list of modules to be ignored and the options. A checkpoint can be used
+        to resume only a run with the same key.
+    """
+    run_key = hashlib.sha1()
+    run_key.update("\n".join(makefiles).encode('UTF-8'))
+    run_key.update("\n".join(sorted(module_ignore_list or [])).encode('UTF-8'))
+    run_key.update(config_text.encode('UTF-8'))
+    return run_key.hexdigest()
+
+#-------------------------------------------------------------------------------
+class Checkpoint:
+    """ Checkpoint - writes (atomically) the checkpoint file containing:
+            run_key - key of the run (see get_run_key)
+            cursor - count of makefiles processed (from the list of makefiles)
+            state - the results of the processed makefiles (Processor.get_state)
+
+        A new checkpoint is written at most every interval seconds, so the time
+        spent writing checkpoints is a small fraction of the run time.
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self, gres_path, run_key, interval = CHECKPOINT_INTERVAL):
+        self.filename = os.path.join(gres_path, CHECKPOINT_FILE)
+        self.run_key = run_key
+        self.interval = interval
+        self.last_time = time.monotonic()
+        self.cursor = 0
+
+    #---------------------------------------------------------------------------
+    def load(self):
+        """ Load the checkpoint of the run.
+            Returns a tuple (cursor, state) or None if there is no checkpoint
+            (or the checkpoint belongs to a different run).
+        """
+        data = results_state.load(self.filename)
+        if not data or data.get("run_key") != self.run_key:
+            return None
+        self.cursor = data["cursor"]
+        return (self.cursor, results_state.restore_state(data["state"]))
+
+    #---------------------------------------------------------------------------
+    def update(self, cursor, proc, force = False):
+        """ Remember the count of makefiles processed (cursor) and write a checkpoint
+            if the interval elapsed since the last checkpoint (or force is set).
+        """
+        if cursor == self.cursor and not force:
+            return
+        self.cursor = cursor
+        if force or (time.monotonic() - self.last_time) >= self.interval:
+            results_state.save(self.filename, {"run_key" : self.run_key,
+                                               "cursor" : cursor,
+                                               "state" : proc.get_state()})
+            self.last_time = time.monotonic()
+
+    #---------------------------------------------------------------------------
+    def remove(self):
+        """ Remove the checkpoint file (run finished successfully) """
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
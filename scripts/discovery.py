@@ -0,0 +1,106 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" discovery - finds all makefiles in the working directory (os.scandir, one
+    pass over the tree) and writes the list of makefiles and the inventory of
+    the C sources of every makefile.
+"""
+import os
+import sys
+import time
+
+import results_state
+
+# Name of the makefiles
+MAKEFILE_NAME = "Makefile"
+# File where all found Makefiles are stored (in the global results folder)
+MAKEFILES_FILE = "ig_makefiles.txt"
+# Inventory of the C sources of every makefile (in the global results folder)
+INVENTORY_FILE = "ig_sources.json"
+# Extensions of the C sources
+SOURCE_EXTENSIONS = (".c", ".cpp")
+# Directories not scanned (results, history and build cache folders)
+SKIP_DIRS = ("ig_gl_out", "ig_history", "ig_build_cache")
+
+#-------------------------------------------------------------------------------
+def discover(working_dir):
+    """ Scan the working directory tree (every directory read once with os.scandir,
+        the entry types are taken from the directory listing, without extra stat
+        calls) and find all makefiles and the C sources of their directories.
+        Returns a tuple (makefiles, inventory):
+            makefiles - sorted list of the makefiles (full path)
+            inventory - {makefile : {source_name : size, ...}, ...}
+    """
+    makefiles = []
+    inventory = {}
+    dir_stack = [os.path.abspath(working_dir)]
+    while dir_stack:
+        dir_path = dir_stack.pop()
+        sub_dirs = []
+        sources = {}
+        has_makefile = False
+        try:
+            with os.scandir(dir_path) as dir_it:
+                for entry in dir_it:
+                    if entry.is_dir(follow_symlinks = False):
+                        if entry.name not in SKIP_DIRS:
+                            sub_dirs.append(entry.path)
+                    elif entry.name == MAKEFILE_NAME:
+                        has_makefile = True
+                    elif entry.name.endswith(SOURCE_EXTENSIONS):
+                        sources[entry.name] = entry.stat().st_size
+        except OSError:
+            continue
+
+        if has_makefile:
+            makefile = os.path.join(dir_path, MAKEFILE_NAME)
+            makefiles.append(makefile)
+            inventory[makefile] = dict(sorted(sources.items()))
+        dir_stack.extend(sorted(sub_dirs, reverse = True))
+
+    makefiles.sort()
+    return (makefiles, inventory)
+
+#-------------------------------------------------------------------------------
+def write_makefiles(gres_path, makefiles, inventory):
+    """ Write the list of makefiles and the inventory into the global results folder """
+    with open(os.path.join(gres_path, MAKEFILES_FILE), "w", encoding='UTF-8') as file:
+        for makefile in makefiles:
+            print(makefile, file = file)
+    results_state.save(os.path.join(gres_path, INVENTORY_FILE), inventory)
+
+#-------------------------------------------------------------------------------
+def load_inventory(gres_path):
+    """ Load the inventory of the C sources (or None if not found) """
+    return results_state.load(os.path.join(gres_path, INVENTORY_FILE))
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # <---- 0 ---->|<---- 1 ----->|<---- 2 ---->|
+    # discovery.py  <working_dir>  <gres_folder>
+    #
+    # Writes <gres_folder>/ig_makefiles.txt and <gres_folder>/ig_sources.json
+
+    if len(sys.argv) >= 3:
+
+        time_start = time.perf_counter()
+        makefiles_arg, inventory_arg = discover(sys.argv[1])
+        write_makefiles(sys.argv[2], makefiles_arg, inventory_arg)
+        print("[INFO] Found", len(makefiles_arg), "Makefiles,",\
+              sum(len(sources) for sources in inventory_arg.values()), "sources in",\
+              f'{time.perf_counter() - time_start:.2f}s')
+    else:
+        print("Usage: python discovery.py <working_dir> <gres_folder>")
@@ -0,0 +1,176 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" function_results - per-function results: count of every issue found in
+    every function of every module.
+"""
+import array
+import heapq
+
+# Default memory budget (in bytes) of the function results columns
+FUNC_RESULTS_MEMORY = 64 * 1024 * 1024
+
+#-------------------------------------------------------------------------------
+class StringTable:
+    """ StringTable - interns strings: every distinct string is stored once and
+        identified by its index (id) in the table.
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self):
+        self.strings = []
+        self.ids = {}
+
+    #---------------------------------------------------------------------------
+    def intern(self, text):
+        """ Return the id of text, add text to the table if not yet there """
+        str_id = self.ids.get(text)
+        if str_id is None:
+            str_id = len(self.strings)
+            self.strings.append(text)
+            self.ids[text] = str_id
+        return str_id
+
+    #---------------------------------------------------------------------------
+    def get(self, str_id):
+        """ Return the string with the id str_id """
+        return self.strings[str_id]
+
+#-------------------------------------------------------------------------------
+class FunctionResults:
+    """ FunctionResults - holds the count of every issue per
+        (module id, function id, issue number).
+
+        Module and function names are interned in one shared StringTable (the
+        same function names, like goodG2B, are found in thousands of modules).
+        The results are stored in array-backed columns, a row per
+        (module, function, issue):
+
+            col_module   : array('I', [module_id1, module_id2, ...])
+            col_function : array('I', [function_id1, function_id2, ...])
+            col_issue    : array('I', [issue_nr1, issue_nr2, ...])
+            col_count    : array('I', [count1, count2, ...])
+
+        and the rows of every issue are indexed: issue_rows = {issue_nr : array('I', [rows])}.
+
+        The rows of the current module are located with a small dictionary which
+        is released when the next module starts. A module processed again later
+        (from another makefile) gets new rows, the queries sum them up.
+
+        The memory of the columns is limited by memory_limit (bytes), issues
+        that don't fit anymore are not stored, but counted in dropped_cnt.
+    """
+
+    # Bytes used by one row: 4 columns + issue index, 4 bytes each
+    ROW_SIZE = 5 * 4
+
+    #---------------------------------------------------------------------------
+    def __init__(self, memory_limit = FUNC_RESULTS_MEMORY):
+        self.strings = StringTable()
+        self.col_module = array.array('I')
+        self.col_function = array.array('I')
+        self.col_issue = array.array('I')
+        self.col_count = array.array('I')
+        self.issue_rows = {}
+        self.max_rows = memory_limit // self.ROW_SIZE
+        self.dropped_cnt = 0
+        self.module_id = None
+        self.module_rows = {}
+
+    #---------------------------------------------------------------------------
+    def add(self, module_name, func_name, issue_number, count = 1):
+        """ Add an issue (count times) found in function func_name of module module_name """
+
+        module_id = self.strings.intern(module_name)
+        if module_id != self.module_id:
+            self.module_id = module_id
+            self.module_rows.clear()
+
+        function_id = self.strings.intern(func_name)
+        row_key = (function_id, issue_number)
+        row = self.module_rows.get(row_key)
+        if row is not None:
+            self.col_count[row] += count
+            return
+
+        row = len(self.col_count)
+        if row >= self.max_rows:
+            self.dropped_cnt += count
+            return
+
+        self.col_module.append(module_id)
+        self.col_function.append(function_id)
+        self.col_issue.append(issue_number)
+        self.col_count.append(count)
+        self.module_rows[row_key] = row
+
+        rows = self.issue_rows.get(issue_number)
+        if rows is None:
+            rows = array.array('I')
+            self.issue_rows[issue_number] = rows
+        rows.append(row)
+
+    #---------------------------------------------------------------------------
+    def get_state(self):
+        """ Return the results as plain types (used to transfer/store partial results):
+            {"strings" : [str0, str1, ...],
+             "columns" : [[module_ids], [function_ids], [issue_nrs], [counts]],
+             "dropped" : count}
+        """
+        return {"strings" : self.strings.strings,
+                "columns" : [self.col_module.tolist(), self.col_function.tolist(),
+                             self.col_issue.tolist(), self.col_count.tolist()],
+                "dropped" : self.dropped_cnt}
+
+    #---------------------------------------------------------------------------
+    def merge_state(self, state):
+        """ Merge partial results (as generated by get_state) into these results """
+        strings = state["strings"]
+        for module_id, function_id, issue_number, count in zip(*state["columns"]):
+            self.add(strings[module_id], strings[function_id], issue_number, count)
+        self.dropped_cnt += state["dropped"]
+
+    #---------------------------------------------------------------------------
+    def top_functions(self, issue_number, top_cnt = 10, name_filter = None, per_module = False):
+        """ Return the top_cnt functions with the biggest count of issue_number,
+            as a list of tuples sorted by count: [(count, func_name, module_name), ...]
+            name_filter - if set, only functions containing this text (case insensitive)
+                are returned, example: "good" returns only False-Positive functions
+            per_module - if False, the counts of the functions with the same name are
+                summed-up over all modules (module_name is None in this case)
+        """
+        name_filter = name_filter.lower() if name_filter else None
+        counts = {}
+        for row in self.issue_rows.get(issue_number, ()):
+            function_id = self.col_function[row]
+            if name_filter and name_filter not in self.strings.get(function_id).lower():
+                continue
+            key = (function_id, self.col_module[row] if per_module else None)
+            counts[key] = counts.get(key, 0) + self.col_count[row]
+
+        top_list = heapq.nlargest(top_cnt, counts.items(), key = lambda item: item[1])
+        return [(cnt, self.strings.get(key[0]),
+                 self.strings.get(key[1]) if key[1] is not None else None)
+                for key, cnt in top_list]
+
+    #---------------------------------------------------------------------------
+    def dump_top(self, output, top_cnt = 10, name_filter = None):
+        """ Dump (to a file or stdout) the top_cnt functions for every issue """
+        for issue_number in sorted(self.issue_rows):
+            print(issue_number, file = output)
+            for cnt, func_name, _ in self.top_functions(issue_number, top_cnt, name_filter):
+                print(f'{cnt:8} {func_name}', file = output)
+        if self.dropped_cnt:
+            print("Issues not stored (memory limit reached):", self.dropped_cnt, file = output)
@@ -0,0 +1,347 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" gen_corpus - generates a synthetic Juliet-like corpus for benchmarks: CWE
+    directories (the big CWEs split in s01, s02, ... as in Juliet) with a
+    Makefile and C test cases (bad, goodG2B, goodB2G and good functions with
+    comments, macros and strings), the PClint output of every directory and
+    the list of makefiles, in the layout written by ig1.sh.
+    The same seed and arguments always generate the same corpus.
+"""
+import os
+import random
+import sys
+import time
+
+import discovery
+
+# Global results folder
+GRES_FOLDER = "ig_gl_out"
+# PClint output file
+PCLP_OUT_FILE = "ig_pclint_out.txt"
+# List of makefiles read by reduced.py
+MAKEFILES_WIN_NAME = "ig_makefiles_win1.txt"
+# Default count of modules
+CORPUS_MODULES = 1000
+# Default maximum count of modules of a makefile (a bigger CWE is split in sNN)
+CORPUS_MODULES_PER_MAKEFILE = 1000
+
+# CWEs of the corpus and their share of the modules (CWE121 and CWE122 are the
+# biggest directories of Juliet, CWE561 one of the smallest)
+CORPUS_CWES = (
+    (121, "Stack_Based_Buffer_Overflow", 20),
+    (122, "Heap_Based_Buffer_Overflow", 20),
+    (190, "Integer_Overflow", 12),
+    (191, "Integer_Underflow", 9),
+    (78, "OS_Command_Injection", 8),
+    (134, "Uncontrolled_Format_String", 7),
+    (401, "Memory_Leak", 6),
+    (457, "Use_of_Uninitialized_Variable", 4),
+    (476, "NULL_Pointer_Dereference", 3),
+    (415, "Double_Free", 3),
+    (690, "NULL_Deref_From_Return", 3),
+    (835, "Infinite_Loop", 2),
+    (561, "Dead_Code", 1),
+    (484, "Omitted_Break_Statement_in_Switch", 1),
+    (570, "Expression_Always_False", 1)
+)
+# Words of the functional variants (data type, source, sink)
+VARIANT_TYPES = ("char", "wchar_t", "int", "int64_t", "short", "unsigned_int", "struct")
+VARIANT_SOURCES = ("alloca", "declare", "malloc", "rand", "fgets", "fscanf", "listen_socket")
+VARIANT_SINKS = ("cpy", "memcpy", "memmove", "ncat", "loop", "add", "multiply", "printf", "free")
+# Flow variants (Juliet: 01 baseline ... 84)
+FLOW_VARIANTS = 84
+# PClint messages of the corpus: (number, type)
+CORPUS_MESSAGES = ((774, "info"), (534, "warning"), (793, "info"), (746, "info"),\
+                   (527, "warning"), (528, "warning"), (613, "warning"), (661, "warning"),\
+                   (662, "warning"), (423, "warning"), (438, "warning"), (830, "info"),\
+                   (818, "info"), (715, "info"), (732, "info"), (9029, "note"), (9050, "note"))
+
+# The support files of the corpus (testcasesupport)
+SUPPORT_HEADER = """#ifndef _STD_TESTCASE_H
+#define _STD_TESTCASE_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+extern const int GLOBAL_CONST_TRUE;
+extern const int GLOBAL_CONST_FALSE;
+
+void printLine(const char * line);
+void printIntLine(int intNumber);
+int globalReturnsTrue(void);
+
+#endif
+"""
+SUPPORT_SOURCE = """#include "std_testcase.h"
+
+const int GLOBAL_CONST_TRUE = 1;
+const int GLOBAL_CONST_FALSE = 0;
+
+void printLine(const char * line)
+{
+    if(line != NULL)
+    {
+        printf("%s\\n", line);
+    }
+}
+
+void printIntLine(int intNumber)
+{
+    printf("%d\\n", intNumber);
+}
+
+int globalReturnsTrue(void)
+{
+    return GLOBAL_CONST_TRUE;
+}
+"""
+# Makefile of a directory ({support} - relative path of testcasesupport, {target} - CWE)
+MAKEFILE_TEMPLATE = """CC=/usr/bin/gcc
+CFLAGS=-c
+INCLUDES=-I {support}
+
+C_SOURCES=$(wildcard CWE*.c)
+C_OBJECTS=$(C_SOURCES:.c=.o)
+C_SUPPORT_FILES={support}/io.c
+TARGET={target}
+
+all: $(TARGET)
+
+$(TARGET) : $(C_OBJECTS) io.o
+\t$(CC) $(C_OBJECTS) io.o -o $(TARGET)
+
+$(C_OBJECTS) : %.o:%.c
+\t$(CC) $(CFLAGS) $(INCLUDES) $^ -o $@
+
+io.o : $(C_SUPPORT_FILES)
+\t$(CC) $(CFLAGS) $(INCLUDES) $(C_SUPPORT_FILES) -o $@
+
+clean:
+\trm -rf *.o *.out $(TARGET)
+"""
+
+#-------------------------------------------------------------------------------
+def gen_random_statements(rand, lines_cnt, flaw):
+    """ Generate the statements of a function body (indented, list of lines),
+        flaw - comment of the statements: "FLAW" (bad function) or "FIX" (good)
+    """
+    lines = ["    char dataBuffer[100] = \"\";", "    char * data = dataBuffer;"]
+    while len(lines) < lines_cnt:
+        choice = rand.randrange(1, 8)
+        if choice == 1:
+            lines += ["    /* " + flaw + ": the buffer size is checked { not a block } */",\
+                      "    memset(data, 'A', 100-1); /* fill with 'A's */"]
+        elif choice == 2:
+            lines += ["    if(globalReturnsTrue())", "    {",\
+                      "        printLine(\"Benign, fixed string with {braces}\");", "    }"]
+        elif choice == 3:
+            lines += ["    {", "        size_t i;",\
+                      "        for (i = 0; i < 10; i++)", "        {",\
+                      "            data[i] = SRC_STRING[i];", "        }", "    }"]
+        elif choice == 4:
+            lines += ["    printIntLine((int)'A');",\
+                      "    printLine(\"\\\"quoted\\\" string; /* not a comment */\");"]
+        elif choice == 5:
+            lines += ["    if(GLOBAL_CONST_FALSE)", "    {",\
+                      "        /* INCIDENTAL: CWE 561 Dead Code, the code below will never run */",\
+                      "        printLine(\"Benign, fixed string\");", "    }", "    else", "    {",\
+                      "        data[0] = '\\0';", "    }"]
+        elif choice == 6:
+            lines += ["    switch(6)", "    {", "    case 6:", "        data = NULL;",\
+                      "        break;", "    default:",\
+                      "        printLine(\"Benign, fixed string\");", "        break;", "    }"]
+        else:
+            lines += ["    /* " + flaw + ": " + rand.choice(VARIANT_SINKS) + " of " + \
+                      rand.choice(VARIANT_TYPES) + " data */", "    printIntLine(BUFFER_SIZE);"]
+    return lines
+
+#-------------------------------------------------------------------------------
+def gen_random_module(rand, module_base):
+    """ Generate a Juliet-like test case.
+        Returns a tuple (lines, functions) where:
+            lines - the lines of the C source
+            functions - the body lines of every function: [(name, first_line, last_line), ...]
+    """
+    lines = ["/* TEMPLATE GENERATED TESTCASE FILE",\
+             "Filename: " + module_base + ".c",\
+             "Label Definition File: " + module_base[:module_base.rfind("_")] + ".label.xml",\
+             "Template File: sources-sink-" + module_base[-2:] + ".tmpl.c",\
+             "*/", "/*", " * @description",\
+             " * BadSource: " + rand.choice(VARIANT_SOURCES) + " Allocate data",\
+             " * GoodSource: Allocate and initialize data",\
+             " * Sink: " + rand.choice(VARIANT_SINKS),\
+             " * Flow Variant: " + module_base[-2:],\
+             " * */", "", "#include \"std_testcase.h\"", "",\
+             "#define BUFFER_SIZE " + str(rand.choice((10, 50, 100))),\
+             "#define SRC_STRING \"AAAAAAAAAA\"", ""]
+    functions = []
+
+    def add_function(name, signature, flaw, body_cnt):
+        lines.append(signature)
+        lines.append("{")
+        first_line = len(lines) + 1
+        lines.extend(gen_random_statements(rand, body_cnt, flaw))
+        functions.append((name, first_line, len(lines)))
+        lines.append("}")
+        lines.append("")
+
+    lines += ["#ifndef OMITBAD", ""]
+    add_function("bad", "void " + module_base + "_bad()", "FLAW", rand.randint(8, 30))
+    lines += ["#endif /* OMITBAD */", "", "#ifndef OMITGOOD", "",\
+              "/* goodG2B uses the GoodSource with the BadSink */"]
+    add_function("goodG2B", "static void goodG2B()", "FIX", rand.randint(8, 25))
+    lines.append("/* goodB2G uses the BadSource with the GoodSink */")
+    add_function("goodB2G", "static void goodB2G()", "FIX", rand.randint(8, 25))
+    lines += ["void " + module_base + "_good()", "{", "    goodG2B();", "    goodB2G();", "}", "",\
+              "#endif /* OMITGOOD */", "", "#ifdef INCLUDEMAIN", ""]
+    add_function("main", "int main(int argc, char * argv[])", "MAIN", 4)
+    lines += ["#endif", ""]
+    return (lines, functions)
+
+#-------------------------------------------------------------------------------
+def gen_random_issues(rand, functions):
+    """ Generate the PClint messages of a module: most messages in the bad function,
+        some in the good functions and in main. Returns [(line, type, number), ...]
+    """
+    issues = []
+    counts = {"bad" : rand.randint(1, 4), "goodG2B" : rand.randint(0, 2),\
+              "goodB2G" : rand.randint(0, 2), "main" : rand.randint(0, 1)}
+    for name, first_line, last_line in functions:
+        for _ in range(counts[name]):
+            msg_nr, msg_type = rand.choice(CORPUS_MESSAGES)
+            issues.append((rand.randint(first_line, last_line), msg_type, msg_nr))
+    return sorted(issues)
+
+#-------------------------------------------------------------------------------
+def get_directories(modules_cnt, per_makefile):
+    """ Split modules_cnt modules in CWE directories (by the share of every CWE),
+        a CWE with more than per_makefile modules is split in sub-directories.
+        Returns a list of tuples (relative_path, cwe_nr, cwe_name, modules_cnt)
+    """
+    share_total = sum(share for _, _, share in CORPUS_CWES)
+    directories = []
+    assigned_cnt = 0
+    for idx, (cwe_nr, cwe_name, share) in enumerate(CORPUS_CWES):
+        if idx == len(CORPUS_CWES) - 1:
+            cwe_cnt = modules_cnt - assigned_cnt
+        else:
+            cwe_cnt = max(modules_cnt * share // share_total, 1)
+        cwe_cnt = min(cwe_cnt, modules_cnt - assigned_cnt)
+        if cwe_cnt <= 0:
+            break
+        assigned_cnt += cwe_cnt
+        cwe_dir = os.path.join("testcases", f'CWE{cwe_nr}_{cwe_name}')
+        if cwe_cnt <= per_makefile:
+            directories.append((cwe_dir, cwe_nr, cwe_name, cwe_cnt))
+            continue
+        sub_cnt = (cwe_cnt + per_makefile - 1) // per_makefile
+        for sub_idx in range(sub_cnt):
+            directories.append((os.path.join(cwe_dir, f's{sub_idx + 1:02}'), cwe_nr, cwe_name,\
+                                cwe_cnt // sub_cnt + (1 if sub_idx < cwe_cnt % sub_cnt else 0)))
+    return directories
+
+#-------------------------------------------------------------------------------
+def get_pclint_out_file(corpus_path, makefile):
+    """ Return the PClint output file of a makefile of the corpus """
+    return os.path.join(os.path.abspath(corpus_path), GRES_FOLDER,\
+        os.path.relpath(os.path.dirname(makefile), os.path.abspath(corpus_path)), PCLP_OUT_FILE)
+
+#-------------------------------------------------------------------------------
+def gen_corpus(corpus_path, modules_cnt = CORPUS_MODULES, seed = 1,\
+               per_makefile = CORPUS_MODULES_PER_MAKEFILE):
+    """ Write a synthetic corpus of modules_cnt modules into corpus_path (the
+        working directory of ig1.sh and reduced.py):
+            testcases/CWE<nr>_<name>[/sNN]/ - Makefile and C test cases
+            testcasesupport/ - std_testcase.h, io.c
+            ig_gl_out/ - the list of makefiles, the inventory of the sources and
+                the PClint output of every makefile
+        Returns the list of the makefiles (full path)
+    """
+    rand = random.Random(seed)
+    corpus_path = os.path.abspath(corpus_path)
+    gres_path = os.path.join(corpus_path, GRES_FOLDER)
+    support_path = os.path.join(corpus_path, "testcasesupport")
+    os.makedirs(support_path, exist_ok = True)
+    with open(os.path.join(support_path, "std_testcase.h"), "w", encoding='UTF-8') as file:
+        file.write(SUPPORT_HEADER)
+    with open(os.path.join(support_path, "io.c"), "w", encoding='UTF-8') as file:
+        file.write(SUPPORT_SOURCE)
+
+    makefiles = []
+    inventory = {}
+    for dir_rel, cwe_nr, cwe_name, dir_modules_cnt in get_directories(modules_cnt, per_makefile):
+        make_path = os.path.join(corpus_path, dir_rel)
+        lres_path = os.path.join(gres_path, dir_rel)
+        os.makedirs(make_path, exist_ok = True)
+        os.makedirs(lres_path, exist_ok = True)
+        support_rel = os.path.relpath(support_path, make_path)
+        makefile = os.path.join(make_path, discovery.MAKEFILE_NAME)
+        with open(makefile, "w", encoding='UTF-8') as file:
+            file.write(MAKEFILE_TEMPLATE.format(support = support_rel, target = f'CWE{cwe_nr}'))
+
+        sources = {}
+        with open(os.path.join(lres_path, PCLP_OUT_FILE), "w", encoding='UTF-8') as pclp_output:
+            for module_idx in range(dir_modules_cnt):
+                # CWE121_Stack_Based_Buffer_Overflow__char_alloca_cpy_s01_0001_01
+                module_base = f'CWE{cwe_nr}_{cwe_name}__{rand.choice(VARIANT_TYPES)}_' + \
+                    f'{rand.choice(VARIANT_SOURCES)}_{rand.choice(VARIANT_SINKS)}_' + \
+                    f'{len(makefiles):03}{module_idx:04}_{rand.randint(1, FLOW_VARIANTS):02}'
+                module_name = module_base + ".c"
+                lines, functions = gen_random_module(rand, module_base)
+                content = "\n".join(lines) + "\n"
+                with open(os.path.join(make_path, module_name), "w", encoding='UTF-8') as file:
+                    file.write(content)
+                sources[module_name] = len(content)
+
+                print(f'--- Module:   {module_name} (C)', file = pclp_output)
+                for line_nr, msg_type, msg_nr in gen_random_issues(rand, functions):
+                    print(f'{module_name}, {line_nr}, {msg_type}, {msg_nr}', file = pclp_output)
+                print("--- Module Wrap-up", file = pclp_output)
+                print("", file = pclp_output)
+
+        makefiles.append(makefile)
+        inventory[makefile] = sources
+
+    makefiles.sort()
+    discovery.write_makefiles(gres_path, makefiles, inventory)
+    with open(os.path.join(gres_path, MAKEFILES_WIN_NAME), "w", encoding='UTF-8') as file:
+        for makefile in makefiles:
+            print(makefile, file = file)
+    return makefiles
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # <---- 0 ---->|<---- 1 ---->|<---- 2 ---->|<--- 3 --->|<-------- 4 ------->|
+    # gen_corpus.py <corpus_path> [modules_cnt] [--seed=<N>] [--per-makefile=<N>]
+    #
+    # Generate a corpus of modules_cnt modules (default 1000) in corpus_path
+
+    args_list = [arg for arg in sys.argv if not arg.startswith("--")]
+    options = dict(arg[2:].partition("=")[::2] for arg in sys.argv if arg.startswith("--"))
+
+    if len(args_list) >= 2:
+        time_start = time.perf_counter()
+        makefiles_arg = gen_corpus(args_list[1],\
+            int(args_list[2]) if len(args_list) >= 3 else CORPUS_MODULES,\
+            int(options.get("seed") or 1),\
+            int(options.get("per-makefile") or CORPUS_MODULES_PER_MAKEFILE))
+        print("Corpus:", args_list[1], "-", len(makefiles_arg), "makefiles in",\
+              f'{time.perf_counter() - time_start:.1f}s')
+    else:
+        print("Usage: python gen_corpus.py <corpus_path> [modules_cnt] [--seed=<N>] " + \
+              "[--per-makefile=<N>]")
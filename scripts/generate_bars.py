@@ -17,6 +17,7 @@
 """
 import random
 import matplotlib.pyplot as plt
+import tracing
 
 #-------------------------------------------------------------------------------
 def gen_bars(bar1_dict, bar2_dict, **kwarg):
@@ -103,9 +104,53 @@ def gen_bars(bar1_dict, bar2_dict, **kwarg):
         axes.set_title(kwarg["title"])
 
     if "filename" in kwarg:
-        plt.savefig(kwarg["filename"])
+        with tracing.span("chart_save", "chart", {"file" : kwarg["filename"]}):
+            plt.savefig(kwarg["filename"])
     else:
         plt.show()
+    plt.close(fig)
+
+#-------------------------------------------------------------------------------
+def gen_precision_bars(prec_dict, **kwarg):
+    """ Generate bar-plot with the precision of every issue and its confidence interval.
+        prec_dict - dictionary containing the names and the precision values
+        (together with the confidence interval) for every bar:
+           {name1 : (prec1, ci_low1, ci_high1), name2 : (prec2, ci_low2, ci_high2), ... }
+        Other parameters:
+        title - plot title
+        bar_color - dictionary containing the color for every bar {name1 : color1, ...}
+        filename - do not display but instead save the plot to a file
+    """
+
+    # Sort dictionary by precision, bars with bigger precision are on top
+    prec_sort = sorted(prec_dict.items(), key=lambda item: item[1][0])
+
+    blist_names = [x[0] for x in prec_sort]
+    blist_prec = [x[1][0] for x in prec_sort]
+    # Error bars: distance from the precision to the interval ends
+    blist_err = [[max(0.0, x[1][0] - x[1][1]) for x in prec_sort],
+                 [max(0.0, x[1][2] - x[1][0]) for x in prec_sort]]
+
+    bar_color_dict = kwarg.get("bar_color")
+    blist_col = None
+    if bar_color_dict:
+        blist_col = [bar_color_dict.get(issue_name) for issue_name in blist_names]
+
+    fig, axes = plt.subplots(figsize=(10.0, 10.0))
+
+    axes.barh(blist_names, blist_prec, 0.8, xerr=blist_err, align='center',\
+              color=blist_col, capsize=3.0)
+    axes.set_xlim(0.0, 1.0)
+
+    if "title" in kwarg:
+        axes.set_title(kwarg["title"])
+
+    if "filename" in kwarg:
+        with tracing.span("chart_save", "chart", {"file" : kwarg["filename"]}):
+            plt.savefig(kwarg["filename"])
+    else:
+        plt.show()
+    plt.close(fig)
 
 #-------------------------------------------------------------------------------
 def gen_random_bars_data(big_cnt, big_max, small_cnt, small_max, start_idx = 0):
@@ -18,6 +18,7 @@
 import random
 import matplotlib.pyplot as plt
 import numpy as np
+import tracing
 
 #-------------------------------------------------------------------------------
 def gen_pie(pie_data, filename, pie_fullness = 0.95):
@@ -144,9 +145,11 @@ def gen_pie(pie_data, filename, pie_fullness = 0.95):
     #   bbox_to_anchor=(1, 0, 0.5, 1))
 
     if filename:
-        plt.savefig(filename)
+        with tracing.span("chart_save", "chart", {"file" : filename}):
+            plt.savefig(filename)
     else:
         plt.show()
+    plt.close(fig)
 
 #-------------------------------------------------------------------------------
 def gen_random_pie_data(title):
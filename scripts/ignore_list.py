@@ -16,6 +16,7 @@
 """ ignore_list - implements IgnoreModuleList Class
 """
 import os
+import path_resolver
 
 #-------------------------------------------------------------------------------
 class IgnoreModuleList:
@@ -41,7 +42,7 @@ class IgnoreModuleList:
             for filename in entry[2]:
                 if filename.endswith(".c") or filename.endswith(".C"):
                     filename = os.path.join(entry[0], filename)
-                    filename = os.path.realpath(filename)
+                    filename = path_resolver.realpath(filename)
                     if os.path.isfile(filename) and filename not in self.ignore_list:
                         self.ignore_list.append(filename)
 
@@ -64,7 +65,7 @@ class IgnoreModuleList:
                 filename = os.path.join(working_dir, filename)
                 if not os.path.exists(filename):
                     return False
-            filename = os.path.realpath(filename)
+            filename = path_resolver.realpath(filename)
 
         # Line is a directory?
         if os.path.isdir(filename):
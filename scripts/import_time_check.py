@@ -0,0 +1,95 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" import_time_check - measures the import time of the command line scripts
+    (python -X importtime) and fails if a script loads the chart modules
+    (matplotlib, numpy) at startup or its import time exceeds the limit.
+"""
+import os
+import subprocess
+import sys
+
+# Scripts checked by default
+CHECK_MODULES = ("reduced", "merge_shards", "shard", "sampling", "discovery", "query_daemon")
+# Default limit of the import time of a script (milliseconds)
+CHECK_LIMIT_MS = 100
+# Count of measurements of every script (the fastest is used)
+CHECK_RUNS = 5
+# Modules which must not be loaded at startup (loaded only to generate the charts)
+HEAVY_MODULES = ("matplotlib", "numpy")
+
+#-------------------------------------------------------------------------------
+def measure_import(module_name):
+    """ Import a module in a new interpreter (python -X importtime).
+        Returns a tuple (import_ms, slowest, heavy) where:
+            import_ms - cumulative import time of the module (milliseconds)
+            slowest - list of the slowest imported modules: [(cumulative_ms, name), ...]
+            heavy - list of the heavy modules (HEAVY_MODULES) imported
+    """
+    res = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module_name],\
+                         cwd = os.path.dirname(os.path.abspath(__file__)),\
+                         capture_output = True, text = True, check = False)
+    if res.returncode:
+        raise ValueError("Error importing " + module_name + ": " + res.stderr.strip()[-200:])
+
+    # Format: "import time: <self_us> | <cumulative_us> | <indentation><module_name>"
+    import_ms = 0.0
+    imported = []
+    for line in res.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].strip()
+        cumulative_ms = int(fields[1]) / 1000.0
+        imported.append((cumulative_ms, name))
+        if name == module_name:
+            import_ms = cumulative_ms
+
+    slowest = sorted((item for item in imported if item[1] != module_name), reverse = True)[:5]
+    heavy = sorted({name for _, name in imported if name.split(".")[0] in HEAVY_MODULES})
+    return (import_ms, slowest, heavy)
+
+#-------------------------------------------------------------------------------
+def check_import_time(modules = CHECK_MODULES, limit_ms = CHECK_LIMIT_MS):
+    """ Measure the import time of every module (the fastest of CHECK_RUNS runs).
+        Returns True if no module loads a heavy module and all import times are
+        within the limit.
+    """
+    passed = True
+    for module_name in modules:
+        import_ms, slowest, heavy = min(measure_import(module_name) for _ in range(CHECK_RUNS))
+        status = "ok"
+        if heavy:
+            status = "FAIL: imports " + ", ".join(name for name in heavy if "." not in name)
+        elif import_ms > limit_ms:
+            status = "FAIL: over the limit"
+        passed = passed and status == "ok"
+        print(f'{module_name:<16}{import_ms:8.1f} ms  {status}')
+        print("    slowest:", ", ".join(f'{name} {cumulative_ms:.1f}' for cumulative_ms, name in slowest))
+    print(f'limit: {limit_ms} ms')
+    return passed
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # <-------- 0 ------->|<--- 1 --->|<---- 2 ---->|
+    # import_time_check.py [limit_ms]  [module ...]
+
+    limit_arg = float(sys.argv[1]) if len(sys.argv) >= 2 else CHECK_LIMIT_MS
+    modules_arg = sys.argv[2:] if len(sys.argv) >= 3 else CHECK_MODULES
+
+    if not check_import_time(modules_arg, limit_arg):
+        print("Error: import time check failed", file = sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,33 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" juliet_cwe - the CWE of a Juliet test case, from the module name
+    (shared by the processor, the run history, the sampling and the daemon).
+"""
+import os
+import re
+
+# Extract CWE number from the module name, example: CWE561_Dead_Code__...
+CWE_REGEX = re.compile(r"CWE(\d+)_")
+
+#-------------------------------------------------------------------------------
+def get_cwe_number(module_name):
+    """ Return the CWE number of a module (from the module name) or 0 if
+        the module doesn't belong to any CWE (example: testcasesupport/io.c).
+    """
+    match = CWE_REGEX.search(os.path.basename(module_name))
+    if match:
+        return int(match.group(1))
+    return 0
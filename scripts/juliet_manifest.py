@@ -0,0 +1,143 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" juliet_manifest - loads the Juliet manifest.xml (the list of all flaws: file
+    and line) and classifies issues based on the distance to the flaw lines.
+"""
+import array
+import bisect
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+# Issue labels (classification of an issue based on the flaw lines)
+FLAW_EXACT = 0  # issue reported exactly on a flaw line
+FLAW_NEAR = 1   # issue reported within +/- tolerance lines of a flaw line
+FLAW_OFF = 2    # issue reported off-target (not near any flaw line)
+
+FLAW_LABELS = {FLAW_EXACT : "exact", FLAW_NEAR : "near", FLAW_OFF : "off"}
+
+# Manifest elements marking a flaw line
+FLAW_TAGS = ("flaw", "mixed")
+
+#-------------------------------------------------------------------------------
+class JulietManifest:
+    """ JulietManifest - holds the flaw lines of every file from the Juliet
+        manifest.xml file. Example of a manifest:
+
+            <container>
+              <testcase>
+                <file path="CWE561_Dead_Code__return_before_code_01.c">
+                  <flaw line="14" name="CWE-561: Dead Code"/>
+                </file>
+              </testcase>
+              ...
+            </container>
+
+        The manifest is parsed as a stream (iterparse) and every processed
+        element is released, the memory is bounded by the size of the index:
+
+            self.flaw_lines = {file_name1 : array('i', [line1, line2, ...]),
+                               file_name2 : array('i', [line1, line2, ...]),
+                                 ...
+                              }
+
+        where file_name is the file name without path and the lines are sorted,
+        an issue lookup is a binary search (bisect) in the lines of the file.
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self):
+        self.flaw_lines = {}
+        self.flaws_cnt = 0
+
+    #---------------------------------------------------------------------------
+    def load(self, filename):
+        """ Load (stream-parse) the Juliet manifest file.
+            Returns None in case of success or error string in case of error
+        """
+        if not os.path.isfile(filename):
+            return "Error: file not found: " + filename
+
+        file_name = None
+        file_lines = None
+        root = None
+        try:
+            for event, elem in ET.iterparse(filename, events = ("start", "end")):
+                if event == "start":
+                    if root is None:
+                        root = elem
+                    elif elem.tag == "file":
+                        file_name = os.path.basename(elem.get("path", ""))
+                        file_lines = self.flaw_lines.setdefault(file_name, array.array('i'))
+                    continue
+
+                if elem.tag in FLAW_TAGS and file_lines is not None:
+                    file_lines.append(int(elem.get("line", "0")))
+                    self.flaws_cnt += 1
+                elif elem.tag == "file":
+                    file_name = None
+                    file_lines = None
+                elif elem.tag == "testcase":
+                    # Release all the elements of the processed testcase
+                    elem.clear()
+                    root.clear()
+        except (ET.ParseError, ValueError) as ex:
+            return "Error parsing manifest " + filename + ": " + str(ex)
+
+        # Sort the lines of every file (required by bisect)
+        for name, lines in self.flaw_lines.items():
+            self.flaw_lines[name] = array.array('i', sorted(lines))
+
+        return None
+
+    #---------------------------------------------------------------------------
+    def classify(self, module_name, line_number, tolerance = 0):
+        """ Classify an issue found in module_name at line_number:
+            FLAW_EXACT - the issue is on a flaw line
+            FLAW_NEAR - the issue is within +/- tolerance lines of a flaw line
+            FLAW_OFF - the issue is not near any flaw line of the module
+            None - the module is not in manifest (no ground truth available)
+        """
+        lines = self.flaw_lines.get(os.path.basename(module_name))
+        if lines is None:
+            return None
+
+        idx = bisect.bisect_left(lines, line_number)
+        distance = None
+        if idx < len(lines):
+            distance = lines[idx] - line_number
+        if idx > 0 and (distance is None or line_number - lines[idx - 1] < distance):
+            distance = line_number - lines[idx - 1]
+
+        if distance == 0:
+            return FLAW_EXACT
+        if distance is not None and distance <= tolerance:
+            return FLAW_NEAR
+        return FLAW_OFF
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    if len(sys.argv) >= 2:
+
+        manifest = JulietManifest()
+        err_str = manifest.load(sys.argv[1])
+        if err_str:
+            print(err_str)
+        else:
+            print("Success:", manifest.flaws_cnt, "flaws in", len(manifest.flaw_lines), "files loaded")
+    else:
+        print("Usage: python juliet_manifest.py <manifest.xml>")
@@ -0,0 +1,132 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" lint_batch - merges the project configurations of several makefiles into
+    one configuration (one PClint invocation for a batch of makefiles) and
+    splits the PClint output of the batch back into the output of every
+    makefile, used by lint_orchestrator.py --batch=<N>.
+"""
+import os
+import sys
+
+#-------------------------------------------------------------------------------
+def rebase_project_lnt(lines, make_dir):
+    """ Return the lines of a project configuration (generated by pclp_config.py
+        in make_dir) with the paths of the modules and of the include folders
+        prefixed by make_dir. The paths are not normalized, PClint prints them
+        as given: make_dir + "/../../testcasesupport/io.c", so the prefix
+        identifies the makefile of every module and every message, also when
+        the same file is a module of several makefiles.
+    """
+    prefix = make_dir + os.sep
+    out_lines = []
+    for line in lines:
+        text = line.strip()
+        # -i"../../testcasesupport"
+        if text.startswith("-i"):
+            path = text[2:].strip('"')
+            if not os.path.isabs(path):
+                line = '-i"' + prefix + path + '"\n'
+        # "CWE561_Dead_Code__unused_function_01.c"
+        elif text and text[0] not in "-+/":
+            path = text.strip('"')
+            if not os.path.isabs(path):
+                line = '"' + prefix + path + '"\n'
+        out_lines.append(line if line.endswith("\n") else line + "\n")
+    return out_lines
+
+#-------------------------------------------------------------------------------
+def merge_project_lnts(projects, output):
+    """ Write the merged project configuration of a batch.
+            projects - list of tuples (make_dir, prj_filename) in the order
+                of analysis, make_dir must be an absolute path
+            output - the merged configuration (opened file)
+    """
+    for make_dir, prj_filename in projects:
+        with open(prj_filename, encoding='UTF-8') as file:
+            lines = file.readlines()
+        print("// " + make_dir, file = output)
+        output.writelines(rebase_project_lnt(lines, make_dir))
+        print("", file = output)
+
+#-------------------------------------------------------------------------------
+def split_batch_output(lines, make_dirs):
+    """ Split the PClint output of a batch into the output of every makefile.
+            lines - the lines of the PClint output of the batch
+            make_dirs - the directories of the makefiles of the batch
+        Every "--- Module:" section (also the sections of the "--- Global Wrap-up")
+        is routed to the makefile whose directory prefixes the module and the
+        prefix is removed from the module and from the messages. The headers of
+        the sections which are not modules ("--- Global Wrap-up", "--- Thread
+        messages") are copied to all outputs, every message of these sections is
+        routed by the file path of the message (a message without a path of the
+        batch stays with the makefile of the previous message).
+        The outputs are not identical to the outputs of PClint invoked in the
+        directory of every makefile: the global (inter-module) analysis runs on
+        the whole batch, so a symbol defined in several makefiles (main, the
+        functions of testcasesupport/io.c) gives messages that a run per makefile
+        never emits, and the headers of the global sections are in every output,
+        also without messages. The module sections are the same.
+        Returns a dictionary {make_dir : [lines]}
+    """
+    # Longest directory first: a makefile in a subdirectory of another makefile
+    prefixes = sorted(((make_dir + os.sep, make_dir) for make_dir in make_dirs),\
+                      key = lambda item: -len(item[0]))
+    outputs = {make_dir : [] for make_dir in make_dirs}
+    current = make_dirs[0]
+    current_prefix = current + os.sep
+    in_module = False
+    for line in lines:
+        if not in_module and not line.startswith("--- "):
+            # Global section: route the message by its file path
+            for prefix, make_dir in prefixes:
+                if line.startswith(prefix):
+                    current = make_dir
+                    current_prefix = prefix
+                    break
+        if line.startswith("--- Module:"):
+            # --- Module:   /home/igor/C/testcases/CWE561_Dead_Code/../../testcasesupport/io.c (C)
+            name = line[11:].strip()
+            for prefix, make_dir in prefixes:
+                if name.startswith(prefix):
+                    current = make_dir
+                    current_prefix = prefix
+                    break
+            in_module = True
+            outputs[current].append(line.replace(current_prefix, "", 1))
+        elif line.startswith("--- ") and not line.startswith("--- Module Wrap-up"):
+            in_module = False
+            for make_dir in make_dirs:
+                outputs[make_dir].append(line)
+        elif line.startswith(current_prefix):
+            # /home/igor/C/testcases/CWE561_Dead_Code/CWE561_Dead_Code__unused_function_01.c, 12, warning, 528
+            outputs[current].append(line[len(current_prefix):])
+        else:
+            outputs[current].append(line)
+    return outputs
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # <---- 0 ---->|<--- 1 --->|<----- 2 ----->|
+    # lint_batch.py <make_dir>  <prj_filename>  [<make_dir> <prj_filename> ...]
+    #
+    # Print the merged project configuration of the makefiles
+
+    if len(sys.argv) >= 3 and len(sys.argv) % 2 == 1:
+        merge_project_lnts([(os.path.abspath(sys.argv[idx]), sys.argv[idx + 1])\
+                            for idx in range(1, len(sys.argv), 2)], sys.stdout)
+    else:
+        print("Usage: python lint_batch.py <make_dir> <prj_filename> [<make_dir> <prj_filename> ...]")
@@ -0,0 +1,532 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" lint_orchestrator - runs the analysis of every makefile (build with the
+    imposter, generate the project configuration, analyze with PClint) in a
+    pool of workers, invoked by ig1.sh. The results are written in the same
+    layout as the serial loop: the local results folder of every makefile
+    inside of the global results folder.
+"""
+import concurrent.futures
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import sampling
+import build_cache
+import discovery
+import lint_batch
+import scheduler
+import progress
+
+# Global results folder
+GRES_FOLDER = "ig_gl_out"
+# Generated Project Configuration file
+PCLP_PRJ_FILE = "ig_project.lnt"
+# PClint output file
+PCLP_OUT_FILE = "ig_pclint_out.txt"
+# Marker of a finished makefile, waited for by reduced.py --watch: the exit code of
+# PClint (written when the output is closed), "failed <step>: <error>" or "skipped"
+PCLP_DONE_FILE = "ig_pclint_done.txt"
+# Marker of the finished run (in the global results folder), written when all
+# makefiles were finished or skipped
+LINT_DONE_FILE = "ig_lint_done.txt"
+# Imposter output file
+IMPO_OUT_FILE = "ig_imposter_out.txt"
+# File where output from make is stored
+MAKE_OUT_FILE = "ig_make_out.txt"
+# Default options of PClint:
+# -b - suppress banner output
+# -width(256) - sets the maximum output width and indentation level for continuations
+# -format=%f, %l, %t, %n - sets the message format for height 3 or less
+# -h1 - adjusts message height options
+PCLP_OPTIONS = ["-b", "-width(256)", "-format=%f, %l, %t, %n", "-h1"]
+# Steps of the analysis of a makefile ("cache" replaces make and config if the
+# build outputs are found in the build cache)
+LINT_STEPS = ("cache", "make", "config", "lint")
+# Build outputs of a makefile (stored in the build cache)
+BUILD_FILES = (IMPO_OUT_FILE, PCLP_PRJ_FILE, MAKE_OUT_FILE)
+
+#-------------------------------------------------------------------------------
+class LintError(Exception):
+    """ Exception raised when a step of the analysis of a makefile fails
+    """
+    def __init__(self, step, text):
+        self.step = step
+        self.text = text
+        super().__init__(step + ": " + text)
+
+#-------------------------------------------------------------------------------
+class LintOrchestrator:
+    """ LintOrchestrator - analyzes the makefiles in a pool of jobs workers.
+
+        For every makefile (in its own local results folder):
+            make - build the code (make -e) with the imposter (CC/CPP set in the
+                   environment), the imposter writes the compiler invocations to
+                   IMPOSTER_LOG (ig_imposter_out.txt)
+            config - generate the project configuration (pclp_config.py) from
+                   the imposter output (ig_project.lnt)
+            lint - analyze the project with PClint (ig_pclint_out.txt), then
+                   write the marker of the completed output (ig_pclint_done.txt)
+        With a build cache (build_cache.BuildCache) the outputs of make and config
+        are copied from the cache if their inputs didn't change (step "cache").
+        The makefiles are analyzed in batches of batch_size makefiles: every
+        makefile of a batch is built, then the projects of the batch are analyzed
+        with one PClint invocation (lint_batch.py), the output is split into the
+        PClint output of every makefile. A failed PClint invocation fails all
+        makefiles of the batch.
+        With a duration history (scheduler.DurationHistory) the makefiles are
+        analyzed longest first and the duration of every makefile is recorded.
+        With show_progress the live progress (progress.Progress) is shown.
+        The exit code of make and pclp_config.py is not checked (as in the serial
+        loop), a build without compiler invocation (empty imposter output) or a
+        PClint failure fails the makefile. Without keep_going the first failure
+        stops the run: the makefiles not started yet are skipped.
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self, working_dir, pclp_exe, pclp_co_lnt, pclp_args = None,\
+                 sample = None, jobs = 1, keep_going = False, cache = None, batch_size = 1,\
+                 history = None, show_progress = False):
+        """ working_dir - working directory (contains the global results folder)
+            pclp_exe - PClint executable (pclp_config.py is in its config folder)
+            pclp_co_lnt - the compiler configuration (ig_co-gcc.lnt)
+            pclp_args - extra options for PClint (args.lnt) or None
+            sample - the sample of test cases (only the sample is analyzed) or None
+            cache - the build cache (build_cache.BuildCache) or None
+            batch_size - count of makefiles analyzed with one PClint invocation
+            history - the durations of the previous runs (scheduler.DurationHistory) or None
+            show_progress - show the live progress (throughput, ETA, utilization)
+        """
+        self.working_dir = working_dir
+        self.gres_path = os.path.join(working_dir, GRES_FOLDER)
+        self.pclp_exe = pclp_exe
+        self.pclp_config = os.path.join(os.path.dirname(pclp_exe), "config", "pclp_config.py")
+        self.pclp_co_lnt = pclp_co_lnt
+        self.pclp_args = pclp_args
+        self.sample = sample
+        self.jobs = max(jobs, 1)
+        self.keep_going = keep_going
+        self.cache = cache
+        self.batch_size = max(batch_size, 1)
+        self.history = history
+        self.show_progress = show_progress
+        # The live progress of the run (progress.Progress) or None
+        self.progress = None
+        self.inventory = {}
+        # Predicted duration of the run (seconds) and count of makefiles estimated
+        # from the size of the sources (not found in the history)
+        self.predicted_time = None
+        self.estimated_cnt = 0
+        self.step_times = dict.fromkeys(LINT_STEPS, 0.0)
+        self.print_lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    #---------------------------------------------------------------------------
+    def get_lres_path(self, makefile):
+        """ Return the local results folder of a makefile """
+        return os.path.join(self.gres_path,\
+                            os.path.relpath(os.path.dirname(makefile), self.working_dir))
+
+    #---------------------------------------------------------------------------
+    def run_make(self, make_dir, lres_path):
+        """ Build the code with the imposter. Fails if the imposter recorded no
+            compiler invocation (the project configuration would be empty), for
+            example if make found the targets up to date (build outputs left in
+            the source tree)
+        """
+        impo_out_filename = os.path.join(lres_path, IMPO_OUT_FILE)
+        env = dict(os.environ, IMPOSTER_LOG = impo_out_filename)
+        with open(os.path.join(lres_path, MAKE_OUT_FILE), "w", encoding='UTF-8') as make_output:
+            subprocess.run(["make", "-e"], cwd = make_dir, env = env, stdout = make_output,\
+                           check = False)
+        if not os.path.isfile(impo_out_filename) or os.path.getsize(impo_out_filename) == 0:
+            raise LintError("make", "The imposter recorded no compiler invocation in " + \
+                impo_out_filename + " (targets up to date? remove the build outputs of " + \
+                make_dir + ")")
+
+    #---------------------------------------------------------------------------
+    def run_config(self, make_dir, lres_path):
+        """ Generate the project configuration from the imposter output """
+        subprocess.run([sys.executable, self.pclp_config, "--compiler=gcc",\
+                        "--imposter-file=" + os.path.join(lres_path, IMPO_OUT_FILE),\
+                        "--config-output-lnt-file=" + os.path.join(lres_path, PCLP_PRJ_FILE),\
+                        "--generate-project-config"],\
+                       cwd = make_dir, stdout = subprocess.DEVNULL, check = False)
+
+    #---------------------------------------------------------------------------
+    def get_project(self, lres_path):
+        """ Return the project configuration of a makefile (filtered in sample mode) """
+        # Sample mode: analyze only the modules of the sample (the project
+        # configuration is filtered after it was stored in the build cache)
+        prj_filename = os.path.join(lres_path, PCLP_PRJ_FILE)
+        if self.sample and os.path.isfile(prj_filename):
+            sampling.filter_project_lnt(prj_filename, self.sample)
+        return prj_filename
+
+    #---------------------------------------------------------------------------
+    def get_pclp_cmd(self, prj_filename):
+        """ Return the PClint command analyzing a project configuration """
+        pclp_cmd = [self.pclp_exe] + PCLP_OPTIONS
+        if self.pclp_args:
+            pclp_cmd.append(self.pclp_args)
+        return pclp_cmd + [self.pclp_co_lnt, prj_filename]
+
+    #---------------------------------------------------------------------------
+    def write_done(self, lres_path, status):
+        """ Write the marker of a finished makefile: status - the exit code of PClint
+            (the output is completed), "failed <step>: <error>" or "skipped"
+        """
+        with open(os.path.join(lres_path, PCLP_DONE_FILE), "w", encoding='UTF-8') as done_file:
+            print(status, file = done_file)
+
+    #---------------------------------------------------------------------------
+    def mark_unfinished(self, makefiles, status):
+        """ Write the marker of the makefiles failed (without PClint output) or
+            skipped, so reduced.py --watch doesn't wait for them
+        """
+        for makefile in makefiles:
+            lres_path = self.get_lres_path(makefile)
+            try:
+                os.makedirs(lres_path, exist_ok = True)
+                self.write_done(lres_path, status)
+            except OSError:
+                pass
+
+    #---------------------------------------------------------------------------
+    def run_lint(self, make_dir, lres_path):
+        """ Analyze the project with PClint, write the marker when the output is completed """
+        pclp_out_filename = os.path.join(lres_path, PCLP_OUT_FILE)
+        pclp_cmd = self.get_pclp_cmd(self.get_project(lres_path))
+        with open(pclp_out_filename, "w", encoding='UTF-8') as pclp_output:
+            res = subprocess.run(pclp_cmd, cwd = make_dir, stdout = pclp_output, check = False)
+        self.write_done(lres_path, res.returncode)
+        if res.returncode != 0:
+            with open(pclp_out_filename, encoding='UTF-8', errors='replace') as file:
+                raise LintError("lint", os.path.basename(self.pclp_exe) + \
+                    " finished with error " + str(res.returncode) + ":\n" + file.read())
+
+    #---------------------------------------------------------------------------
+    def run_batch_lint(self, makefiles):
+        """ Analyze the projects of a batch of makefiles with one PClint invocation
+            (in the working directory), write the PClint output (and the marker)
+            of every makefile
+        """
+        make_dirs = [os.path.abspath(os.path.dirname(makefile)) for makefile in makefiles]
+        lres_paths = [self.get_lres_path(makefile) for makefile in makefiles]
+        fd, batch_filename = tempfile.mkstemp(prefix = "ig_batch_", suffix = ".lnt",\
+                                              dir = self.gres_path)
+        try:
+            with os.fdopen(fd, "w", encoding='UTF-8') as batch_file:
+                lint_batch.merge_project_lnts([(make_dir, self.get_project(lres_path))\
+                    for make_dir, lres_path in zip(make_dirs, lres_paths)], batch_file)
+            res = subprocess.run(self.get_pclp_cmd(batch_filename), cwd = self.working_dir,\
+                                 stdout = subprocess.PIPE, encoding = 'UTF-8',\
+                                 errors = 'replace', check = False)
+        finally:
+            os.remove(batch_filename)
+        if res.returncode != 0:
+            raise LintError("lint", os.path.basename(self.pclp_exe) + " finished with error " + \
+                str(res.returncode) + " (batch of " + str(len(makefiles)) + " makefiles):\n" + \
+                res.stdout)
+
+        outputs = lint_batch.split_batch_output(res.stdout.splitlines(keepends = True), make_dirs)
+        for make_dir, lres_path in zip(make_dirs, lres_paths):
+            with open(os.path.join(lres_path, PCLP_OUT_FILE), "w", encoding='UTF-8') as pclp_output:
+                pclp_output.writelines(outputs[make_dir])
+            self.write_done(lres_path, res.returncode)
+
+    #---------------------------------------------------------------------------
+    def process_batch(self, makefiles):
+        """ Run the steps of the analysis of a batch of makefiles: the build of
+            every makefile, then the analysis of the batch with PClint.
+            Returns a list of tuples (makefile, step_times, error) for every
+            makefile finished: the duration of every step {step : seconds} or the
+            error (LintError) of a failed makefile. The makefiles skipped (the run
+            was stopped) are not returned.
+        """
+        results = []
+        built = []
+        for makefile_idx, makefile in enumerate(makefiles):
+            if self.stop_event.is_set():
+                self.mark_unfinished(makefiles[makefile_idx:], "skipped")
+                return results
+            try:
+                built.append((makefile, self.run_build(makefile)))
+            except LintError as ex:
+                results.append((makefile, None, ex))
+                self.mark_unfinished([makefile], "failed " + str(ex).splitlines()[0])
+                if not self.keep_going:
+                    self.stop_event.set()
+        if not built or self.stop_event.is_set():
+            self.mark_unfinished([makefile for makefile, _ in built], "skipped")
+            return results
+
+        time_start = time.perf_counter()
+        try:
+            try:
+                if len(built) == 1:
+                    makefile = built[0][0]
+                    self.run_lint(os.path.dirname(makefile), self.get_lres_path(makefile))
+                else:
+                    self.run_batch_lint([makefile for makefile, _ in built])
+            except OSError as ex:
+                raise LintError("lint", str(ex)) from ex
+        except LintError as ex:
+            if not self.keep_going:
+                self.stop_event.set()
+            # A failed batch has no PClint outputs (a single makefile has the output
+            # and the marker with the exit code of PClint)
+            self.mark_unfinished([makefile for makefile, _ in built\
+                if not os.path.isfile(os.path.join(self.get_lres_path(makefile), PCLP_DONE_FILE))],\
+                "failed " + str(ex).splitlines()[0])
+            return results + [(makefile, None, ex) for makefile, _ in built]
+
+        # The duration of the analysis is shared by the makefiles of the batch
+        lint_time = (time.perf_counter() - time_start) / len(built)
+        for makefile, step_times in built:
+            step_times["lint"] = lint_time
+            results.append((makefile, step_times, None))
+        return results
+
+    #---------------------------------------------------------------------------
+    def run_build(self, makefile):
+        """ Run the build steps (cache or make and config) of a makefile, return
+            the duration of every step run {step : seconds}
+        """
+        make_dir = os.path.dirname(makefile)
+        lres_path = self.get_lres_path(makefile)
+        try:
+            os.makedirs(lres_path, exist_ok = True)
+        except OSError as ex:
+            raise LintError("make", "Cannot create local results folder: " + lres_path) from ex
+
+        step_funcs = {"make" : self.run_make, "config" : self.run_config}
+        steps = ["make", "config"]
+        step_times = {}
+        cache_key = None
+        if self.cache:
+            time_start = time.perf_counter()
+            try:
+                cache_key = self.cache.get_key(makefile)
+                if self.cache.replay(cache_key, lres_path, BUILD_FILES):
+                    steps = []
+            except OSError as ex:
+                raise LintError("cache", str(ex)) from ex
+            step_times["cache"] = time.perf_counter() - time_start
+
+        for step in steps:
+            time_start = time.perf_counter()
+            try:
+                step_funcs[step](make_dir, lres_path)
+                if step == "config" and cache_key:
+                    # New build outputs: store them in the build cache
+                    self.cache.store(cache_key, lres_path, BUILD_FILES)
+            except OSError as ex:
+                raise LintError(step, str(ex)) from ex
+            step_times[step] = time.perf_counter() - time_start
+        return step_times
+
+    #---------------------------------------------------------------------------
+    def report(self, makefile_idx, makefiles_cnt, makefile, step_times = None, error = None):
+        """ Print the progress: the makefile finished and the duration of every step """
+        if error:
+            text = f'[{makefile_idx:3}/{makefiles_cnt:<3}] {makefile} [ERROR] {error}'
+        else:
+            text = f'[{makefile_idx:3}/{makefiles_cnt:<3}] {makefile} ' + \
+                   " ".join(f'{step} {step_time:.2f}s' for step, step_time in step_times.items())
+        with self.print_lock:
+            if self.progress:
+                self.progress.log(text)
+            else:
+                print(text, flush = True)
+
+    #---------------------------------------------------------------------------
+    def count_issues(self, makefile):
+        """ Return the count of messages in the PClint output of a makefile """
+        issues_cnt = 0
+        with open(os.path.join(self.get_lres_path(makefile), PCLP_OUT_FILE), encoding='UTF-8',\
+                  errors='replace') as file:
+            for line in file:
+                if line.strip() and not line.startswith("--- "):
+                    issues_cnt += 1
+        return issues_cnt
+
+    #---------------------------------------------------------------------------
+    def schedule(self, makefiles):
+        """ Order the makefiles longest first (estimated with the duration history)
+            and predict the duration of the run, return the ordered makefiles
+        """
+        self.inventory = discovery.load_inventory(self.gres_path) or {}
+        estimates, self.estimated_cnt = self.history.estimate(makefiles, self.inventory)
+        makefiles = scheduler.schedule(makefiles, estimates)
+        if self.history.entries:
+            self.predicted_time = scheduler.simulate(\
+                [sum(estimates[makefile] for makefile in makefiles[idx:idx + self.batch_size])\
+                 for idx in range(0, len(makefiles), self.batch_size)], self.jobs)
+        return makefiles
+
+    #---------------------------------------------------------------------------
+    def run(self, makefiles):
+        """ Analyze all makefiles in a pool of jobs workers (threads, every step
+            runs in its own process), a batch of makefiles per task.
+            Returns the list of the failed makefiles: [(makefile, error), ...]
+        """
+        errors = []
+        finished_cnt = 0
+        # Markers of a previous run (shard mode: the global results folder is kept)
+        for filename in [os.path.join(self.get_lres_path(makefile), PCLP_DONE_FILE)\
+                         for makefile in makefiles] + [os.path.join(self.gres_path, LINT_DONE_FILE)]:
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                pass
+        if self.history:
+            makefiles = self.schedule(makefiles)
+        if self.show_progress:
+            if not self.inventory:
+                self.inventory = discovery.load_inventory(self.gres_path) or {}
+            self.progress = progress.Progress("lint", makefiles, {makefile : sum(sources.values())\
+                for makefile, sources in self.inventory.items()}, self.jobs)
+            self.progress.start()
+        batches = [makefiles[idx:idx + self.batch_size]\
+                   for idx in range(0, len(makefiles), self.batch_size)]
+        # The marker of the finished run is written also if the run was interrupted
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers = self.jobs) as executor:
+                futures = [executor.submit(self.process_batch, batch) for batch in batches]
+                try:
+                    for future in concurrent.futures.as_completed(futures):
+                        for makefile, step_times, error in future.result():
+                            finished_cnt += 1
+                            if error:
+                                errors.append((makefile, str(error)))
+                                if self.progress:
+                                    self.progress.update(makefile)
+                                self.report(finished_cnt, len(makefiles), makefile,\
+                                            error = str(error).splitlines()[0])
+                                continue
+                            for step, step_time in step_times.items():
+                                self.step_times[step] += step_time
+                            if self.history:
+                                self.history.update(makefile, step_times,\
+                                                    self.inventory.get(makefile, {}))
+                            if self.progress:
+                                sources = self.inventory.get(makefile, {})
+                                self.progress.update(makefile, len(sources), self.count_issues(makefile),\
+                                                     sum(sources.values()), sum(step_times.values()))
+                            self.report(finished_cnt, len(makefiles), makefile, step_times)
+                except KeyboardInterrupt:
+                    self.stop_event.set()
+                    raise
+                finally:
+                    if self.history:
+                        self.history.save()
+                    if self.progress:
+                        self.progress.stop()
+        finally:
+            with open(os.path.join(self.gres_path, LINT_DONE_FILE), "w", encoding='UTF-8') as done_file:
+                print(finished_cnt, "of", len(makefiles), "makefiles finished,", len(errors), "failed",\
+                      file = done_file)
+        return errors
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # <-------- 0 ------->|<---- 1 ---->|<----- 2 ------>|<--- 3 --->|<--- 4 --->|
+    # lint_orchestrator.py <working_dir> <makefiles_file> <pclp_exe>  <co_lnt>
+    #                      [--args=<args.lnt>] [--sample=<sample_file>]
+    #                      [--jobs=<N>] [--keep-going] [--build-cache=<folder>] [--gcc=<gcc>]
+    #                      [--batch=<N>] [--durations=<durations_file>] [--progress]
+    #
+    # --args=<args.lnt> - extra options for PClint
+    # --sample=<sample_file> - analyze only the modules of the sample (sampling.py)
+    # --jobs=<N> - count of makefiles analyzed in parallel (default 1)
+    # --keep-going - don't stop at the first failed makefile, analyze all makefiles
+    # --build-cache=<folder> - reuse the build outputs (imposter output, project
+    #       configuration) stored in the build cache if their inputs didn't change
+    # --gcc=<gcc> - the compiler (its version is part of the build cache key)
+    # --batch=<N> - count of makefiles analyzed with one PClint invocation (default 1)
+    # --durations=<durations_file> - analyze the makefiles longest first using the
+    #       durations of the previous runs (the file is updated)
+    # --progress - show the live progress: makefiles, modules, issues and bytes per
+    #       second, ETA and worker utilization (refreshed in place on a terminal,
+    #       otherwise a progress line every 30s)
+
+    args_list = [arg for arg in sys.argv if not arg.startswith("--")]
+    options = dict(arg[2:].partition("=")[::2] for arg in sys.argv if arg.startswith("--"))
+
+    if len(args_list) >= 5:
+
+        with open(args_list[2], encoding='UTF-8') as file:
+            makefiles_arg = [line.strip() for line in file if line.strip()]
+
+        sample_arg = None
+        if options.get("sample"):
+            sample_arg = sampling.load_sample(options["sample"])
+            if not sample_arg:
+                print("[ERROR] Invalid sample file:", options["sample"])
+                sys.exit(1)
+
+        cache_arg = None
+        if options.get("build-cache"):
+            cache_arg = build_cache.BuildCache(options["build-cache"],\
+                [args_list[4], os.path.splitext(args_list[4])[0] + ".h",\
+                 os.path.join(os.path.dirname(args_list[3]), "config", "pclp_config.py")],\
+                build_cache.get_gcc_version(options.get("gcc") or "gcc"))
+
+        orchestrator = LintOrchestrator(os.path.realpath(args_list[1]), args_list[3], args_list[4],\
+            options.get("args"), sample_arg, int(options.get("jobs") or 1), "keep-going" in options,\
+            cache_arg, int(options.get("batch") or 1),\
+            scheduler.DurationHistory(options["durations"]) if options.get("durations") else None,\
+            "progress" in options)
+
+        time_start_arg = time.perf_counter()
+        try:
+            errors_arg = orchestrator.run(makefiles_arg)
+        except KeyboardInterrupt:
+            print("[ERROR] Interrupted")
+            sys.exit(1)
+        time_total_arg = time.perf_counter() - time_start_arg
+
+        time_steps_arg = sum(orchestrator.step_times.values())
+        print("[INFO] Steps:", ", ".join(f'{step} {step_time:.1f}s'\
+              for step, step_time in orchestrator.step_times.items() if step_time))
+        if cache_arg:
+            print("[INFO] Build cache:", cache_arg.hit_cnt, "hits,", cache_arg.miss_cnt, "misses")
+        if orchestrator.history:
+            print("[INFO] Schedule: longest first,", orchestrator.estimated_cnt, "of",\
+                  len(makefiles_arg), "makefiles estimated from the source size, " + \
+                  ("predicted: no history" if orchestrator.predicted_time is None else \
+                   f'predicted: {orchestrator.predicted_time:.1f}s') + \
+                  f', actual: {time_total_arg:.1f}s')
+        print(f'[INFO] Total: {time_total_arg:.1f}s, jobs: {orchestrator.jobs}, ' + \
+              f'batch: {orchestrator.batch_size}, ' + \
+              f'parallel speedup: {time_steps_arg / time_total_arg if time_total_arg else 0:.1f}x')
+
+        if errors_arg:
+            for makefile_err, error_err in errors_arg:
+                print("[ERROR] Makefile failed:", makefile_err)
+                print(error_err)
+            sys.exit(1)
+    else:
+        print("Usage: python lint_orchestrator.py <working_dir> <makefiles_file> <pclp_exe> " + \
+              "<co_lnt> [--args=<args.lnt>] [--sample=<sample_file>] [--jobs=<N>] [--keep-going] " + \
+              "[--build-cache=<folder>] [--gcc=<gcc>] [--batch=<N>] " + \
+              "[--durations=<durations_file>] [--progress]")
+        sys.exit(1)
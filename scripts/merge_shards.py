@@ -0,0 +1,84 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" merge_shards - merges the partial results artifacts of all shards of a run
+    (generated by reduced.py --shard=i/N) into the global results and charts.
+"""
+import glob
+import os
+import sys
+
+import results_state
+import shard
+import reduced
+
+#-------------------------------------------------------------------------------
+def merge_artifacts(proc, artifacts):
+    """ Merge the partial results of all makefiles from all shard artifacts into proc.
+        The makefiles are merged in the order of the list of all makefiles, the
+        results are identical with a run processing all makefiles on one host.
+    """
+    makefile_results = []
+    for artifact in artifacts:
+        makefile_results.extend(artifact["results"])
+    makefile_results.sort(key = lambda res: res[0])
+    for _, _, state in makefile_results:
+        proc.merge_state(results_state.restore_state(state))
+    return len(makefile_results)
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # <------ 0 ----->|<---- 1 ----->|<-------- 2 ... -------->|
+    # merge_shards.py  <working_dir>  [shard_artifact_file ...]
+    #
+    # Without shard artifact files: all the artifacts (ig_shard_*of*.json)
+    # found in the global results folder of the working directory are merged
+
+    if len(sys.argv) >= 2:
+
+        working_dir = sys.argv[1]
+        gres_path = os.path.realpath(os.path.join(working_dir, reduced.GRES_FOLDER))
+        print("gres_path:", gres_path)
+        if not os.path.isdir(gres_path):
+            reduced.error_exit("Error: global results directory not found:", gres_path)
+
+        artifact_files = sys.argv[2:]
+        if not artifact_files:
+            artifact_files = sorted(glob.glob(os.path.join(gres_path, \
+                                                          shard.SHARD_FILE.format("*", "*"))))
+
+        artifacts, err_str = shard.load_artifacts(artifact_files)
+        if err_str:
+            reduced.error_exit(err_str)
+
+        # Options of the run (the same for all shards)
+        options = artifacts[0]["options"]
+        pr = reduced.new_processor(options)
+        if options.get("manifest"):
+            pr.set_ground_truth(None, int(options.get("flaw-tolerance") or reduced.FLAW_TOLERANCE))
+
+        makefiles_cnt = merge_artifacts(pr, artifacts)
+        print("Merged", len(artifacts), "shards,", makefiles_cnt, "makefiles")
+        del artifacts
+
+        # Delete old global results file if exists
+        gres_filename = os.path.join(gres_path, reduced.GRES_OUT_FILE)
+        if os.path.isfile(gres_filename):
+            os.remove(gres_filename)
+
+        reduced.write_results(pr, gres_path, working_dir, reduced.__file__, options)
+    else:
+        print("Usage: python merge_shards.py <working_dir> [shard_artifact_file ...]")
@@ -0,0 +1,87 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" path_resolver - memoized path resolution (os.path.realpath) shared by all
+    modules: the real path of every directory is resolved once per run.
+"""
+import os
+
+#-------------------------------------------------------------------------------
+class PathResolver:
+    """ PathResolver - resolves paths like os.path.realpath, with a cache.
+
+        os.path.realpath resolves every component of the path (a syscall per
+        component, slow on network filesystems). Here the directory of a path
+        is resolved once (dir_cache) and the file name is appended, only a file
+        which is itself a symbolic link is resolved completely. The resolved
+        files are cached too (file_cache), the same modules (example:
+        testcasesupport/io.c) are found in every makefile.
+
+        The files and directories are expected not to change during the run.
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self):
+        self.dir_cache = {}
+        self.file_cache = {}
+        self.resolve_cnt = 0
+
+    #---------------------------------------------------------------------------
+    def resolve_dir(self, dir_path):
+        """ Return the real path of a directory """
+        real_dir = self.dir_cache.get(dir_path)
+        if real_dir is None:
+            real_dir = os.path.realpath(dir_path)
+            self.dir_cache[dir_path] = real_dir
+            self.resolve_cnt += 1
+        return real_dir
+
+    #---------------------------------------------------------------------------
+    def realpath(self, path):
+        """ Return the real path of path (same result as os.path.realpath) """
+        real_path = self.file_cache.get(path)
+        if real_path is not None:
+            return real_path
+
+        dir_path, name = os.path.split(path)
+        if name in ("", ".", ".."):
+            real_path = self.resolve_dir(path)
+        elif os.path.islink(path):
+            real_path = os.path.realpath(path)
+        else:
+            real_path = os.path.join(self.resolve_dir(dir_path or os.curdir), name)
+        self.file_cache[path] = real_path
+        return real_path
+
+    #---------------------------------------------------------------------------
+    def clear_files(self):
+        """ Clear the cache of the files, keep the directories (streaming: the
+            modules of a makefile are not found again in the next makefiles)
+        """
+        self.file_cache.clear()
+
+    #---------------------------------------------------------------------------
+    def clear(self):
+        """ Clear the cache (the files or directories changed) """
+        self.dir_cache.clear()
+        self.file_cache.clear()
+
+# Resolver shared by all modules
+resolver = PathResolver()
+
+#-------------------------------------------------------------------------------
+def realpath(path):
+    """ Return the real path of path, resolved with the shared resolver """
+    return resolver.realpath(path)
@@ -16,7 +16,9 @@
 """ pclp_out_interpreter_src - interprets the results generated by pclint.
     __init__ function
 """
+import os
 import sys
+import profiling
 from .pclp_out_interpret import PclpInterpreter
 
 #-------------------------------------------------------------------------------
@@ -24,17 +26,28 @@ def main():
     """ Init function called when the module is invoked direct from command line:
 
         > cd "scripts"
-        > python -m pclp_out_interpret_src <pclp_out_file>
+        > python -m pclp_out_interpret_src <pclp_out_file> [--profile=<cpu|mem|both>]
     """
     print('pclp_out_interpret::__init__.main()')
 
     retcode = 0
 
-    if len(sys.argv) > 1:
+    args_list = [arg for arg in sys.argv if not arg.startswith("--")]
+    profile_mode = profiling.parse_profile_option(sys.argv)
+    if profile_mode is None:
+        print("Error: invalid --profile, expected:", "|".join(profiling.PROFILE_MODES))
+        sys.exit(1)
+
+    if len(args_list) > 1:
+        if profile_mode:
+            profiling.profiler.start(profile_mode)
         interpreter = PclpInterpreter()
-        res = interpreter.process_file(sys.argv[1])
+        with profiling.stage("interpret"):
+            res = interpreter.process_file(args_list[1])
         if not res:
             interpreter.show_modules(sys.stdout)
+            # The profiles are written to the current directory
+            profiling.profiler.finish(os.getcwd(), sys.stdout)
         else:
             print("Error in file:", res[0], file = sys.stderr)
             print("Error precessing line:", res[1], file = sys.stderr)
@@ -14,6 +14,8 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #-------------------------------------------------------------------------------
 """ PclpInterpreter class """
+import io
+import tracing
 
 #-------------------------------------------------------------------------------
 class PclpInterpreter:
@@ -49,19 +51,36 @@ class PclpInterpreter:
     #---------------------------------------------------------------------------
     def __init__(self):
         self.modules = []
+        self.error = None
 
     #---------------------------------------------------------------------------
-    def process_file(self, filename):
+    def process_file(self, filename, content = None):
         """ Process an output file generated by PC-lint .
+            content - if not None: the content of the file (already read),
+                the file is not read again
         """
+        for module in self.iter_modules(filename, content):
+            self.modules.append(module)
+        return self.error
 
+    #---------------------------------------------------------------------------
+    def iter_modules(self, filename, content = None):
+        """ Process an output file generated by PC-lint, yield every module
+            (module_name, module_type, module_issues) as soon as it is read,
+            the modules are not stored (used by the streaming mode).
+            In case of error the iteration stops and self.error is set to:
+            (filename, line_idx, line)
+        """
+
+        self.error = None
         line_idx = 0
 
         module_name = ""
         module_type = ""
         module_issues = []
 
-        with open(filename, encoding='UTF-8') as input_file:
+        with io.StringIO(content) if content is not None \
+                else open(filename, encoding='UTF-8') as input_file:
             for line in input_file:
                 line_idx = line_idx + 1
                 line = line.rstrip()
@@ -80,11 +99,11 @@ class PclpInterpreter:
                     # --- Module:   CWE124_Buffer_Underwrite__char_alloca_cpy_01.c (C)
                     elif line.startswith("--- Module:"):
 
-                        # Store previous info
+                        # Yield previous info
                         if module_name:
-                            self.modules.append((module_name, module_type, module_issues[:]))
+                            yield (module_name, module_type, module_issues)
 
-                        module_issues.clear()
+                        module_issues = []
                         module_name = ""
                         module_type = ""
 
@@ -94,7 +113,8 @@ class PclpInterpreter:
                             module_name = line[11:idx0].strip()
                             module_type = line[idx0 + 1:idx1]
                         else:
-                            return (filename, line_idx, line)
+                            self.error = (filename, line_idx, line)
+                            return
 
                 elif line:
                     # CWE124_Buffer_Underwrite__char_alloca_cpy_02.c, 29, info, 774
@@ -106,12 +126,13 @@ class PclpInterpreter:
                             module_issues.append(\
                                 (int(line_list[1]), line_list[2], int(line_list[3])))
                     else:
-                        return (filename, line_idx, line)
+                        self.error = (filename, line_idx, line)
+                        return
 
+        tracing.count("pclint_files")
+        tracing.count("pclint_lines", line_idx)
         if module_name:
-            self.modules.append((module_name, module_type, module_issues[:]))
-
-        return None
+            yield (module_name, module_type, module_issues)
 
     #---------------------------------------------------------------------------
     def show_modules(self, output):
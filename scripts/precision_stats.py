@@ -0,0 +1,117 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" precision_stats - bootstrap confidence intervals for the precision
+    (true-positive ratio) of every PClint message.
+"""
+import numpy as np
+
+# Default count of bootstrap replicates
+BOOTSTRAP_REPLICATES = 2000
+# Default confidence level of the intervals
+BOOTSTRAP_CONFIDENCE = 0.95
+# Maximal count of cells (replicates x modules) of the resampling matrix
+# generated in one step, limits the memory used by the resampling
+BOOTSTRAP_MAX_CELLS = 4000000
+
+#-------------------------------------------------------------------------------
+def get_count_matrices(results_modules):
+    """ Convert the per-module results (Processor.results_modules) into
+        two matrices (modules x messages) of counts.
+        Returns a tuple: (issue_numbers, bad_matrix, good_matrix)
+            issue_numbers - sorted list of message numbers (matrix columns)
+            bad_matrix - count of message found in "bad"-functions per module
+            good_matrix - count of message found in "good"-functions per module
+    """
+    issue_numbers = sorted({issue_nr for module_res in results_modules.values()
+                            for issue_nr in (*module_res[0], *module_res[1])})
+    issue_col = {issue_nr : col for col, issue_nr in enumerate(issue_numbers)}
+
+    bad_matrix = np.zeros((len(results_modules), len(issue_numbers)), dtype = np.float32)
+    good_matrix = np.zeros((len(results_modules), len(issue_numbers)), dtype = np.float32)
+    for row, module_res in enumerate(results_modules.values()):
+        for issue_nr, issue_cnt in module_res[0].items():
+            bad_matrix[row, issue_col[issue_nr]] = issue_cnt
+        for issue_nr, issue_cnt in module_res[1].items():
+            good_matrix[row, issue_col[issue_nr]] = issue_cnt
+
+    return (issue_numbers, bad_matrix, good_matrix)
+
+#-------------------------------------------------------------------------------
+def bootstrap_precision(results_modules, replicates = BOOTSTRAP_REPLICATES,
+                        confidence = BOOTSTRAP_CONFIDENCE, seed = 0):
+    """ Calculate the precision and its bootstrap confidence interval for every
+        message, where: precision = true-positive / (true-positive + false-positive).
+
+        The modules are resampled (with replacement): every replicate is a row of
+        a weight matrix (how many times every module is drawn, counted with bincount
+        over all replicates at once), the replicate counts are the product of the
+        weight matrix with the count matrices.
+        The weight matrix is generated in chunks of at most BOOTSTRAP_MAX_CELLS.
+
+        Returns a dictionary:
+        {
+            issue_nr1 : (precision, ci_low, ci_high),
+            issue_nr2 : (precision, ci_low, ci_high),
+            ...
+        }
+    """
+    issue_numbers, bad_matrix, good_matrix = get_count_matrices(results_modules)
+    modules_cnt = bad_matrix.shape[0]
+    if not modules_cnt or not issue_numbers:
+        return {}
+
+    rng = np.random.default_rng(seed)
+    chunk_cnt = max(1, min(replicates, BOOTSTRAP_MAX_CELLS // modules_cnt))
+
+    replicates_prec = np.empty((replicates, len(issue_numbers)))
+    for chunk_start in range(0, replicates, chunk_cnt):
+        chunk_end = min(chunk_start + chunk_cnt, replicates)
+        draws_cnt = chunk_end - chunk_start
+        # Drawn module indexes, offset by the replicate row: row * modules_cnt + module
+        draws = rng.integers(0, modules_cnt, size = (draws_cnt, modules_cnt))
+        draws += (np.arange(draws_cnt) * modules_cnt)[:, None]
+        weights = np.bincount(draws.ravel(), minlength = draws_cnt * modules_cnt)
+        weights = weights.reshape(draws_cnt, modules_cnt).astype(np.float32)
+        bad_sum = weights @ bad_matrix
+        all_sum = bad_sum + weights @ good_matrix
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            replicates_prec[chunk_start:chunk_end] = bad_sum / all_sum
+
+    bad_total = bad_matrix.sum(axis = 0)
+    all_total = bad_total + good_matrix.sum(axis = 0)
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        precision = bad_total / all_total
+
+    # Replicates without any occurrence of the message are ignored (NaN)
+    alpha = (1.0 - confidence) / 2.0
+    with np.errstate(invalid = 'ignore'):
+        ci_low, ci_high = np.nanquantile(replicates_prec, [alpha, 1.0 - alpha], axis = 0)
+
+    return {issue_nr : (float(precision[col]), float(ci_low[col]), float(ci_high[col]))
+            for col, issue_nr in enumerate(issue_numbers)}
+
+#-------------------------------------------------------------------------------
+def dump_precision(intervals, pclp_m, output, confidence = BOOTSTRAP_CONFIDENCE):
+    """ Dump (to a file or stdout) the precision and confidence interval
+        for every message (as generated by bootstrap_precision)
+    """
+    print(f'Precision (true-positive ratio), {int(confidence * 100)}% bootstrap '
+          'confidence interval:', file = output)
+    for issue_nr, (prec, ci_low, ci_high) in sorted(intervals.items()):
+        issue_name = pclp_m.get_message_name(issue_nr) if pclp_m else None
+        if not issue_name:
+            issue_name = str(issue_nr)
+        print(f'{issue_name:>8} {prec:6.3f} [{ci_low:6.3f}, {ci_high:6.3f}]', file = output)
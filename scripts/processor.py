@@ -18,6 +18,10 @@
 """
 import os
 import sys
+import juliet_cwe
+import path_resolver
+import tracing
+import profiling
 from c_parser_src import CParser
 from pclp_out_interpret_src import PclpInterpreter
 
@@ -72,6 +76,29 @@ class Processor:
         results_all_bad - count of all issues found in bad fucntions (True-Positive Cases)
         results_all_good - count of all issues found in good fucntions (False-Positive Cases)
         results_all_other - count of all issues found in other fucntions (neither bad nor good)
+
+        Results per flaw line (results_flaws):
+        --------------------------------------
+        Optional, only if a ground truth (juliet_manifest.JulietManifest) is set.
+        The results are stored in a dictionary, where the key is the issue-number,
+        and the value is a list of 3 integers:
+            count of issue found exactly on a flaw line
+            count of issue found within +/- flaw_tolerance lines of a flaw line
+            count of issue found off-target (not near any flaw line)
+        {
+            issue_nr1 : [count_exact, count_near, count_off],
+            issue_nr2 : [count_exact, count_near, count_off],
+            ...
+        }
+
+        Streaming mode (results_sink):
+        ------------------------------
+        Optional, only if a results sink (output file) is set. The results of every
+        module are written to the sink (in the format of dump_results) as soon as
+        the module is processed and released, results_modules holds only the module
+        currently processed. The per-module results are aggregated per CWE
+        (results_cwe, same format as results_modules, the key is the CWE number),
+        so the memory doesn't grow with the count of modules.
     """
 
     #---------------------------------------------------------------------------
@@ -81,9 +108,56 @@ class Processor:
         self.results_all_good = 0
         self.results_all_bad = 0
         self.results_all_other = 0
+        self.results_flaws = {}
+        self.ground_truth = None
+        self.flaw_tolerance = 0
+        self.function_results = None
+        self.parsed_files = []
+        self.results_sink = None
+        self.results_cwe = {}
+
+    #---------------------------------------------------------------------------
+    def set_ground_truth(self, ground_truth, flaw_tolerance = 0):
+        """ Set the ground truth (juliet_manifest.JulietManifest) used to label
+            every issue based on the distance to the flaw lines.
+        """
+        self.ground_truth = ground_truth
+        self.flaw_tolerance = flaw_tolerance
+
+    #---------------------------------------------------------------------------
+    def set_function_results(self, function_results):
+        """ Set the per-function results (function_results.FunctionResults),
+            where every issue is also recorded per (module, function, issue).
+        """
+        self.function_results = function_results
 
     #---------------------------------------------------------------------------
-    def add_issue(self, module_name, issue_number, func_name):
+    def set_results_sink(self, results_sink):
+        """ Set the results sink (output file) and enable the streaming mode:
+            the per-module results are written to results_sink and released.
+        """
+        self.results_sink = results_sink
+
+    #---------------------------------------------------------------------------
+    def flush_modules(self):
+        """ Streaming mode: write the per-module results to the results sink,
+            aggregate them per CWE and release them.
+        """
+        for module_name, issues_list in self.results_modules.items():
+            print(module_name, file = self.results_sink)
+            cwe_nr = juliet_cwe.get_cwe_number(module_name)
+            cwe_res = self.results_cwe.get(cwe_nr)
+            if not cwe_res:
+                cwe_res = ({}, {}, {})
+                self.results_cwe[cwe_nr] = cwe_res
+            for res_idx, issues in enumerate(issues_list):
+                print(issues, file = self.results_sink)
+                for issue_nr, issue_cnt in issues.items():
+                    cwe_res[res_idx][issue_nr] = cwe_res[res_idx].get(issue_nr, 0) + issue_cnt
+        self.results_modules.clear()
+
+    #---------------------------------------------------------------------------
+    def add_issue(self, module_name, issue_number, func_name, line_number = None):
         """ Add an issue to the dictionary results """
 
         # Check if module not yet in results_modules, and add it
@@ -123,8 +197,78 @@ class Processor:
         else:
             module_res_issues[issue_number] = 1
 
+        # Record the issue per function (if per-function results enabled)
+        if self.function_results is not None:
+            self.function_results.add(module_name, func_name, issue_number)
+
+        # Label the issue based on the flaw lines (if ground truth available)
+        if self.ground_truth and line_number is not None:
+            flaw_label = self.ground_truth.classify(module_name, line_number,\
+                                                    self.flaw_tolerance)
+            if flaw_label is not None:
+                flaw_res_list = self.results_flaws.get(issue_number)
+                if not flaw_res_list:
+                    flaw_res_list = [0, 0, 0]
+                    self.results_flaws[issue_number] = flaw_res_list
+                flaw_res_list[flaw_label] += 1
+
+    #---------------------------------------------------------------------------
+    def get_state(self):
+        """ Return the results as a dictionary of plain types, used to transfer
+            (or store) the partial results of a makefile and merge them later.
+        """
+        return {
+            "modules" : self.results_modules,
+            "issues" : self.results_issues,
+            "all" : [self.results_all_bad, self.results_all_good, self.results_all_other],
+            "flaws" : self.results_flaws,
+            "functions" : self.function_results.get_state() if self.function_results else None
+        }
+
+    #---------------------------------------------------------------------------
+    def merge_state(self, state):
+        """ Merge partial results (as generated by get_state) into these results.
+            Merging the partial results of all makefiles (in the order of the makefiles)
+            gives the same results as processing all makefiles in one Processor.
+        """
+        for module_name, module_state in state["modules"].items():
+            if module_name not in self.results_modules:
+                self.results_modules[module_name] = ({}, {}, {})
+            module_res = self.results_modules[module_name]
+            for res_idx in range(3):
+                module_res_issues = module_res[res_idx]
+                for issue_nr, issue_cnt in module_state[res_idx].items():
+                    module_res_issues[issue_nr] = module_res_issues.get(issue_nr, 0) + issue_cnt
+
+        for issue_nr, issue_cnt_list in state["issues"].items():
+            issue_res_list = self.results_issues.get(issue_nr)
+            if not issue_res_list:
+                issue_res_list = [0, 0, 0, 0]
+                self.results_issues[issue_nr] = issue_res_list
+            for idx in range(4):
+                issue_res_list[idx] += issue_cnt_list[idx]
+
+        self.results_all_bad += state["all"][0]
+        self.results_all_good += state["all"][1]
+        self.results_all_other += state["all"][2]
+
+        for issue_nr, flaw_cnt_list in state["flaws"].items():
+            flaw_res_list = self.results_flaws.get(issue_nr)
+            if not flaw_res_list:
+                flaw_res_list = [0, 0, 0]
+                self.results_flaws[issue_nr] = flaw_res_list
+            for idx in range(3):
+                flaw_res_list[idx] += flaw_cnt_list[idx]
+
+        if self.function_results is not None and state["functions"]:
+            self.function_results.merge_state(state["functions"])
+
+        if self.results_sink is not None:
+            self.flush_modules()
+
     #---------------------------------------------------------------------------
-    def interpret(self, pclint_out_file, makefile_path, output, module_ignore_list = None):
+    def interpret(self, pclint_out_file, makefile_path, output, module_ignore_list = None,\
+                  file_cache = None, c_parser = None):
         """ Main processing method - processes a makefile together with generated
             pclint output file.
 
@@ -132,59 +276,98 @@ class Processor:
             makefile_path - the path to the makefile
             output - output file or stdout where intermediate results are written
             module_ignore_list - list of modules that must be ignored from processing
+            file_cache - dictionary {filename : content} of the files already read
+                (prefetched), the files not in file_cache are read from disk.
+                The key (pclint_out_file, "modules") holds the modules of the
+                PClint output already interpreted (PclpInterpreter.modules)
+            c_parser - CParser used to parse the modules or None (a new one), the
+                caller may then use its functions (c_analyzed_dict) of the parsed files
         """
-        # Interpret the results of PClint
+        if file_cache is None:
+            file_cache = {}
+
+        # Interpret the results of PClint (unless already interpreted by the prefetch)
         pclp_interp = PclpInterpreter()
-        res_error = pclp_interp.process_file(pclint_out_file)
-        if res_error:
-            return res_error
+        if self.results_sink is None:
+            modules = file_cache.get((pclint_out_file, "modules"))
+            if modules is None:
+                with tracing.span("pclint_read", "stage", {"file" : pclint_out_file}),\
+                     profiling.stage("interpret"):
+                    res_error = pclp_interp.process_file(pclint_out_file, file_cache.get(pclint_out_file))
+                if res_error:
+                    return res_error
+                modules = pclp_interp.modules
+        else:
+            # Streaming mode: every module is processed as soon as it is read
+            modules = pclp_interp.iter_modules(pclint_out_file, file_cache.get(pclint_out_file))
 
         # For every module invoke the C-parser
-        c_parser = CParser()
-        for m in pclp_interp.modules:
-
-            print(80 * "-", file = output)
-
-            # m[0]=module_name, m[1]=module_type, m[2]=module_issues[:]
-            # module_issue =
-            # (%l=line number, %t=message type (error, info, warning), %n=message number)
-            module_name = m[0]
-            module_issues = m[2]
-
-            print("[PclpInterpreter]", file = output)
-            print(module_name, m[1], file = output)
-            for issue in module_issues:
-                print(issue, file = output)
-
-            module_name = os.path.join(makefile_path, module_name)
-            module_name = os.path.realpath(module_name)
-
-            # Check if module in ignore list
-            if module_ignore_list:
-                if module_name in module_ignore_list:
-                    print("Module in ignore list:", module_name, file = output)
-                    continue
-
-            if module_issues:
-
-                print("[CParser]", file = output)
-                c_parser.process_file(module_name)
-                c_parser.show_results(module_name, output)
-
-                for issue in module_issues:
-
-                    # issue[0]=line number
-                    # issue[1]=message type (error, info, warning),
-                    # issue[2]=message number
-                    line_number = issue[0]
-                    msg_number = issue[2]
-
-                    func_name = c_parser.check_file_line(module_name, line_number)
-                    if func_name:
-                        self.add_issue(module_name, msg_number, func_name)
-                        print("line:", line_number, "issue:", msg_number, \
-                              "func:", func_name,  file = output)
-        return None
+        if c_parser is None:
+            c_parser = CParser()
+        resolve_cnt = path_resolver.resolver.resolve_cnt
+        for m in modules:
+            with tracing.span("module", "module", {"module" : m[0]}), profiling.stage("parse"):
+
+                # Streaming mode: write and release the results of the previous module
+                if self.results_sink is not None:
+                    self.flush_modules()
+                    c_parser.clear()
+
+                # m[0]=module_name, m[1]=module_type, m[2]=module_issues[:]
+                # module_issue =
+                # (%l=line number, %t=message type (error, info, warning), %n=message number)
+                module_name = m[0]
+                module_issues = m[2]
+
+                with tracing.span("trace_print", "module"):
+                    print(80 * "-", file = output)
+                    print("[PclpInterpreter]", file = output)
+                    print(module_name, m[1], file = output)
+                    for issue in module_issues:
+                        print(issue, file = output)
+
+                with tracing.span("realpath", "module"):
+                    module_name = os.path.join(makefile_path, module_name)
+                    module_name = path_resolver.realpath(module_name)
+                tracing.count("modules")
+
+                # Check if module in ignore list
+                if module_ignore_list:
+                    if module_name in module_ignore_list:
+                        print("Module in ignore list:", module_name, file = output)
+                        continue
+
+                if module_issues:
+
+                    print("[CParser]", file = output)
+                    c_parser.process_file(module_name, file_cache.get(module_name))
+                    if self.results_sink is None:
+                        self.parsed_files.append(module_name)
+                    c_parser.show_results(module_name, output)
+
+                    with tracing.span("classify", "module"):
+                        for issue in module_issues:
+
+                            # issue[0]=line number
+                            # issue[1]=message type (error, info, warning),
+                            # issue[2]=message number
+                            line_number = issue[0]
+                            msg_number = issue[2]
+
+                            func_name = c_parser.check_file_line(module_name, line_number)
+                            if func_name:
+                                self.add_issue(module_name, msg_number, func_name, line_number)
+                                tracing.count("issues_classified")
+                                print("line:", line_number, "issue:", msg_number, \
+                                      "func:", func_name,  file = output)
+                    tracing.count("issues", len(module_issues))
+
+        if self.results_sink is not None:
+            self.flush_modules()
+            path_resolver.resolver.clear_files()
+        # Directories resolved by a system call (the other paths found in the cache)
+        tracing.count("realpath_resolved", path_resolver.resolver.resolve_cnt - resolve_cnt)
+        return pclp_interp.error
 
     #---------------------------------------------------------------------------
     def dump_results(self, output):
@@ -195,6 +378,12 @@ class Processor:
             for issues in issues_list:
                 print(issues, file = output)
 
+        if self.results_flaws:
+            print("Flaw lines (issue: [exact, near +/-" + str(self.flaw_tolerance) + \
+                  ", off-target]):", file = output)
+            for issue_nr, flaw_res_list in sorted(self.results_flaws.items()):
+                print(issue_nr, flaw_res_list, file = output)
+
 #-------------------------------------------------------------------------------
 if __name__ == '__main__':
 
@@ -208,25 +397,39 @@ if __name__ == '__main__':
     #           (if not provided sys.stdout is used)
     # int_out - name of the output file, where module intermediate results are stored
     #           (if not provided sys.stdout is used)
+    # --profile=<cpu|mem|both> - profile the stages (interpret, parse, aggregate),
+    #           the profiles are written to the current directory
+
+    args_list = [arg for arg in sys.argv if not arg.startswith("--")]
+    profile_arg = profiling.parse_profile_option(sys.argv)
+    if profile_arg is None:
+        print("Error: invalid --profile, expected:", "|".join(profiling.PROFILE_MODES), file = sys.stderr)
+        sys.exit(1)
+
+    if len(args_list) >= 3:
 
-    if len(sys.argv) >= 3:
+        path = args_list[0]
 
-        path = sys.argv[0]
+        pclint_out_file_arg = args_list[1]
+        makefile_path_arg = args_list[2]
+        res_output = open(args_list[3], "w", encoding='UTF-8') if len(args_list) > 3 else sys.stdout
+        int_output = open(args_list[4], "w", encoding='UTF-8') if len(args_list) > 4 else sys.stdout
 
-        pclint_out_file_arg = sys.argv[1]
-        makefile_path_arg = sys.argv[2]
-        res_output = open(sys.argv[3], "w", encoding='UTF-8') if len(sys.argv) > 3 else sys.stdout
-        int_output = open(sys.argv[4], "w", encoding='UTF-8') if len(sys.argv) > 4 else sys.stdout
+        if profile_arg:
+            profiling.profiler.start(profile_arg)
 
         processor = Processor()
         res = processor.interpret(pclint_out_file_arg, makefile_path_arg, int_output)
         if not res:
-            processor.dump_results(res_output)
+            with profiling.stage("aggregate"):
+                processor.dump_results(res_output)
 
         if int_output and int_output != sys.stdout:
             int_output.close()
         if res_output and res_output != sys.stdout:
             res_output.close()
+        # The profile report is not mixed with the results (if written to stdout)
+        profiling.profiler.finish(os.getcwd(), sys.stderr if res_output == sys.stdout else sys.stdout)
 
         if res:
             print("Error in file:", res[0], file = sys.stderr)
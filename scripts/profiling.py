@@ -0,0 +1,187 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" profiling - built-in profiler (--profile=cpu|mem|both) shared by all modules:
+    a CPU profile (cProfile) and a memory snapshot (tracemalloc) for every stage
+    (interpret - the PClint output, parse - the C modules, aggregate - the results),
+    saved as ig_profile_<stage>.pstats and ig_profile_<stage>.snapshot, and a
+    short report of the top functions and allocations of every stage.
+    cProfile, pstats and tracemalloc are imported only when profiling is
+    started: without --profile a stage costs a single test.
+"""
+import contextlib
+import os
+
+# Profile modes (--profile=<mode>)
+PROFILE_MODES = ("cpu", "mem", "both")
+# Count of functions and allocations in the report of every stage
+PROFILE_TOP = 10
+# The memory snapshot of a stage is taken again (at the end of the stage) if the
+# traced memory grew by more than this fraction: the snapshot of the largest state
+PROFILE_MEM_GROWTH = 0.10
+# Prefix of the profile files
+PROFILE_PREFIX = "ig_profile_"
+
+# Stage returned when the profiler is disabled
+NULL_STAGE = contextlib.nullcontext()
+
+#-------------------------------------------------------------------------------
+class ProfileStage:
+    """ ProfileStage - profiles a with-block as a part of a stage """
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.cpu_profile = None
+
+    def __enter__(self):
+        if self.profiler.cpu:
+            import cProfile
+            self.cpu_profile = self.profiler.cpu_profiles.get(self.name)
+            if self.cpu_profile is None:
+                self.cpu_profile = cProfile.Profile()
+                self.profiler.cpu_profiles[self.name] = self.cpu_profile
+            self.cpu_profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        if self.cpu_profile:
+            self.cpu_profile.disable()
+        if self.profiler.mem:
+            self.profiler.snapshot(self.name)
+        return False
+
+#-------------------------------------------------------------------------------
+class Profiler:
+    """ Profiler - the CPU profiles and the memory snapshots of the stages:
+            cpu_profiles - {stage : cProfile.Profile} (all with-blocks of the stage)
+            snapshots - {stage : (traced_size, tracemalloc.Snapshot)}
+        The stages are not nested (only one CPU profile can be enabled).
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self):
+        self.cpu = False
+        self.mem = False
+        self.cpu_profiles = {}
+        self.snapshots = {}
+
+    #---------------------------------------------------------------------------
+    def start(self, mode):
+        """ Start profiling: mode - cpu, mem or both """
+        self.cpu = mode in ("cpu", "both")
+        self.mem = mode in ("mem", "both")
+        if self.mem:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    #---------------------------------------------------------------------------
+    def stage(self, name):
+        """ Return a context manager profiling the with-block as a part of the stage name """
+        if not (self.cpu or self.mem):
+            return NULL_STAGE
+        return ProfileStage(self, name)
+
+    #---------------------------------------------------------------------------
+    def snapshot(self, name):
+        """ Take the memory snapshot of the stage name (only if the traced memory
+            grew by more than PROFILE_MEM_GROWTH since its previous snapshot)
+        """
+        import tracemalloc
+        traced_size = tracemalloc.get_traced_memory()[0]
+        prev = self.snapshots.get(name)
+        if prev is None or traced_size > prev[0] * (1.0 + PROFILE_MEM_GROWTH):
+            self.snapshots[name] = (traced_size, tracemalloc.take_snapshot())
+
+    #---------------------------------------------------------------------------
+    def save(self, output_dir):
+        """ Write the profile of every stage to output_dir:
+                ig_profile_<stage>.pstats - CPU profile (python -m pstats <file>)
+                ig_profile_<stage>.snapshot - memory snapshot (tracemalloc.Snapshot.load)
+            Returns the list of files written.
+        """
+        filenames = []
+        for name, cpu_profile in self.cpu_profiles.items():
+            filenames.append(os.path.join(output_dir, PROFILE_PREFIX + name + ".pstats"))
+            cpu_profile.dump_stats(filenames[-1])
+        for name, (_, snapshot) in self.snapshots.items():
+            filenames.append(os.path.join(output_dir, PROFILE_PREFIX + name + ".snapshot"))
+            snapshot.dump(filenames[-1])
+        return filenames
+
+    #---------------------------------------------------------------------------
+    def dump_report(self, output, top_cnt = PROFILE_TOP):
+        """ Write the report: for every stage the top_cnt functions by own time
+            (CPU) and the top_cnt source lines by allocated memory (snapshot)
+        """
+        import pstats
+        import tracemalloc
+        for name, cpu_profile in self.cpu_profiles.items():
+            stats = pstats.Stats(cpu_profile).stats
+            total = sum(stat[2] for stat in stats.values())
+            print(f'Stage {name} (CPU): {total:.3f}s, top functions by own time:', file = output)
+            print(f'{"own s":>9}{"cum s":>9}{"calls":>10}  function', file = output)
+            for func, stat in sorted(stats.items(), key = lambda item: -item[1][2])[:top_cnt]:
+                print(f'{stat[2]:>9.3f}{stat[3]:>9.3f}{stat[1]:>10}  ' + \
+                      f'{os.path.basename(func[0])}:{func[1]}({func[2]})', file = output)
+        for name, (traced_size, snapshot) in self.snapshots.items():
+            snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),\
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")))
+            print(f'Stage {name} (memory): {traced_size / 1048576:.1f}MB traced, ' + \
+                  'top allocations:', file = output)
+            print(f'{"KB":>9}{"blocks":>10}  line', file = output)
+            for stat in snapshot.statistics("lineno")[:top_cnt]:
+                frame = stat.traceback[0]
+                print(f'{stat.size / 1024:>9.1f}{stat.count:>10}  ' + \
+                      f'{os.path.basename(frame.filename)}:{frame.lineno}', file = output)
+
+    #---------------------------------------------------------------------------
+    def finish(self, output_dir, output, top_cnt = PROFILE_TOP):
+        """ Stop profiling, write the profiles to output_dir and the report to output """
+        if not (self.cpu or self.mem):
+            return
+        filenames = self.save(output_dir)
+        self.dump_report(output, top_cnt)
+        for filename in filenames:
+            print("Profile:", filename, file = output)
+        if self.mem:
+            import tracemalloc
+            tracemalloc.stop()
+        self.cpu = False
+        self.mem = False
+
+# Profiler shared by all modules
+profiler = Profiler()
+
+#-------------------------------------------------------------------------------
+def stage(name):
+    """ Return a context manager profiling a stage with the shared profiler """
+    if not (profiler.cpu or profiler.mem):
+        return NULL_STAGE
+    return ProfileStage(profiler, name)
+
+#-------------------------------------------------------------------------------
+def parse_profile_option(argv):
+    """ Return the profile mode of the command line (--profile=<mode>), "" if
+        not given or None if the mode is not valid
+    """
+    mode = ""
+    for arg in argv:
+        if arg == "--profile" or arg.startswith("--profile="):
+            mode = arg.partition("=")[2] or "cpu"
+            if mode not in PROFILE_MODES:
+                return None
+    return mode
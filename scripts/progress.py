@@ -0,0 +1,189 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" progress - live progress of a run (lint_orchestrator.py, reduced.py --progress):
+    makefiles, modules and issues per second, bytes read per second, the ETA
+    (moving average of the size of the sources analyzed per second) and the
+    utilization of the workers in parallel mode. On a terminal the progress line
+    is refreshed in place, otherwise a progress line is logged periodically.
+"""
+import collections
+import sys
+import threading
+import time
+
+# Refresh interval of the progress line on a terminal (seconds)
+PROGRESS_REFRESH = 0.5
+# Interval between two progress lines when the output is not a terminal (seconds)
+PROGRESS_LOG_INTERVAL = 30.0
+# Count of the last finished makefiles used by the moving average of the rate (ETA)
+PROGRESS_WINDOW = 16
+
+#-------------------------------------------------------------------------------
+def format_duration(seconds):
+    """ Return a duration as text: h:mm:ss """
+    seconds = int(seconds)
+    return f'{seconds // 3600}:{seconds // 60 % 60:02}:{seconds % 60:02}'
+
+#-------------------------------------------------------------------------------
+def format_rate(value):
+    """ Return a rate as text with a k/M suffix: 12.3, 4.5k, 1.2M """
+    if value >= 1e6:
+        return f'{value / 1e6:.1f}M'
+    if value >= 1e3:
+        return f'{value / 1e3:.1f}k'
+    return f'{value:.1f}'
+
+#-------------------------------------------------------------------------------
+class Progress:
+    """ Progress - the progress of the makefiles of a run.
+            title - the phase shown in the progress line (lint, reduce)
+            weights - {makefile : weight} the size of the sources of every makefile
+                (inventory), used for the ETA, the makefiles not found have the
+                average weight (without inventory every makefile has the weight 1)
+            workers - count of workers (the utilization is shown if > 1)
+            output - the output (on a terminal the line is refreshed in place)
+        The counts are updated with update() when a makefile is finished, the
+        line is refreshed by a background thread (start/stop).
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self, title, makefiles, weights = None, workers = 1, output = sys.stdout):
+        self.title = title
+        self.output = output
+        self.tty = hasattr(output, "isatty") and output.isatty()
+        self.workers = max(workers, 1)
+        weights = weights or {}
+        default_weight = sum(weights.values()) / len(weights) if weights else 1
+        self.weights = {makefile : weights.get(makefile) or default_weight for makefile in makefiles}
+        self.weight_total = sum(self.weights.values())
+        self.weight_done = 0
+        self.makefiles_cnt = 0
+        self.modules_cnt = 0
+        self.issues_cnt = 0
+        self.bytes_cnt = 0
+        self.busy_time = 0.0
+        self.time_start = time.perf_counter()
+        self.time_output = self.time_start
+        # (time, weight_done) of the last finished makefiles (moving average)
+        self.window = collections.deque([(self.time_start, 0)], maxlen = PROGRESS_WINDOW + 1)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.drawn = False
+
+    #---------------------------------------------------------------------------
+    def update(self, makefile, modules = 0, issues = 0, bytes_read = 0, busy_time = 0.0):
+        """ Record a finished makefile: the count of its modules, issues, bytes read
+            and the time a worker was busy with it
+        """
+        with self.lock:
+            self.makefiles_cnt += 1
+            self.modules_cnt += modules
+            self.issues_cnt += issues
+            self.bytes_cnt += bytes_read
+            self.busy_time += busy_time
+            self.weight_done += self.weights.get(makefile, 0)
+            self.window.append((time.perf_counter(), self.weight_done))
+
+    #---------------------------------------------------------------------------
+    def add_busy(self, busy_time):
+        """ Add the time a worker was busy (recorded apart from the makefile) """
+        with self.lock:
+            self.busy_time += busy_time
+
+    #---------------------------------------------------------------------------
+    def get_eta(self, time_now):
+        """ Return the estimated remaining time (seconds) or None: the remaining
+            weight divided by the weight finished per second in the last makefiles
+        """
+        time_old, weight_old = self.window[0]
+        if self.weight_done <= weight_old or time_now <= time_old:
+            return None
+        rate = (self.weight_done - weight_old) / (time_now - time_old)
+        return max(self.weight_total - self.weight_done, 0) / rate
+
+    #---------------------------------------------------------------------------
+    def get_line(self):
+        """ Return the progress line, example:
+            [lint] 45/118 makefiles (38%) | 0.5 mk/s 250.1 mod/s 1.2k iss/s 3.4MB/s | util 87% |
+                   elapsed 0:12:30 ETA 0:20:11
+        """
+        time_now = time.perf_counter()
+        elapsed = max(time_now - self.time_start, 1e-9)
+        percent = 100.0 * self.weight_done / self.weight_total if self.weight_total else 100.0
+        line = f'[{self.title}] {self.makefiles_cnt}/{len(self.weights)} makefiles ({percent:.0f}%) | ' + \
+               f'{format_rate(self.makefiles_cnt / elapsed)} mk/s ' + \
+               f'{format_rate(self.modules_cnt / elapsed)} mod/s ' + \
+               f'{format_rate(self.issues_cnt / elapsed)} iss/s ' + \
+               f'{format_rate(self.bytes_cnt / elapsed)}B/s'
+        if self.workers > 1:
+            line += f' | util {min(100.0 * self.busy_time / (elapsed * self.workers), 100.0):.0f}%'
+        line += " | elapsed " + format_duration(elapsed)
+        if self.makefiles_cnt < len(self.weights):
+            eta = self.get_eta(time_now)
+            line += " ETA " + (format_duration(eta) if eta is not None else "-")
+        return line
+
+    #---------------------------------------------------------------------------
+    def draw(self, force = False):
+        """ Refresh the progress line (on a terminal: in place, every PROGRESS_REFRESH
+            seconds, otherwise: a new line every PROGRESS_LOG_INTERVAL seconds)
+        """
+        with self.lock:
+            time_now = time.perf_counter()
+            interval = PROGRESS_REFRESH if self.tty else PROGRESS_LOG_INTERVAL
+            if not force and time_now - self.time_output < interval:
+                return
+            self.time_output = time_now
+            if self.tty:
+                self.output.write("\r\x1b[K" + self.get_line())
+                self.drawn = True
+            else:
+                self.output.write(self.get_line() + "\n")
+            self.output.flush()
+
+    #---------------------------------------------------------------------------
+    def log(self, text):
+        """ Print a line of the run (on a terminal above the progress line) """
+        with self.lock:
+            if self.tty and self.drawn:
+                self.output.write("\r\x1b[K" + text + "\n" + self.get_line())
+            else:
+                self.output.write(text + "\n")
+            self.output.flush()
+
+    #---------------------------------------------------------------------------
+    def run(self):
+        """ Refresh the progress line until stopped (background thread) """
+        while not self.stop_event.wait(PROGRESS_REFRESH):
+            self.draw()
+
+    #---------------------------------------------------------------------------
+    def start(self):
+        """ Start the background refresh of the progress line """
+        self.thread = threading.Thread(target = self.run, daemon = True)
+        self.thread.start()
+
+    #---------------------------------------------------------------------------
+    def stop(self):
+        """ Stop the background refresh, print the final progress line """
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+        self.draw(force = True)
+        if self.tty:
+            self.output.write("\n")
+            self.output.flush()
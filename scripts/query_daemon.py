@@ -0,0 +1,374 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" query_daemon - resident daemon: loads the results of all makefiles, the
+    function ranges of the C modules and the PClint messages once and answers
+    queries over a local Unix socket (one JSON object per line). The results
+    are reloaded when the PClint outputs change.
+"""
+import bisect
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+import processor
+import ignore_list
+import pclp_messages
+import juliet_cwe
+import path_resolver
+from c_parser_src import CParser
+from c_parser_src.canalyzer import AnalyzerException
+
+# Global results folder
+GRES_FOLDER = "ig_gl_out"
+# File where all found Makefiles are stored (same as reduced.py)
+MAKEFILES_NAME = "ig_makefiles_win1.txt"
+# PClint output file
+PCLP_OUT_FILE = "ig_pclint_out.txt"
+# Unix socket of the daemon (in the global results folder)
+SOCKET_FILE = "ig_query.sock"
+# Default interval (seconds) between two checks of the PClint outputs (hot reload)
+RELOAD_INTERVAL = 5.0
+
+#-------------------------------------------------------------------------------
+class ResultsIndex:
+    """ ResultsIndex - in-memory indexes of the results of all makefiles:
+            modules - the per-module results (Processor.results_modules)
+            cwe_issues - {cwe_nr : {issue_nr : [true-positive, false-positive, other]}}
+            issue_modules - {issue_nr : {module_name : [true-positive, false-positive, other]}}
+        The index is not changed once built, a reload builds a new index
+        (the queries running use the old index until they are answered).
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self, makefiles, states):
+        """ Build the indexes from the partial results (Processor.get_state) of
+            the makefiles, merged in the order of the makefiles.
+        """
+        proc = processor.Processor()
+        for makefile in makefiles:
+            if makefile in states:
+                proc.merge_state(states[makefile])
+        self.modules = proc.results_modules
+        self.issues = proc.results_issues
+
+        self.cwe_issues = {}
+        self.issue_modules = {}
+        for module_name, module_res in self.modules.items():
+            cwe_res = self.cwe_issues.setdefault(juliet_cwe.get_cwe_number(module_name), {})
+            for res_idx, issues in enumerate(module_res):
+                for issue_nr, issue_cnt in issues.items():
+                    cwe_res.setdefault(issue_nr, [0, 0, 0])[res_idx] += issue_cnt
+                    self.issue_modules.setdefault(issue_nr, {})\
+                        .setdefault(module_name, [0, 0, 0])[res_idx] += issue_cnt
+
+#-------------------------------------------------------------------------------
+class QueryDaemon:
+    """ QueryDaemon - holds the indexes and answers the queries.
+
+        Queries (JSON objects, the answer is a JSON object with "ok" set to
+        true and the result, or "ok" set to false and an "error" text):
+            {"query" : "function", "file" : <file>, "line" : <line>}
+                - the function at a line of a C module
+            {"query" : "cwe", "cwe" : <cwe_nr>}
+                - true-positive/false-positive/other counts of every message for a CWE
+            {"query" : "modules", "message" : <message_nr>}
+                - the modules where the message was reported
+            {"query" : "reload"} - check the PClint outputs, reload the changed makefiles
+            {"query" : "stats"} - the state of the daemon
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self, working_dir, module_ignore_list = None, pclp_msg = None):
+        self.working_dir = os.path.realpath(working_dir)
+        self.gres_path = os.path.join(self.working_dir, GRES_FOLDER)
+        self.module_ignore_list = module_ignore_list
+        self.pclp_msg = pclp_msg
+        self.makefiles = []
+        self.signatures = {}
+        self.states = {}
+        self.errors = {}
+        self.functions = {}
+        self.index = ResultsIndex([], {})
+        self.reload_lock = threading.Lock()
+        self.reload_cnt = 0
+        self.load_time = 0.0
+        self.query_cnt = 0
+
+    #---------------------------------------------------------------------------
+    def get_pclp_out_file(self, makefile):
+        """ Return the PClint output file of a makefile (in its local results folder) """
+        lres_path = os.path.relpath(os.path.dirname(makefile), self.working_dir)
+        return os.path.join(self.gres_path, lres_path, PCLP_OUT_FILE)
+
+    #---------------------------------------------------------------------------
+    def index_functions(self, filename, c_parser = None):
+        """ Index the functions of a C module: the sorted start lines and the list
+            of functions (start_line, end_line, name). The module is parsed, unless
+            already parsed by c_parser.
+        """
+        if c_parser is None:
+            c_parser = CParser()
+        c_parser.process_file(filename)
+        func_list = sorted((func.pos_start[0], func.pos_end[0], func.name)\
+                           for func in c_parser.c_analyzed_dict.get(filename, []))
+        self.functions[filename] = ([func[0] for func in func_list], func_list)
+
+    #---------------------------------------------------------------------------
+    def process_makefile(self, makefile, reindex = False):
+        """ Process a makefile: the partial results and the function ranges of its modules
+            (only the modules not indexed yet, or all modules if reindex is set).
+        """
+        proc = processor.Processor()
+        # The functions are indexed from the modules parsed by interpret (not parsed again)
+        c_parser = CParser()
+        with open(os.devnull, "w", encoding='UTF-8') as null_output:
+            res = proc.interpret(self.get_pclp_out_file(makefile), os.path.dirname(makefile),\
+                                 null_output, self.module_ignore_list, c_parser = c_parser)
+        if res:
+            raise ValueError("Error in file: " + res[0] + ", line " + str(res[1]))
+        self.states[makefile] = proc.get_state()
+        for filename in proc.parsed_files:
+            if reindex or filename not in self.functions:
+                self.index_functions(filename, c_parser)
+
+    #---------------------------------------------------------------------------
+    def reload(self):
+        """ Check the list of makefiles and the PClint outputs, process the new
+            or changed makefiles only and rebuild the results index.
+            Returns the count of the makefiles processed.
+        """
+        with self.reload_lock:
+            time_start = time.perf_counter()
+            with open(os.path.join(self.gres_path, MAKEFILES_NAME), encoding='UTF-8') as file:
+                makefiles = [line.strip() for line in file if line.strip()]
+            for makefile in set(self.states) - set(makefiles):
+                del self.states[makefile]
+                self.signatures.pop(makefile, None)
+
+            changed_cnt = 0
+            for makefile in makefiles:
+                try:
+                    stat = os.stat(self.get_pclp_out_file(makefile))
+                except OSError:
+                    continue
+                signature = (stat.st_size, stat.st_mtime_ns)
+                if self.signatures.get(makefile) == signature:
+                    continue
+                self.signatures[makefile] = signature
+                self.errors.pop(makefile, None)
+                changed_cnt += 1
+                try:
+                    self.process_makefile(makefile, makefile in self.states)
+                except (AnalyzerException, OSError, ValueError) as ex:
+                    self.errors[makefile] = type(ex).__name__ + ": " + str(ex)
+                    self.states.pop(makefile, None)
+
+            if changed_cnt or makefiles != self.makefiles:
+                self.makefiles = makefiles
+                self.index = ResultsIndex(makefiles, self.states)
+            self.reload_cnt += 1
+            self.load_time = time.perf_counter() - time_start
+            return changed_cnt
+
+    #---------------------------------------------------------------------------
+    def get_message_name(self, issue_nr):
+        """ Return the name of a message (example: "W534") """
+        if self.pclp_msg:
+            return self.pclp_msg.get_message_name(issue_nr)
+        return str(issue_nr)
+
+    #---------------------------------------------------------------------------
+    def query_function(self, request):
+        """ Return the function at a line of a C module """
+        filename = request["file"]
+        if not os.path.isabs(filename):
+            filename = os.path.join(self.working_dir, filename)
+        filename = path_resolver.realpath(filename)
+        line = int(request["line"])
+        if filename not in self.functions:
+            # Module without issues (not parsed yet)
+            self.index_functions(filename)
+        starts, func_list = self.functions[filename]
+        func_idx = bisect.bisect_right(starts, line) - 1
+        if func_idx >= 0 and line <= func_list[func_idx][1]:
+            return {"file" : filename, "function" : func_list[func_idx][2],\
+                    "start" : func_list[func_idx][0], "end" : func_list[func_idx][1]}
+        return {"file" : filename, "function" : None}
+
+    #---------------------------------------------------------------------------
+    def query_cwe(self, request):
+        """ Return the true-positive/false-positive/other counts of every message for a CWE """
+        cwe_res = self.index.cwe_issues.get(int(request["cwe"]), {})
+        issues = []
+        for issue_nr, issue_cnt_list in sorted(cwe_res.items()):
+            true_false_cnt = issue_cnt_list[0] + issue_cnt_list[1]
+            issues.append({"message" : issue_nr, "name" : self.get_message_name(issue_nr),\
+                           "tp" : issue_cnt_list[0], "fp" : issue_cnt_list[1],\
+                           "other" : issue_cnt_list[2],\
+                           "precision" : issue_cnt_list[0] / true_false_cnt if true_false_cnt else None})
+        return {"cwe" : int(request["cwe"]), "issues" : issues}
+
+    #---------------------------------------------------------------------------
+    def query_modules(self, request):
+        """ Return the modules where a message was reported """
+        issue_nr = int(request["message"])
+        modules = self.index.issue_modules.get(issue_nr, {})
+        return {"message" : issue_nr, "name" : self.get_message_name(issue_nr),\
+                "modules" : [{"module" : module_name, "tp" : cnt_list[0], "fp" : cnt_list[1],\
+                              "other" : cnt_list[2]} for module_name, cnt_list in modules.items()]}
+
+    #---------------------------------------------------------------------------
+    def query_stats(self, _request):
+        """ Return the state of the daemon """
+        return {"makefiles" : len(self.makefiles), "processed" : len(self.states),\
+                "modules" : len(self.index.modules), "files" : len(self.functions),\
+                "errors" : self.errors, "reloads" : self.reload_cnt,\
+                "load_time" : round(self.load_time, 3), "queries" : self.query_cnt}
+
+    #---------------------------------------------------------------------------
+    def query(self, request):
+        """ Answer a query (a dictionary), return the answer (a dictionary) """
+        self.query_cnt += 1
+        query_funcs = {"function" : self.query_function,
+                       "cwe" : self.query_cwe,
+                       "modules" : self.query_modules,
+                       "stats" : self.query_stats,
+                       "reload" : lambda request: {"changed" : self.reload()}}
+        query_func = query_funcs.get(request.get("query")) if isinstance(request, dict) else None
+        if not query_func:
+            return {"ok" : False, "error" : "unknown query, expected one of: " + \
+                                            ", ".join(query_funcs)}
+        try:
+            result = query_func(request)
+        except KeyError as ex:
+            return {"ok" : False, "error" : "missing field: " + str(ex)}
+        except (AnalyzerException, OSError, ValueError, TypeError) as ex:
+            return {"ok" : False, "error" : type(ex).__name__ + ": " + str(ex)}
+        result["ok"] = True
+        return result
+
+#-------------------------------------------------------------------------------
+class QueryHandler(socketserver.StreamRequestHandler):
+    """ QueryHandler - reads the queries of a connection (one JSON object per line)
+        and writes the answers (one JSON object per line).
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {"ok" : False, "error" : "invalid JSON"}
+            else:
+                response = self.server.query_daemon.query(request)
+            self.wfile.write((json.dumps(response) + "\n").encode('UTF-8'))
+
+#-------------------------------------------------------------------------------
+class QueryServer(socketserver.ThreadingUnixStreamServer):
+    """ QueryServer - Unix socket server, every connection in its own thread """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, query_daemon):
+        self.query_daemon = query_daemon
+        super().__init__(socket_path, QueryHandler)
+
+#-------------------------------------------------------------------------------
+def reload_loop(query_daemon, interval):
+    """ Hot reload: check the PClint outputs every interval seconds """
+    while True:
+        time.sleep(interval)
+        changed_cnt = query_daemon.reload()
+        if changed_cnt:
+            print("Reloaded:", changed_cnt, "makefiles changed", flush = True)
+
+#-------------------------------------------------------------------------------
+def send_query(socket_path, request_text):
+    """ Send a query (JSON text) to the daemon, return the answer (JSON text) """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(request_text.strip().encode('UTF-8') + b"\n")
+        with client.makefile("r", encoding='UTF-8') as reader:
+            return reader.readline().strip()
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # <------ 0 ----->|<---- 1 ---->|<----- 2 ----->|<------------ options ------------>|
+    # query_daemon.py  <working_dir> [ignore_list]   [--socket=<path>] [--reload=<seconds>]
+    #
+    # query_daemon.py --query=<socket> <json_query>
+    #
+    # --socket=<path> - Unix socket (default: <working_dir>/ig_gl_out/ig_query.sock)
+    # --reload=<seconds> - interval between two checks of the PClint outputs (default 5s),
+    #       0 disables the hot reload (the results are reloaded only by the "reload" query)
+    # --query=<socket> - client: send a query to the daemon and print the answer
+    #
+    # The PClint messages are loaded from pclp_msg_list.txt (current directory)
+
+    args_list = [arg for arg in sys.argv if not arg.startswith("--")]
+    options = dict(arg[2:].partition("=")[::2] for arg in sys.argv if arg.startswith("--"))
+
+    if "query" in options and len(args_list) >= 2:
+        print(send_query(options["query"], args_list[1]))
+
+    elif len(args_list) >= 2:
+
+        ignore_modules = ignore_list.IgnoreModuleList()
+        if len(args_list) >= 3 and not ignore_modules.load(args_list[2], args_list[1]):
+            print("Error: cannot open list of modules to be ignored:", args_list[2], file = sys.stderr)
+            sys.exit(1)
+
+        pclp_msg_arg = pclp_messages.PclpMessages()
+        if pclp_msg_arg.load("pclp_msg_list.txt"):
+            pclp_msg_arg = None
+
+        daemon_arg = QueryDaemon(args_list[1], ignore_modules.ignore_list, pclp_msg_arg)
+        try:
+            daemon_arg.reload()
+        except OSError as ex:
+            print("Error: cannot load the results:", ex, file = sys.stderr)
+            sys.exit(1)
+        print("Loaded:", len(daemon_arg.states), "makefiles,", len(daemon_arg.index.modules),\
+              "modules,", len(daemon_arg.functions), "files in", f'{daemon_arg.load_time:.2f}s')
+
+        socket_arg = options.get("socket") or os.path.join(daemon_arg.gres_path, SOCKET_FILE)
+        if os.path.exists(socket_arg):
+            os.remove(socket_arg)
+        reload_arg = float(options.get("reload") or RELOAD_INTERVAL)
+        if reload_arg > 0:
+            threading.Thread(target = reload_loop, args = (daemon_arg, reload_arg),\
+                             daemon = True).start()
+
+        with QueryServer(socket_arg, daemon_arg) as server:
+            print("Listening on:", socket_arg, flush = True)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os.remove(socket_arg)
+    else:
+        print("Usage: python query_daemon.py <working_dir> [ignore_list] [--socket=<path>] " + \
+              "[--reload=<seconds>]", file = sys.stderr)
+        print("       python query_daemon.py --query=<socket> <json_query>", file = sys.stderr)
+        sys.exit(1)
@@ -18,12 +18,25 @@
 """
 import os
 import sys
+import time
 
 import processor
 import ignore_list
 import pclp_messages
-import generate_pie
-import generate_bars
+import run_history
+import juliet_manifest
+import function_results
+import reduced_cache
+import checkpoint
+import results_state
+import shard
+import sampling
+import discovery
+import watch
+import tracing
+import profiling
+import progress
+from c_parser_src.canalyzer import AnalyzerException
 
 # Global results folder
 GRES_FOLDER = "ig_gl_out"
@@ -31,10 +44,28 @@ GRES_FOLDER = "ig_gl_out"
 MAKEFILES_NAME = "ig_makefiles_win1.txt"
 # File where global results (for all makefiles) are stored
 GRES_OUT_FILE = "ig_global_results.txt"
+# File where per-function results (top functions for every issue) are stored
+FUNC_OUT_FILE = "ig_function_results.txt"
 # PClint output file:
 PCLP_OUT_FILE="ig_pclint_out.txt"
+# Marker of the finished makefile (written by lint_orchestrator.py)
+PCLP_DONE_FILE = "ig_pclint_done.txt"
+# Marker of the finished lint run (written by lint_orchestrator.py)
+LINT_DONE_FILE = "ig_lint_done.txt"
 # File where output from interpreter is stored
 INTR_OUT_FILE="ig_interpret_out.txt"
+# Run history folder (inside of the working directory, outside of the global
+# results folder, so it is not deleted by ig1.sh)
+HISTORY_FOLDER = "ig_history"
+# Extra PClint options (in the root of the repository)
+PCLP_ARGS_FILE = "args.lnt"
+# Default tolerance (+/- lines) when comparing issues with the flaw lines
+FLAW_TOLERANCE = 3
+# Chrome trace (--trace without a file name, in the global results folder)
+TRACE_FILE = "ig_trace.json"
+# Report stages (selected with --report, default all): the precision (and its
+# confidence interval) of every issue, the run history and the result charts
+REPORT_STAGES = ("precision", "history", "charts")
 
 # False-Positive colors
 cfp_list_r = ["lightcoral", "indianred", "salmon", "tomato", "darksalmon", "coral", "orangered", "lightsalmon"]
@@ -46,6 +77,18 @@ ctp_list_g = ["yellowgreen", "palegreen", "limegreen", "mediumspringgreen"]
 ctp_list_t = ["mediumaquamarine", "turquoise", "paleturquoise", "aquamarine"]
 ctp_list_b = ["powderblue", "skyblue", "lightsteelblue", "lightskyblue"]
 
+# Arguments of the worker processes (--jobs mode), set by init_worker
+worker_args = {}
+
+#-------------------------------------------------------------------------------
+class MakefileError(Exception):
+    """ Exception raised for errors in processing a makefile
+    """
+    def __init__(self, txt1, txt2):
+        self.txt1 = txt1
+        self.txt2 = txt2
+        super().__init__(txt1 + " " + txt2)
+
 #-------------------------------------------------------------------------------
 def error_exit(txt1 = None, txt2 = None):
     """ Display error message and exit """
@@ -56,6 +99,59 @@ def error_exit(txt1 = None, txt2 = None):
         print(txt2, file = sys.stderr)
     sys.exit(1)
 
+#-------------------------------------------------------------------------------
+def get_number(text):
+    """ Return the number of an option value (float) or None if not a number """
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+#-------------------------------------------------------------------------------
+def parse_options(argv):
+    """ Split the command line arguments into positional arguments and options.
+        An option has the format --name=value or --name (value is None in this case).
+        Returns a tuple: (args_list, options_dict)
+            Example: ["reduced.py", "./test", "--manifest=manifest.xml"] returns:
+            (["reduced.py", "./test"], {"manifest" : "manifest.xml"})
+    """
+    args_list = []
+    options_dict = {}
+    for arg in argv:
+        if arg.startswith("--"):
+            name, _, value = arg[2:].partition("=")
+            options_dict[name] = value if value else None
+        else:
+            args_list.append(arg)
+    return (args_list, options_dict)
+
+#-------------------------------------------------------------------------------
+def get_report_stages(options_arg):
+    """ Return the set of report stages selected by the options --report=<stage,...>
+        and --no-charts (or None if an unknown stage is selected)
+    """
+    stages = set(REPORT_STAGES)
+    if options_arg.get("report"):
+        stages = set(options_arg["report"].split(","))
+        if not stages <= set(REPORT_STAGES):
+            return None
+    if "no-charts" in options_arg:
+        stages.discard("charts")
+    return stages
+
+#-------------------------------------------------------------------------------
+def import_chart_modules():
+    """ Import the chart modules (matplotlib and numpy are loaded only if the
+        charts are generated), the headless backend (Agg) is selected before
+        pyplot is loaded. Returns a tuple (generate_pie, generate_bars).
+    """
+    with tracing.span("chart_import"):
+        import matplotlib
+        matplotlib.use("Agg")
+        import generate_pie
+        import generate_bars
+    return (generate_pie, generate_bars)
+
 #-------------------------------------------------------------------------------
 def generate_issues_colors(issues_dict, cl_list):
     """ Create a dictionary with unique colors for issues.
@@ -103,29 +199,43 @@ def generate_issues_colors(issues_dict, cl_list):
     return issues_colors
 
 #-------------------------------------------------------------------------------
-def process_makefile_line(proc, gres_path_arg, working_dir_arg, makefile, module_ignore_list):
-    """ Process one line (one makefile) from the file containing a list of makefiles
+def get_makefile_paths(gres_path_arg, working_dir_arg, makefile):
+    """ Return the makefile path and the local results path of a makefile,
+        as a tuple: (makefile_path, lres_path)
     """
-    if not makefile:
-        return
-
     # Path of the current analyzed Makefile, example:
     # C:\projects\pclp_juliet_a\test\testcases\CWE561_Dead_Code\
     #|<----- working directory ---->|<-- make relative path -->|
     #|<----------------- makefile path ----------------------->|
     makefile_path = os.path.dirname(makefile)
-    print("make_path:", makefile_path)
-    if not os.path.isdir(makefile_path):
-        error_exit("Error: make_path not found:", makefile_path)
 
     # Local results path, example:
     # C:\projects\pclp_juliet_a\test\ig_gl_out\testcases\CWE561_Dead_Code\
     #|<-------------- gres_path ------------->|<-- make relative path -->|
     lres_path = os.path.relpath(makefile_path, working_dir_arg)
     lres_path = os.path.join(gres_path_arg, lres_path)
-    print("lres_path:", lres_path)
+    return (makefile_path, lres_path)
+
+#-------------------------------------------------------------------------------
+def process_makefile_line(proc, gres_path_arg, working_dir_arg, makefile, module_ignore_list,\
+                          file_cache = None, quiet = False):
+    """ Process one line (one makefile) from the file containing a list of makefiles
+        file_cache - the files of the makefile already read (prefetched) or None
+        quiet - don't print the paths of the makefile (--progress)
+    """
+    if not makefile:
+        return
+
+    makefile_path, lres_path = get_makefile_paths(gres_path_arg, working_dir_arg, makefile)
+    if not quiet:
+        print("make_path:", makefile_path)
+    if not os.path.isdir(makefile_path):
+        raise MakefileError("Error: make_path not found:", makefile_path)
+
+    if not quiet:
+        print("lres_path:", lres_path)
     if not os.path.isdir(lres_path):
-        error_exit("Error: local results directory not found:", lres_path)
+        raise MakefileError("Error: local results directory not found:", lres_path)
     pclp_out_filename = os.path.join(lres_path, PCLP_OUT_FILE)
 
     # Name for the Interpreter results file
@@ -133,14 +243,14 @@ def process_makefile_line(proc, gres_path_arg, working_dir_arg, makefile, module
 
     # Check if PClint output file exists in local results directory
     if not os.path.isfile(pclp_out_filename):
-        error_exit("Error: PClint output file not found:", pclp_out_filename)
+        raise MakefileError("Error: PClint output file not found:", pclp_out_filename)
 
     int_output = sys.stdout
     if int_filename:
         int_output = open(int_filename, "w", encoding='UTF-8')\
 
     res = proc.interpret(pclp_out_filename, makefile_path, int_output,\
-                        module_ignore_list)
+                        module_ignore_list, file_cache)
     #if not res:
     #    print(pr.results_modules)
 
@@ -148,11 +258,403 @@ def process_makefile_line(proc, gres_path_arg, working_dir_arg, makefile, module
         int_output.close()
 
     if res:
-        error_exit("Error in file:" + res[0], \
+        raise MakefileError("Error in file:" + res[0], \
                     "Error precessing line " + str(res[1]) + " > " + res[2])
 
 #-------------------------------------------------------------------------------
-def generate_plot_data(pclp_m, proc):
+def new_processor(options_arg, manifest = None):
+    """ Create a Processor configured according to the command line options
+        manifest - the loaded Juliet manifest (ground truth) or None
+    """
+    proc = processor.Processor()
+    if manifest:
+        proc.set_ground_truth(manifest, int(options_arg.get("flaw-tolerance") or FLAW_TOLERANCE))
+    if "functions" in options_arg:
+        proc.set_function_results(function_results.FunctionResults())
+    return proc
+
+#-------------------------------------------------------------------------------
+def get_config_text(options_arg):
+    """ Return a text describing the options which change the results
+        (part of the fingerprint of the cached results)
+    """
+    return "manifest=" + run_history.file_hash(options_arg.get("manifest")) + \
+           ";flaw-tolerance=" + str(options_arg.get("flaw-tolerance") or FLAW_TOLERANCE) + \
+           ";functions=" + str("functions" in options_arg)
+
+#-------------------------------------------------------------------------------
+def process_makefile_partial(gres_path_arg, working_dir_arg, makefile,\
+                             module_ignore_list, options_arg, manifest, file_cache = None):
+    """ Process one makefile in its own Processor and return the partial results
+        (Processor.get_state). In incremental mode (--incremental) the partial
+        results are cached in the local results folder, a makefile whose
+        fingerprint (PClint output, C sources, ignore list, options) didn't
+        change is not processed again, the cached results are returned instead.
+    """
+    fingerprint = None
+    if "incremental" in options_arg:
+        _, lres_path = get_makefile_paths(gres_path_arg, working_dir_arg, makefile)
+        pclp_out_filename = os.path.join(lres_path, PCLP_OUT_FILE)
+        if os.path.isfile(pclp_out_filename):
+            fingerprint = reduced_cache.get_fingerprint(pclp_out_filename,\
+                module_ignore_list, get_config_text(options_arg))
+            state = reduced_cache.load_cached_state(lres_path, fingerprint)
+            if state:
+                if "progress" not in options_arg:
+                    print("unchanged:", makefile)
+                tracing.count("incremental_hits")
+                return state
+            tracing.count("incremental_misses")
+
+    proc = new_processor(options_arg, manifest)
+    process_makefile_line(proc, gres_path_arg, working_dir_arg, makefile, module_ignore_list,\
+                          file_cache, "progress" in options_arg)
+    state = proc.get_state()
+
+    if fingerprint:
+        reduced_cache.save_cached_state(lres_path, fingerprint, proc.parsed_files, state)
+    return state
+
+#-------------------------------------------------------------------------------
+def load_manifest(options_arg):
+    """ Load the Juliet manifest (ground truth: flaw lines) if requested by
+        the --manifest option. Returns the manifest or None.
+    """
+    if not options_arg.get("manifest"):
+        return None
+    manifest = juliet_manifest.JulietManifest()
+    err_str = manifest.load(options_arg["manifest"])
+    if err_str:
+        error_exit("Error Juliet manifest", err_str)
+    return manifest
+
+#-------------------------------------------------------------------------------
+def load_sample(gres_path_arg, makefiles, options_arg, inventory = None):
+    """ Load (or create) the sample of test cases requested by the --sample option.
+        The sample file created by ig1.sh (SAMPLE set) is used if it was created
+        with the same fraction and seed, otherwise a new sample is created (and
+        saved) from the list of makefiles.
+    """
+    sample_filename = os.path.join(gres_path_arg, sampling.SAMPLE_FILE)
+    sample = sampling.load_sample(sample_filename)
+    if sample and options_arg["sample"] is None and "seed" not in options_arg:
+        return sample
+
+    fraction = float(options_arg["sample"] or sampling.SAMPLE_FRACTION)
+    seed = int(options_arg.get("seed") or sampling.SAMPLE_SEED)
+    if not sample or sample["fraction"] != fraction or sample["seed"] != seed:
+        sample = sampling.create_sample(makefiles, fraction, seed, inventory)
+        results_state.save(sample_filename, sample)
+    return sample
+
+#-------------------------------------------------------------------------------
+def init_worker(gres_path_arg, working_dir_arg, module_ignore_list, options_arg, manifest):
+    """ Initialize a worker process (or the main process in serial mode):
+        remember the arguments common to all makefiles.
+    """
+    worker_args["gres_path"] = gres_path_arg
+    worker_args["working_dir"] = working_dir_arg
+    worker_args["ignore_list"] = module_ignore_list
+    worker_args["options"] = options_arg
+    worker_args["manifest"] = manifest
+
+    # Tracing (--trace): a worker process writes its spans to a part file after
+    # every makefile (merged by the main process), the spans inherited from the
+    # main process (fork) are removed
+    worker_args["trace_part"] = False
+    if options_arg.get("trace"):
+        import multiprocessing
+        tracing.tracer.enable()
+        if multiprocessing.parent_process() is not None:
+            worker_args["trace_part"] = True
+            tracing.tracer.clear()
+
+#-------------------------------------------------------------------------------
+def process_makefile_job(makefile, file_cache = None):
+    """ Process one makefile in a worker process (or in the main process in serial mode).
+        Returns a tuple: (makefile, partial_results, error) where partial_results
+        is the state of the Processor (Processor.get_state) or None in case of error.
+        file_cache - the files of the makefile already read (prefetched) or None
+    """
+    try:
+        with tracing.span("makefile", "makefile", {"makefile" : makefile}):
+            state = process_makefile_partial(worker_args["gres_path"], worker_args["working_dir"],\
+                makefile, worker_args["ignore_list"], worker_args["options"], worker_args["manifest"],\
+                file_cache)
+    except MakefileError as ex:
+        return (makefile, None, ex.txt1 + " " + ex.txt2)
+    except (AnalyzerException, OSError, ValueError) as ex:
+        return (makefile, None, type(ex).__name__ + ": " + str(ex))
+    finally:
+        if worker_args.get("trace_part"):
+            tracing.tracer.flush(worker_args["options"]["trace"])
+    return (makefile, state, None)
+
+#-------------------------------------------------------------------------------
+def process_makefile_timed(makefile):
+    """ Process one makefile in a worker process, return a tuple: (result, seconds)
+        where result is the result of process_makefile_job and seconds the time
+        the worker was busy (worker utilization, --progress)
+    """
+    time_start = time.perf_counter()
+    res = process_makefile_job(makefile)
+    return (res, time.perf_counter() - time_start)
+
+#-------------------------------------------------------------------------------
+def process_makefiles_stream(proc, gres_path_arg, working_dir_arg, makefiles, module_ignore_list,\
+                             quiet = False):
+    """ Streaming mode: process all makefiles directly in proc (which writes the
+        per-module results to its results sink and releases them).
+        Yields a tuple for every makefile: (makefile, None, error), see process_makefile_job.
+        quiet - don't print the paths of the makefiles (--progress)
+    """
+    for makefile in makefiles:
+        error = None
+        try:
+            with tracing.span("makefile", "makefile", {"makefile" : makefile}):
+                process_makefile_line(proc, gres_path_arg, working_dir_arg, makefile,\
+                                      module_ignore_list, quiet = quiet)
+        except MakefileError as ex:
+            error = ex.txt1 + " " + ex.txt2
+        except (AnalyzerException, OSError, ValueError) as ex:
+            error = type(ex).__name__ + ": " + str(ex)
+        yield (makefile, None, error)
+
+#-------------------------------------------------------------------------------
+def locate_makefile(makefile):
+    """ Return the PClint output file and the makefile path of a makefile
+        (used by the prefetch pipeline), as a tuple: (pclp_out_filename, makefile_path)
+    """
+    makefile_path, lres_path = get_makefile_paths(worker_args["gres_path"],\
+                                                  worker_args["working_dir"], makefile)
+    return (os.path.join(lres_path, PCLP_OUT_FILE), makefile_path)
+
+#-------------------------------------------------------------------------------
+def process_makefiles(gres_path_arg, working_dir_arg, makefiles,\
+                      module_ignore_list, options_arg, manifest, jobs, run_progress = None):
+    """ Process all makefiles, every makefile in its own Processor: in the main
+        process (jobs <= 1) or in a pool of jobs worker processes. In the main
+        process with --prefetch, the files of the next makefiles are read
+        (prefetched) while the current makefile is processed.
+        Yields (in the order of the makefiles) a tuple for every makefile:
+        (makefile, partial_results, error), see process_makefile_job.
+        run_progress - the live progress (progress.Progress), gets the time the
+            workers were busy, or None
+    """
+    # The process pool and the prefetch pipeline (asyncio) are imported only if used
+    init_args = (gres_path_arg, working_dir_arg, module_ignore_list, options_arg, manifest)
+    if jobs > 1:
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(max_workers = jobs,\
+                initializer = init_worker, initargs = init_args) as executor:
+            if run_progress is None:
+                yield from executor.map(process_makefile_job, makefiles)
+            else:
+                for makefile_res, busy_time in executor.map(process_makefile_timed, makefiles):
+                    run_progress.add_busy(busy_time)
+                    yield makefile_res
+    elif "prefetch" in options_arg:
+        import async_pipeline
+        init_worker(*init_args)
+        pipeline = async_pipeline.PrefetchPipeline(locate_makefile, process_makefile_job,\
+            module_ignore_list, int(options_arg["prefetch"] or async_pipeline.PREFETCH_MAKEFILES),\
+            int(options_arg.get("prefetch-mb") or async_pipeline.PREFETCH_BYTES // 1048576) * 1048576)
+        yield from pipeline.run(makefiles)
+        print("Prefetch:", pipeline.stats)
+    else:
+        init_worker(*init_args)
+        yield from map(process_makefile_job, makefiles)
+
+#-------------------------------------------------------------------------------
+def update_progress(run_progress, proc, gres_path_arg, working_dir_arg, makefile, state, inventory):
+    """ Record a processed makefile in the live progress: the count of its C sources
+        (inventory), of its issues (partial results or, in streaming mode, the issues
+        added to proc) and the bytes read (C sources and PClint output)
+    """
+    sources = (inventory or {}).get(makefile, {})
+    if state:
+        issues_cnt = sum(state["all"])
+    elif proc.results_sink is not None:
+        issues_cnt = proc.results_all_bad + proc.results_all_good + proc.results_all_other - \
+                     run_progress.issues_cnt
+    else:
+        issues_cnt = 0
+    pclp_out_filename = os.path.join(get_makefile_paths(gres_path_arg, working_dir_arg,\
+                                                        makefile)[1], PCLP_OUT_FILE)
+    try:
+        pclp_out_size = os.path.getsize(pclp_out_filename)
+    except OSError:
+        pclp_out_size = 0
+    run_progress.update(makefile, len(sources), issues_cnt, sum(sources.values()) + pclp_out_size)
+
+#-------------------------------------------------------------------------------
+def watch_makefiles(gres_path_arg, working_dir_arg, makefiles,\
+                    module_ignore_list, options_arg, manifest, jobs):
+    """ Watch mode (--watch): poll the PClint outputs of the makefiles while ig1.sh
+        is running, process every completed output once (serial or, with --jobs, in
+        parallel) and refresh the summary file after every poll which found new
+        outputs. The running results are updated by merging the partial results of
+        the new outputs only, the outputs already processed are not read again.
+        The charts (all makefiles) are refreshed in one pass if the issues changed,
+        at most every WATCH_CHARTS_INTERVAL seconds (the final charts are generated
+        by the report, when all outputs were processed).
+        A makefile failed or skipped by ig1.sh (marker without PClint output) is
+        failed, the watch ends when the lint run is finished (marker of the run):
+        the makefiles without marker then are failed too.
+        Yields (in the order of completion) a tuple for every makefile:
+        (makefile, partial_results, error), see process_makefile_job.
+    """
+    outputs = []
+    for makefile in makefiles:
+        lres_path = get_makefile_paths(gres_path_arg, working_dir_arg, makefile)[1]
+        outputs.append((makefile, os.path.join(lres_path, PCLP_OUT_FILE),\
+                        os.path.join(lres_path, PCLP_DONE_FILE)))
+    settle = None
+    if "watch-settle" in options_arg:
+        settle = float(options_arg["watch-settle"] or watch.WATCH_SETTLE)
+    watcher = watch.OutputWatcher(outputs, settle, os.path.join(gres_path_arg, LINT_DONE_FILE))
+    output_files = {makefile : (pclp_out_filename, done_filename)\
+                    for makefile, pclp_out_filename, done_filename in outputs}
+    interval = float(options_arg["watch"] or watch.WATCH_INTERVAL)
+
+    pclp_msg = pclp_messages.PclpMessages()
+    err_str = pclp_msg.load("pclp_msg_list.txt")
+    if err_str:
+        error_exit("Error PClint messages", err_str)
+
+    # Running results (all processed makefiles, in the order of completion)
+    running_proc = new_processor(options_arg, manifest)
+    processed_cnt = 0
+    errors_cnt = 0
+    # Issues of the last charts and time of the last charts
+    charts_issues = {}
+    charts_time = None
+    while not watcher.is_done():
+        completed = watcher.poll()
+        # The makefiles failed or skipped by ig1.sh (no PClint output)
+        unfinished = {}
+        for makefile in completed:
+            status = watch.get_status(*output_files[makefile])
+            if status is not None:
+                unfinished[makefile] = "Not analyzed by ig1.sh: " + status
+        if watcher.stopped and watcher.pending:
+            print("Watch: lint run finished,", len(watcher.pending), "makefiles without PClint output:")
+            for makefile in watcher.pending:
+                print("    " + makefile)
+                unfinished[makefile] = "Not analyzed by ig1.sh: the lint run finished without it"
+        completed = [makefile for makefile in completed if makefile not in unfinished]
+
+        if completed or unfinished:
+            for makefile, status in unfinished.items():
+                errors_cnt += 1
+                processed_cnt += 1
+                yield (makefile, None, status)
+            for makefile_res in process_makefiles(gres_path_arg, working_dir_arg, completed,\
+                    module_ignore_list, options_arg, manifest, jobs) if completed else []:
+                if makefile_res[2]:
+                    errors_cnt += 1
+                else:
+                    running_proc.merge_state(makefile_res[1])
+                processed_cnt += 1
+                yield makefile_res
+
+            with open(os.path.join(gres_path_arg, watch.WATCH_SUMMARY_FILE), "w",\
+                      encoding='UTF-8') as summary_output:
+                watch.dump_summary(running_proc, processed_cnt, len(makefiles), pclp_msg,\
+                                   summary_output)
+                if errors_cnt:
+                    print("Failed makefiles:", errors_cnt, file = summary_output)
+            if running_proc.results_issues != charts_issues and \
+                    "charts" in get_report_stages(options_arg) and \
+                    (charts_time is None or time.time() - charts_time >= watch.WATCH_CHARTS_INTERVAL):
+                generate_plot_data(pclp_msg, running_proc)
+                charts_issues = {issue_nr : list(issue_cnt_list)\
+                                 for issue_nr, issue_cnt_list in running_proc.results_issues.items()}
+                charts_time = time.time()
+            print("Watch:", processed_cnt, "of", len(makefiles), "makefiles processed,",\
+                  errors_cnt, "failed")
+
+        if not watcher.is_done():
+            time.sleep(interval)
+
+#-------------------------------------------------------------------------------
+def report_errors(makefile_errors):
+    """ Print the makefiles failed and their errors """
+    for err_makefile, err_text in makefile_errors:
+        print("Error processing makefile:", err_makefile, file = sys.stderr)
+        print(err_text, file = sys.stderr)
+
+#-------------------------------------------------------------------------------
+def write_results(proc, gres_path_arg, working_dir_arg, script_path_arg, options_arg,\
+                  sample = None, record = True):
+    """ Write the results of all makefiles (merged in proc): the global results file,
+        the per-function results and the report stages selected (--report, --no-charts):
+        the precision of every issue, the run history and the result charts.
+        sample - the sample of test cases processed (--sample), if not None the
+            estimates for the full corpus are written, the run is not recorded
+            in the run history
+        record - if False (incomplete run), the run is not recorded in the run history
+    """
+    stages = get_report_stages(options_arg)
+    gres_filename = os.path.join(gres_path_arg, GRES_OUT_FILE)
+    with tracing.span("dump_results"), open(gres_filename, "a", encoding='UTF-8') as res_output:
+        proc.dump_results(res_output)
+
+    # Top functions for every issue: all functions and "good" functions (False-Positive)
+    if proc.function_results:
+        top_cnt = int(options_arg["functions"] or 10)
+        with open(os.path.join(gres_path_arg, FUNC_OUT_FILE), "w", encoding='UTF-8') as func_output:
+            print("Top functions for every issue:", file = func_output)
+            proc.function_results.dump_top(func_output, top_cnt)
+            print("Top good-functions (false-positive) for every issue:", file = func_output)
+            proc.function_results.dump_top(func_output, top_cnt, "good")
+
+    # Append the results of this run to the run history
+    if record and not sample and "history" in stages:
+        args_file = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(script_path_arg))),\
+                                 PCLP_ARGS_FILE)
+        with tracing.span("history"):
+            history = run_history.RunHistory(os.path.join(working_dir_arg, HISTORY_FOLDER))
+            run_rec = history.append_run(proc, run_history.file_hash(args_file),\
+                                         history.get_pclp_version())
+        print("Run recorded in history:", run_rec.run_id)
+
+    # Load PClint messages
+    pclp_msg = pclp_messages.PclpMessages()
+    err_str = pclp_msg.load("pclp_msg_list.txt")
+    if err_str:
+        error_exit("Error PClint messages", err_str)
+
+    # Bootstrap confidence intervals for the precision of every message
+    # (in streaming mode the per-module results are not kept, the CWEs are resampled)
+    prec_intervals = None
+    if "precision" in stages:
+        import precision_stats
+        with tracing.span("precision"):
+            if proc.results_sink is not None:
+                prec_intervals = precision_stats.bootstrap_precision(proc.results_cwe)
+            else:
+                prec_intervals = precision_stats.bootstrap_precision(proc.results_modules)
+        with open(gres_filename, "a", encoding='UTF-8') as res_output:
+            if proc.results_sink is not None:
+                print("Streaming mode: confidence intervals by resampling CWEs (not modules)",\
+                      file = res_output)
+            precision_stats.dump_precision(prec_intervals, pclp_msg, res_output)
+
+    # Sample: estimates of the results of the full corpus
+    if sample:
+        with open(gres_filename, "a", encoding='UTF-8') as res_output:
+            sampling.dump_estimates(sampling.estimate(proc.results_modules, sample),\
+                                    sample, pclp_msg, res_output)
+
+    # Generate pie result images
+    #print("Generating result charts")
+    if "charts" in stages:
+        with tracing.span("charts"):
+            generate_plot_data(pclp_msg, proc, prec_intervals)
+
+#-------------------------------------------------------------------------------
+def generate_plot_data(pclp_m, proc, intervals = None):
     """ Generate pie-charts. Every pie-chart is a tuple:
             (pie_title, slices_data_dict, slices_colors_dict)
         Where:
@@ -160,7 +662,11 @@ def generate_plot_data(pclp_m, proc):
                 {slice1_name : slice1_val, slice2_name : slice2_val2, ... }
             slices_colors_dict - a dictionary containing the color for every slice:
                 {slice1_name : slice1_color, slice2_name : slice2_color, ...}
+        intervals - the precision and its confidence interval for every issue
+            (as generated by precision_stats.bootstrap_precision), if not None
+            a bar-chart with the precision of the most frequent issues is generated
     """
+    generate_pie, generate_bars = import_chart_modules()
 
     #---------------------------------------------------------------------------
     # Category results
@@ -191,7 +697,7 @@ def generate_plot_data(pclp_m, proc):
     issues_dict0 = {}
     for issue_nr, issue_cnt_list in proc.results_issues.items():
         #print(issue_nr, ":", issue_cnt_list)
-        issues_dict0[pclp_m.get_message_name(issue_nr)] = issue_cnt_list[3]
+        issues_dict0[pclp_m.get_message_name(issue_nr) or str(issue_nr)] = issue_cnt_list[3]
 
     issues_colors0 = generate_issues_colors(issues_dict0, \
         [cfp_list_r, ctp_list_g, cfp_list_y, ctp_list_t, cfp_list_p, ctp_list_b])
@@ -204,7 +710,7 @@ def generate_plot_data(pclp_m, proc):
     #---------------------------------------------------------------------------
     issues_dict1 = {}
     for issue_nr, issue_cnt_list in proc.results_issues.items():
-        issues_dict1[pclp_m.get_message_name(issue_nr)] = issue_cnt_list[1]
+        issues_dict1[pclp_m.get_message_name(issue_nr) or str(issue_nr)] = issue_cnt_list[1]
 
     issues_colors1 = generate_issues_colors(issues_dict1, [cfp_list_r, cfp_list_y, cfp_list_p])
     issues_colors1["others"] = "sandybrown"
@@ -216,7 +722,7 @@ def generate_plot_data(pclp_m, proc):
     #---------------------------------------------------------------------------
     issues_dict2 = {}
     for issue_nr, issue_cnt_list in proc.results_issues.items():
-        issues_dict2[pclp_m.get_message_name(issue_nr)] = issue_cnt_list[0]
+        issues_dict2[pclp_m.get_message_name(issue_nr) or str(issue_nr)] = issue_cnt_list[0]
 
     issues_colors2 = generate_issues_colors(issues_dict2, [ctp_list_g, ctp_list_t, ctp_list_b])
     issues_colors2["others"] = "sandybrown"
@@ -241,13 +747,24 @@ def generate_plot_data(pclp_m, proc):
     kwargs["bar2_color"] = issues_colors1
     generate_bars.gen_bars(issues_dict2, issues_dict1, **kwargs)
 
+    #---------------------------------------------------------------------------
+    # Precision (and confidence interval) of the most frequent issues
+    #---------------------------------------------------------------------------
+    if intervals:
+        prec_issues = sorted(intervals, reverse = True,\
+            key = lambda issue_nr: proc.results_issues[issue_nr][0] + proc.results_issues[issue_nr][1])
+        prec_dict = {pclp_m.get_message_name(issue_nr) or str(issue_nr) : intervals[issue_nr]\
+                     for issue_nr in prec_issues[:kwargs["limit_cnt"]]}
+        generate_bars.gen_precision_bars(prec_dict, bar_color = issues_colors0,\
+            title = "precision (true-positive ratio)", filename = "out_bar3.jpg")
+
 #-------------------------------------------------------------------------------
 if __name__ == '__main__':
 
     # Expect 1 mandatory argument: working_dir - working directory,
     # and 1 optional: file_ignore_list:
-    # <--- 0 --->|<---- 1 ---->|<------ 2 ------->
-    # reduced.py  <working_dir> <file_ignore_list>
+    # <--- 0 --->|<---- 1 ---->|<------ 2 ------->|<-- options -->
+    # reduced.py  <working_dir> <file_ignore_list>  [--option=value ...]
     #
     # Working directory: directory containing all files/subdirectories to be analyzed:
     #
@@ -278,11 +795,104 @@ if __name__ == '__main__':
     # Example:
     # C:/pclp_juliet_a/test/testcases/CWE561_Dead_Code/CWE561_Dead_Code__return_before_code_01.c
     # ./testcases/CWE561_Dead_Code/CWE561_Dead_Code__return_before_code_01.c
+    #
+    # Options:
+    # --manifest=<manifest.xml> - Juliet manifest, label every issue based on the
+    #       distance to the flaw lines (exact, near, off-target)
+    # --flaw-tolerance=<N> - issues within +/- N lines of a flaw line are "near"
+    # --functions=<N> - record the results per function and write the top N
+    #       functions for every issue to the per-function results file
+    # --jobs=<N> - process the makefiles in parallel, in a pool of N processes
+    # --incremental - process only the makefiles changed since the previous run
+    #       (PClint output, referenced C sources, ignore list or options changed),
+    #       the cached partial results are used for the unchanged makefiles
+    # --checkpoint=<seconds> - interval between two checkpoints (default 60s),
+    #       a checkpoint stores the count of processed makefiles and the results
+    # --resume - continue the run from the last checkpoint
+    # --prefetch=<N> - read the PClint outputs and C sources of the next N makefiles
+    #       (default 4) while the current makefile is processed (serial mode only)
+    # --prefetch-mb=<MB> - limit of the prefetched, not yet processed data (default 64MB)
+    # --stream - streaming mode (bounded memory): the results of every module are
+    #       written to the global results file as soon as the module is processed
+    #       and released, only the aggregated results are kept (serial mode only,
+    #       without checkpoints)
+    # --sample=<fraction> - process only a stratified random sample of the test cases
+    #       (default 5% of the test cases of every CWE) and estimate the results of
+    #       the full corpus, the sample created by ig1.sh (SAMPLE=<fraction>) is used
+    #       if it exists and --sample has no value
+    # --seed=<N> - seed of the random sample (default 1)
+    # --shard=<i/N> - process only the shard i of N (the makefiles are partitioned
+    #       by the size of their C sources) and write the partial results to the
+    #       shard artifact ig_shard_<i>of<N>.json, combined later by merge_shards.py
+    # --shard-weight=<bytes|count> - weight of a makefile: size (default) or count
+    #       of its C sources
+    # --watch=<seconds> - watch mode: while ig1.sh is running, poll (default every 10s)
+    #       the PClint outputs, process every completed output once (the marker
+    #       ig_pclint_done.txt written by lint_orchestrator.py exists) and refresh the
+    #       summary (ig_watch_summary.txt) and the charts (at most every 60s), the
+    #       global results are written when all outputs were processed (or the watch
+    #       is interrupted)
+    # --watch-settle[=<seconds>] - a PClint output without marker (written by another
+    #       tool) is also completed when it didn't change for the given time (default 30s)
+    # --report=<stage,...> - report stages: precision, history, charts (default all),
+    #       the global results file (and the per-function results) are always written
+    # --no-charts - don't generate the result charts (matplotlib is not loaded)
+    # --trace[=<file>] - record the duration of the stages, makefiles and modules
+    #       and the counters (files parsed, bytes scanned, issues classified, cache
+    #       hits), print the summary and write the Chrome trace (trace_event JSON,
+    #       default ig_trace.json in the global results folder)
+    # --profile=<cpu|mem|both> - profile the stages: interpret (PClint outputs), parse
+    #       (C modules), aggregate (merge of the results), report (results files and
+    #       charts), print the top functions and allocations of every stage and write
+    #       the profiles to the global results folder (serial mode only)
+    # --progress - show the live progress instead of the paths of every makefile:
+    #       makefiles, modules, issues and bytes per second, ETA (weighted by the size
+    #       of the C sources) and worker utilization (--jobs), refreshed in place on a
+    #       terminal, otherwise a progress line every 30s
+
+    argv_list, options = parse_options(sys.argv)
+
+    if get_report_stages(options) is None:
+        error_exit("Error: invalid --report, expected stages: " + ",".join(REPORT_STAGES))
+    if options.get("flaw-tolerance") and not options["flaw-tolerance"].isdecimal():
+        error_exit("Error: invalid --flaw-tolerance: " + options["flaw-tolerance"],\
+                   "Usage: --flaw-tolerance=<N> (N - count of lines >= 0, default " + \
+                   str(FLAW_TOLERANCE) + ")")
+    if options.get("functions") and not (options["functions"].isdecimal() and int(options["functions"]) > 0):
+        error_exit("Error: invalid --functions: " + options["functions"],\
+                   "Usage: --functions=<N> (N - count of top functions > 0, default 10)")
+    if "jobs" in options and not ((options["jobs"] or "").isdecimal() and int(options["jobs"]) > 0):
+        error_exit("Error: invalid --jobs: " + (options["jobs"] or ""),\
+                   "Usage: --jobs=<N> (N - count of worker processes > 0)")
+    if options.get("checkpoint") and not (get_number(options["checkpoint"]) or 0) > 0:
+        error_exit("Error: invalid --checkpoint: " + options["checkpoint"],\
+                   "Usage: --checkpoint=<seconds> (seconds > 0, default " + \
+                   str(checkpoint.CHECKPOINT_INTERVAL) + ")")
+    for option in ("prefetch", "prefetch-mb"):
+        if options.get(option) and not (options[option].isdecimal() and int(options[option]) > 0):
+            error_exit("Error: invalid --" + option + ": " + options[option],\
+                       "Usage: --prefetch=<N> (N - count of makefiles > 0, default 4), " + \
+                       "--prefetch-mb=<MB> (MB > 0, default 64)")
+    if options.get("sample") and not 0 < (get_number(options["sample"]) or 0) <= 1:
+        error_exit("Error: invalid --sample: " + options["sample"],\
+                   "Usage: --sample=<fraction> (0 < fraction <= 1, default " + \
+                   str(sampling.SAMPLE_FRACTION) + ")")
+    if options.get("seed") and not options["seed"].isdecimal():
+        error_exit("Error: invalid --seed: " + options["seed"],\
+                   "Usage: --seed=<N> (N - integer >= 0, default " + str(sampling.SAMPLE_SEED) + ")")
+    if "profile" in options:
+        options["profile"] = options["profile"] or "cpu"
+        if options["profile"] not in profiling.PROFILE_MODES:
+            error_exit("Error: invalid --profile, expected: " + "|".join(profiling.PROFILE_MODES))
+        if int(options.get("jobs") or 1) > 1:
+            error_exit("Error: --profile not supported with --jobs (the workers are not profiled)")
+    if "progress" in options and "watch" in options:
+        error_exit("Error: --progress not supported with --watch")
 
-    if len(sys.argv) >= 2:
+    if len(argv_list) >= 2:
 
-        script_path = sys.argv[0]
-        working_dir = sys.argv[1]
+        script_path = argv_list[0]
+        working_dir = argv_list[1]
 
         # Global results path
         gres_path = os.path.join(working_dir, GRES_FOLDER)
@@ -291,6 +901,15 @@ if __name__ == '__main__':
         if not os.path.isdir(gres_path):
             error_exit("Error: global results directory not found:", gres_path)
 
+        # Tracing: the workers (--jobs) get the absolute trace file name in options
+        if "trace" in options:
+            options["trace"] = os.path.abspath(options["trace"] or os.path.join(gres_path, TRACE_FILE))
+            tracing.tracer.enable()
+            # Part files of an interrupted run
+            tracing.tracer.load_parts(options["trace"])
+        if "profile" in options:
+            profiling.profiler.start(options["profile"])
+
         # Delete old global results file if exists
         gres_filename = os.path.join(gres_path, GRES_OUT_FILE)
         if os.path.isfile(gres_filename):
@@ -303,37 +922,181 @@ if __name__ == '__main__':
 
         # Load list of modules to be ignored
         ignore_modules = ignore_list.IgnoreModuleList()
-        if len(sys.argv) >= 3:
-            if not ignore_modules.load(sys.argv[2], working_dir):
-                error_exit("Error: cannot open list of modules to be ignored:", sys.argv[2])
+        if len(argv_list) >= 3:
+            with tracing.span("ignore_list"):
+                ignore_loaded = ignore_modules.load(argv_list[2], working_dir)
+            if not ignore_loaded:
+                error_exit("Error: cannot open list of modules to be ignored:", argv_list[2])
 
             print("Module ignore list:")
             print("\n".join(ignore_modules.ignore_list))
 
-        pr = processor.Processor()
+        # Load the Juliet manifest (ground truth: flaw lines)
+        with tracing.span("manifest"):
+            pr_manifest = load_manifest(options)
+        if pr_manifest:
+            print("Juliet manifest:", pr_manifest.flaws_cnt, "flaws loaded")
+
+        pr = new_processor(options, pr_manifest)
 
-        # For every makefile in the file containing the names of all found makefiles:
+        # The list of all found makefiles
         with open(makefiles_file, encoding='UTF-8') as file:
-            for line in file:
-                process_makefile_line(pr, gres_path, working_dir, line.strip(),\
-                                      ignore_modules.ignore_list)
+            makefiles_list = [line.strip() for line in file if line.strip()]
+        module_ignore = ignore_modules.ignore_list
+        # Inventory of the C sources of every makefile (written by discovery.py)
+        with tracing.span("inventory"):
+            inventory = discovery.load_inventory(gres_path)
+
+        # Sample mode: process only the makefiles and modules of the sample
+        pr_sample = None
+        if "sample" in options:
+            if "stream" in options:
+                error_exit("Error: --sample not supported with --stream")
+            pr_sample = load_sample(gres_path, makefiles_list, options, inventory)
+            module_ignore = set(module_ignore) | sampling.get_excluded_modules(makefiles_list,\
+                                                                               pr_sample, inventory)
+            makefiles_list = pr_sample["makefiles"]
+            print("Sample:", sum(len(cases) for cases in pr_sample["cases"].values()), "test cases,",\
+                  len(makefiles_list), "makefiles")
+
+        run_key = checkpoint.get_run_key(makefiles_list, module_ignore, get_config_text(options))
+
+        # Shard mode: process only the makefiles of the shard, keep the partial
+        # results of every makefile (merged later, in the order of all makefiles)
+        shard_arg = None
+        run_checkpoint = None
+        watch_states = None
+        run_complete = True
+        if "stream" in options:
+            for option in ("jobs", "prefetch", "incremental", "shard", "resume", "watch"):
+                if option in options:
+                    error_exit("Error: --" + option + " not supported with --stream")
+            pr.set_results_sink(open(gres_filename, "w", encoding='UTF-8'))
+        elif "shard" in options:
+            shard_arg = shard.parse_shard(options["shard"])
+            if not shard_arg:
+                error_exit("Error: invalid shard (expected --shard=i/N):", options["shard"])
+            if "watch" in options:
+                error_exit("Error: --watch not supported with --shard")
+            if "resume" in options:
+                error_exit("Error: --resume not supported with --shard,",\
+                           "use --incremental to skip the processed makefiles")
+            makefile_index = {makefile : idx for idx, makefile in enumerate(makefiles_list)}
+            makefiles_list = shard.select_shard(makefiles_list, shard_arg[0], shard_arg[1],\
+                options.get("shard-weight") or shard.WEIGHT_BYTES, inventory)
+            shard_results = []
+            print("Shard", options["shard"] + ":", len(makefiles_list), "makefiles")
+        elif "watch" in options:
+            # The makefiles are processed in the order of completion, the results
+            # are merged at the end in the order of the makefiles (no checkpoints)
+            if "resume" in options:
+                error_exit("Error: --resume not supported with --watch")
+            watch_states = {}
+        else:
+            # Checkpoints: resume from the last checkpoint (skip the processed makefiles)
+            run_checkpoint = checkpoint.Checkpoint(gres_path, run_key,\
+                float(options.get("checkpoint") or checkpoint.CHECKPOINT_INTERVAL))
+        makefiles_cursor = 0
+        if "resume" in options:
+            ck_res = run_checkpoint.load()
+            if ck_res:
+                makefiles_cursor = ck_res[0]
+                pr.merge_state(ck_res[1])
+                print("Resume from checkpoint:", makefiles_cursor, "makefiles already processed")
+            else:
+                print("No checkpoint found, start from the beginning")
+
+        # For every makefile in the file containing the names of all found makefiles
+        # (serial or, with --jobs, in parallel), merge the results in the order of makefiles
+        jobs_cnt = int(options.get("jobs") or 1)
+        makefile_errors = []
+        run_progress = None
+        if "progress" in options:
+            run_progress = progress.Progress("reduce", makefiles_list[makefiles_cursor:],\
+                {makefile : sum(sources.values()) for makefile, sources in (inventory or {}).items()},\
+                jobs_cnt)
+            run_progress.start()
+        if pr.results_sink is not None:
+            makefiles_results = process_makefiles_stream(pr, gres_path, working_dir,\
+                makefiles_list, module_ignore, run_progress is not None)
+        elif watch_states is not None:
+            makefiles_results = watch_makefiles(gres_path, working_dir, makefiles_list,\
+                module_ignore, options, pr_manifest, jobs_cnt)
+        else:
+            makefiles_results = process_makefiles(gres_path, working_dir,\
+                makefiles_list[makefiles_cursor:], module_ignore, options,\
+                pr_manifest, jobs_cnt, run_progress)
+        try:
+            for res_makefile, res_state, res_error in makefiles_results:
+                if run_progress:
+                    update_progress(run_progress, pr, gres_path, working_dir, res_makefile,\
+                                    res_state, inventory)
+                if res_error:
+                    makefile_errors.append((res_makefile, res_error))
+                    if jobs_cnt <= 1 and watch_states is None:
+                        break
+                elif watch_states is not None:
+                    watch_states[res_makefile] = res_state
+                elif shard_arg:
+                    shard_results.append([makefile_index[res_makefile], res_makefile, res_state])
+                elif not makefile_errors:
+                    if res_state:
+                        with tracing.span("merge"), profiling.stage("aggregate"):
+                            pr.merge_state(res_state)
+                    makefiles_cursor += 1
+                    if run_checkpoint:
+                        run_checkpoint.update(makefiles_cursor, pr)
+        except KeyboardInterrupt:
+            if watch_states is None:
+                if run_checkpoint:
+                    run_checkpoint.update(makefiles_cursor, pr, force = True)
+                error_exit("Interrupted, " + str(makefiles_cursor) + " makefiles processed")
+            # Watch mode: write the results of the makefiles processed until now
+            # (not recorded in the run history)
+            print("Watch interrupted,", len(watch_states), "makefiles processed")
+            run_complete = False
+        finally:
+            if run_progress:
+                run_progress.stop()
 
-        res_output = open(gres_filename, "a", encoding='UTF-8') if gres_filename else sys.stdout
-        pr.dump_results(res_output)
-        if res_output and res_output != sys.stdout:
-            res_output.close()
+        if watch_states is not None:
+            # Merge in the order of the makefiles (same results as a serial run)
+            for makefile in makefiles_list:
+                if watch_states.get(makefile):
+                    pr.merge_state(watch_states[makefile])
+        elif makefile_errors:
+            # Keep the progress: the run can be continued with --resume
+            if run_checkpoint:
+                run_checkpoint.update(makefiles_cursor, pr, force = True)
+            report_errors(makefile_errors)
+            error_exit("Error: " + str(len(makefile_errors)) + " makefile(s) failed")
 
-        # Load PClint messages
-        pclp_msg = pclp_messages.PclpMessages()
-        err_str = pclp_msg.load("pclp_msg_list.txt")
-        if err_str:
-            error_exit("Error PClint messages", err_str)
+        if shard_arg:
+            # The global results are written by merge_shards.py (all shards merged)
+            shard_filename = shard.get_shard_filename(gres_path, shard_arg[0], shard_arg[1])
+            shard.save_artifact(shard_filename, shard_arg[0], shard_arg[1], run_key, options,\
+                                shard_results)
+            print("Shard artifact:", shard_filename)
+        else:
+            if run_checkpoint:
+                run_checkpoint.remove()
+            if pr.results_sink is not None:
+                pr.results_sink.close()
+            with profiling.stage("report"):
+                write_results(pr, gres_path, working_dir, script_path, options, pr_sample,\
+                              run_complete)
+            if makefile_errors:
+                # Watch mode: the results of the failed makefiles are missing
+                report_errors(makefile_errors)
+                error_exit("Error: " + str(len(makefile_errors)) + " makefile(s) failed")
 
-        # Generate pie result images
-        #print("Generating result charts")
-        generate_plot_data(pclp_msg, pr)
+        if tracing.enabled():
+            tracing.dump_summary(tracing.tracer.export(options["trace"]), sys.stdout)
+            print("Trace:", options["trace"])
+        profiling.profiler.finish(gres_path, sys.stdout)
 
     else:
         print("Incorrect invocation.", file = sys.stderr)
-        print("Usage: reduced.py <working dir>", file = sys.stderr)
+        print("Usage: reduced.py <working dir> [file_ignore_list] [--option=value ...]",\
+              file = sys.stderr)
         sys.exit(1)
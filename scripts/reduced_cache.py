@@ -0,0 +1,77 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" reduced_cache - per-makefile cache of the partial results, used by the
+    incremental mode of reduced.py to skip the unchanged makefiles.
+"""
+import hashlib
+import os
+
+import results_state
+
+# Cache file (in the local results folder of every makefile)
+CACHE_FILE = "ig_reduced_cache.json"
+
+#-------------------------------------------------------------------------------
+def get_fingerprint(pclp_out_filename, module_ignore_list, config_text):
+    """ Return the fingerprint of a makefile: a hash of the PClint output file
+        content, of the list of modules to be ignored and of the configuration
+        (options that change the results).
+    """
+    fingerprint = hashlib.sha1()
+    with open(pclp_out_filename, "rb") as file:
+        fingerprint.update(file.read())
+    fingerprint.update("\n".join(sorted(module_ignore_list or [])).encode('UTF-8'))
+    fingerprint.update(config_text.encode('UTF-8'))
+    return fingerprint.hexdigest()
+
+#-------------------------------------------------------------------------------
+def get_sources_stat(sources):
+    """ Return the size and modification time of every C source:
+        {source1 : [size, mtime_ns], source2 : [size, mtime_ns], ... }
+        The value is None for a source which doesn't exist (anymore).
+    """
+    sources_stat = {}
+    for source in sources:
+        try:
+            stat = os.stat(source)
+            sources_stat[source] = [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            sources_stat[source] = None
+    return sources_stat
+
+#-------------------------------------------------------------------------------
+def load_cached_state(lres_path, fingerprint):
+    """ Load the cached partial results of a makefile.
+        Returns the results state or None if there is no cache, or the makefile
+        changed: fingerprint different or any C source referenced changed.
+    """
+    cache = results_state.load(os.path.join(lres_path, CACHE_FILE))
+    if not cache or cache.get("fingerprint") != fingerprint:
+        return None
+    sources_stat = cache["sources"]
+    if get_sources_stat(sources_stat.keys()) != sources_stat:
+        return None
+    return results_state.restore_state(cache["state"])
+
+#-------------------------------------------------------------------------------
+def save_cached_state(lres_path, fingerprint, sources, state):
+    """ Store the partial results of a makefile together with its fingerprint
+        and the C sources referenced (parsed) while processing the makefile.
+    """
+    cache = {"fingerprint" : fingerprint,
+             "sources" : get_sources_stat(sources),
+             "state" : state}
+    results_state.save(os.path.join(lres_path, CACHE_FILE), cache)
@@ -0,0 +1,62 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" results_state - stores (to JSON files) and loads the results state of the
+    Processor (Processor.get_state), used for the cached/partial results.
+"""
+import json
+import os
+
+#-------------------------------------------------------------------------------
+def save(filename, data):
+    """ Write data (a dictionary containing a results state) to a JSON file.
+        The file is written atomically: a temporary file is written first and
+        renamed at the end, an interrupted write never leaves a partial file.
+    """
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "w", encoding='UTF-8') as file:
+        json.dump(data, file, separators = (',', ':'))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_filename, filename)
+
+#-------------------------------------------------------------------------------
+def load(filename):
+    """ Load data from a JSON file written by save.
+        Returns None if the file doesn't exist or cannot be decoded.
+    """
+    if not os.path.isfile(filename):
+        return None
+    try:
+        with open(filename, encoding='UTF-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+#-------------------------------------------------------------------------------
+def restore_state(state):
+    """ Restore a results state loaded from JSON: the JSON keys are strings,
+        the issue numbers (keys) are converted back to integers and the
+        per-module results back to tuples of 3 dictionaries.
+    """
+    return {
+        "modules" : {module_name : tuple({int(issue_nr) : cnt for issue_nr, cnt in res.items()}
+                                         for res in module_res)
+                     for module_name, module_res in state["modules"].items()},
+        "issues" : {int(issue_nr) : cnt_list for issue_nr, cnt_list in state["issues"].items()},
+        "all" : state["all"],
+        "flaws" : {int(issue_nr) : cnt_list for issue_nr, cnt_list in state["flaws"].items()},
+        "functions" : state["functions"]
+    }
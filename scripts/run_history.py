@@ -0,0 +1,320 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" run_history - append-only store holding the results of all processing runs,
+    used for trend analysis (how the results changed from run to run).
+"""
+import array
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+from juliet_cwe import get_cwe_number
+
+# Name of the file containing one line (record) per run
+RUNS_FILE = "runs.txt"
+
+# Column files for the per-message totals and for the per-CWE rollups
+MSG_COLUMNS = ("msg_nr", "msg_tp", "msg_fp", "msg_other")
+CWE_COLUMNS = ("cwe_nr", "cwe_tp", "cwe_fp", "cwe_other")
+
+# Every column is stored as an array of signed 32-bit integers
+COLUMN_TYPE = 'i'
+COLUMN_ITEM_SIZE = array.array(COLUMN_TYPE).itemsize
+
+# Name of the PClint command (used to detect PClint version)
+PCLP_NAME = "pclp64_linux"
+# Name of the file caching the PClint version (one line, tab separated):
+# <PClint executable> <size> <modification time (ns)> <version>
+PCLP_VERSION_FILE = "pclp_version.txt"
+
+#-------------------------------------------------------------------------------
+def file_hash(filename):
+    """ Return a short sha1 hash of the file content,
+        or "none" if the file doesn't exist.
+    """
+    if not filename or not os.path.isfile(filename):
+        return "none"
+    with open(filename, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()[:16]
+
+#-------------------------------------------------------------------------------
+def get_pclp_version(pclp_name = PCLP_NAME):
+    """ Invoke PClint (without arguments) and extract the version from the banner,
+        Example: "PC-lint Plus 2.2 for Linux, Copyright Vector ..." returns "2.2".
+        Returns "unknown" if PClint is not found or the version cannot be detected.
+    """
+    pclp_exe = shutil.which(pclp_name)
+    if not pclp_exe:
+        return "unknown"
+    try:
+        res = subprocess.run([pclp_exe], capture_output = True, text = True,
+                             timeout = 30, check = False)
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+    match = re.search(r"PC-lint Plus\s+(\S+)", res.stdout + res.stderr)
+    if match:
+        return match.group(1).rstrip(",")
+    return "unknown"
+
+#-------------------------------------------------------------------------------
+def get_cwe_rollups(results_modules):
+    """ Sum-up the per-module results (Processor.results_modules) per CWE.
+        Returns a dictionary: {cwe_nr : [count_bad, count_good, count_other], ...}
+    """
+    cwe_dict = {}
+    for module_name, module_res in results_modules.items():
+        cwe_res = cwe_dict.setdefault(get_cwe_number(module_name), [0, 0, 0])
+        for idx in range(3):
+            cwe_res[idx] += sum(module_res[idx].values())
+    return cwe_dict
+
+#-------------------------------------------------------------------------------
+class RunRecord:
+    """ One record (line) from the runs file:
+        run_id : run identifier (sequential number, first run is 1)
+        timestamp : time when the run was recorded (seconds since epoch)
+        args_hash : hash of the args.lnt file used by PClint
+        pclp_version : PClint version
+        msg_start, msg_count : the rows of this run in the message columns
+        cwe_start, cwe_count : the rows of this run in the CWE columns
+    """
+
+    def __init__(self, values):
+        self.run_id = int(values[0])
+        self.timestamp = int(values[1])
+        self.args_hash = values[2]
+        self.pclp_version = values[3]
+        self.msg_start = int(values[4])
+        self.msg_count = int(values[5])
+        self.cwe_start = int(values[6])
+        self.cwe_count = int(values[7])
+
+    def __str__(self):
+        """ String representation of a run record (as stored in the runs file)
+        """
+        return "\t".join(str(val) for val in (self.run_id, self.timestamp,
+            self.args_hash, self.pclp_version, self.msg_start, self.msg_count,
+            self.cwe_start, self.cwe_count))
+
+#-------------------------------------------------------------------------------
+class RunHistory:
+    """ RunHistory - append-only, columnar store of the results of all runs.
+
+        The history folder contains:
+            runs.txt - one line (RunRecord) per run: the run key (run_id, timestamp,
+                       args.lnt hash, PClint version) and the rows of the run in the
+                       column files
+            msg_nr.bin, msg_tp.bin, msg_fp.bin, msg_other.bin - per-message totals,
+                       one row per (run, message)
+            cwe_nr.bin, cwe_tp.bin, cwe_fp.bin, cwe_other.bin - per-CWE rollups,
+                       one row per (run, CWE)
+
+        Every column file is a flat array of 32-bit integers. The rows of a run are
+        contiguous, so a query reads only the columns it needs and only the rows
+        of the requested runs (the per-module results are never stored/reloaded).
+        The runs.txt line is written last: a run interrupted while appending leaves
+        unreferenced rows in the column files, which are truncated by the next append.
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self, history_path):
+        self.history_path = history_path
+
+    #---------------------------------------------------------------------------
+    def column_filename(self, column):
+        """ Return the full name of a column file """
+        return os.path.join(self.history_path, column + ".bin")
+
+    #---------------------------------------------------------------------------
+    def load_runs(self):
+        """ Load and return the list of all recorded runs (list of RunRecord) """
+        runs = []
+        runs_filename = os.path.join(self.history_path, RUNS_FILE)
+        if not os.path.isfile(runs_filename):
+            return runs
+        with open(runs_filename, encoding='UTF-8') as file:
+            for line in file:
+                values = line.rstrip("\n").split("\t")
+                if len(values) >= 8:
+                    runs.append(RunRecord(values))
+        return runs
+
+    #---------------------------------------------------------------------------
+    def read_column(self, column, row_start, row_count):
+        """ Read row_count values from a column file, starting with row_start """
+        values = array.array(COLUMN_TYPE)
+        if row_count <= 0:
+            return values
+        with open(self.column_filename(column), "rb") as file:
+            file.seek(row_start * COLUMN_ITEM_SIZE)
+            values.frombytes(file.read(row_count * COLUMN_ITEM_SIZE))
+        return values
+
+    #---------------------------------------------------------------------------
+    def append_columns(self, columns, rows_cnt, rows):
+        """ Append rows to a group of column files (all columns have rows_cnt rows
+            before appending, any unreferenced rows left after an interrupted append
+            are removed).
+        """
+        for col_idx, column in enumerate(columns):
+            col_filename = self.column_filename(column)
+            with open(col_filename, "ab") as file:
+                file.truncate(rows_cnt * COLUMN_ITEM_SIZE)
+                array.array(COLUMN_TYPE, [row[col_idx] for row in rows]).tofile(file)
+
+    #---------------------------------------------------------------------------
+    def get_pclp_version(self, pclp_name = PCLP_NAME):
+        """ Return the PClint version (get_pclp_version), cached in the history:
+            PClint is invoked only if its executable changed (path, size, time).
+        """
+        pclp_exe = shutil.which(pclp_name)
+        if not pclp_exe:
+            return "unknown"
+        try:
+            stat = os.stat(pclp_exe)
+        except OSError:
+            return "unknown"
+        signature = [pclp_exe, str(stat.st_size), str(stat.st_mtime_ns)]
+        cache_filename = os.path.join(self.history_path, PCLP_VERSION_FILE)
+        try:
+            with open(cache_filename, encoding='UTF-8') as file:
+                values = file.readline().rstrip("\n").split("\t")
+            if len(values) == 4 and values[:3] == signature:
+                return values[3]
+        except OSError:
+            pass
+        pclp_version = get_pclp_version(pclp_exe)
+        try:
+            os.makedirs(self.history_path, exist_ok = True)
+            with open(cache_filename, "w", encoding='UTF-8') as file:
+                print("\t".join(signature + [pclp_version]), file = file)
+        except OSError:
+            pass
+        return pclp_version
+
+    #---------------------------------------------------------------------------
+    def append_run(self, proc, args_hash, pclp_version):
+        """ Append the results of a run (Processor proc) to the history.
+            Returns the RunRecord of the appended run.
+        """
+        os.makedirs(self.history_path, exist_ok = True)
+        runs = self.load_runs()
+
+        run_id, msg_rows_cnt, cwe_rows_cnt = 1, 0, 0
+        if runs:
+            run_id = runs[-1].run_id + 1
+            msg_rows_cnt = runs[-1].msg_start + runs[-1].msg_count
+            cwe_rows_cnt = runs[-1].cwe_start + runs[-1].cwe_count
+
+        # Per-message totals: [msg_nr, count_bad, count_good, count_other]
+        msg_rows = [[issue_nr] + issue_cnt_list[:3]
+                    for issue_nr, issue_cnt_list in sorted(proc.results_issues.items())]
+
+        # Per-CWE rollups: [cwe_nr, count_bad, count_good, count_other]
+        # (in streaming mode the per-module results are already aggregated per CWE)
+        if proc.results_sink is not None:
+            cwe_rollups = {cwe_nr : [sum(cwe_res[idx].values()) for idx in range(3)]
+                           for cwe_nr, cwe_res in proc.results_cwe.items()}
+        else:
+            cwe_rollups = get_cwe_rollups(proc.results_modules)
+        cwe_rows = [[cwe_nr] + cwe_cnt_list for cwe_nr, cwe_cnt_list in
+                    sorted(cwe_rollups.items())]
+
+        self.append_columns(MSG_COLUMNS, msg_rows_cnt, msg_rows)
+        self.append_columns(CWE_COLUMNS, cwe_rows_cnt, cwe_rows)
+
+        record = RunRecord([run_id, int(time.time()), args_hash, pclp_version,
+                            msg_rows_cnt, len(msg_rows), cwe_rows_cnt, len(cwe_rows)])
+        with open(os.path.join(self.history_path, RUNS_FILE), "a", encoding='UTF-8') as file:
+            print(record, file = file)
+        return record
+
+    #---------------------------------------------------------------------------
+    def trend(self, key_nr, value_column = "msg_fp", last_cnt = 50):
+        """ Return the trend of a value over the last last_cnt runs, as a list of
+            tuples: [(run_record, value), ...]. The value is 0 if the message (CWE)
+            was not found in the run.
+            key_nr - message number (for "msg_..." columns) or CWE number
+                     (for "cwe_..." columns)
+            value_column - one of: msg_tp, msg_fp, msg_other, cwe_tp, cwe_fp, cwe_other
+        """
+        if value_column in MSG_COLUMNS[1:]:
+            key_column = MSG_COLUMNS[0]
+        elif value_column in CWE_COLUMNS[1:]:
+            key_column = CWE_COLUMNS[0]
+        else:
+            raise ValueError("Unknown column: " + value_column)
+
+        if last_cnt <= 0:
+            return []
+        runs = self.load_runs()[-last_cnt:]
+        if not runs:
+            return []
+
+        # The rows of the selected runs are contiguous: read them in one step
+        if key_column == MSG_COLUMNS[0]:
+            row_start = runs[0].msg_start
+            row_end = runs[-1].msg_start + runs[-1].msg_count
+        else:
+            row_start = runs[0].cwe_start
+            row_end = runs[-1].cwe_start + runs[-1].cwe_count
+        keys = self.read_column(key_column, row_start, row_end - row_start)
+        values = self.read_column(value_column, row_start, row_end - row_start)
+
+        result = []
+        for run in runs:
+            if key_column == MSG_COLUMNS[0]:
+                run_start, run_end = run.msg_start, run.msg_start + run.msg_count
+            else:
+                run_start, run_end = run.cwe_start, run.cwe_start + run.cwe_count
+            value = 0
+            for row in range(run_start - row_start, run_end - row_start):
+                if keys[row] == key_nr:
+                    value = values[row]
+                    break
+            result.append((run, value))
+        return result
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # <----- 0 ------>|<---- 1 ----->|<--- 2 -->|<---- 3 --->|<--- 4 -->|
+    # run_history.py   <history_dir>  [key_nr]   [column]     [last_cnt]
+    #
+    # Without key_nr: display all recorded runs
+    # With key_nr: display the trend of column (default msg_fp) for
+    #              the message/CWE key_nr over the last last_cnt (default 50) runs
+
+    if len(sys.argv) >= 2:
+
+        history = RunHistory(sys.argv[1])
+
+        if len(sys.argv) >= 3:
+            column_arg = sys.argv[3] if len(sys.argv) >= 4 else "msg_fp"
+            last_cnt_arg = int(sys.argv[4]) if len(sys.argv) >= 5 else 50
+            for run_rec, val in history.trend(int(sys.argv[2]), column_arg, last_cnt_arg):
+                print(f'{run_rec.run_id:5} ' + \
+                    time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run_rec.timestamp)) + \
+                    f' {run_rec.args_hash} {run_rec.pclp_version:>8} {val:8}')
+        else:
+            for run_rec in history.load_runs():
+                print(run_rec)
+    else:
+        print("Usage: python run_history.py <history_dir> [key_nr] [column] [last_cnt]")
@@ -0,0 +1,300 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" sampling - stratified random sample of the test cases (per CWE) used for a
+    fast approximate run, and the estimates of the per-message results scaled
+    to the full corpus (with confidence intervals).
+"""
+import math
+import os
+import random
+import re
+import sys
+
+import results_state
+import juliet_cwe
+import path_resolver
+import discovery
+
+# Sample file (in the global results folder)
+SAMPLE_FILE = "ig_sample.json"
+# Default sampling fraction and seed
+SAMPLE_FRACTION = 0.05
+SAMPLE_SEED = 1
+# z-value of the default (95%) confidence interval
+SAMPLE_Z = 1.96
+
+# Juliet test case of a source file, the files of a test case split in several
+# files have the same test case name, example:
+#   CWE121_Stack_Based_Buffer_Overflow__char_type_overrun_memcpy_01.c -> ..._01
+#   CWE123_Write_What_Where_Condition__connect_socket_51a.c -> ..._51
+#   CWE124_Buffer_Underwrite__malloc_char_cpy_84_goodG2B.cpp -> ..._84
+CASE_REGEX = re.compile(r"^(CWE\d+_.+?_\d+)[a-z]?(?:_\w+)?\.(?:c|cpp)$")
+
+#-------------------------------------------------------------------------------
+def get_cases(makefiles, inventory = None):
+    """ Find all test cases (source files in the directories of the makefiles)
+        grouped by CWE (stratum):
+        {cwe_nr : {case_key : [source1, source2, ...], ...}, ...}
+        where case_key is the path of the test case (directory and case name)
+        and the sources are absolute paths (as the modules in Processor results).
+        inventory - the inventory of the sources (discovery.py), if None (or a
+            makefile is not in the inventory) the directories are listed
+    """
+    strata = {}
+    for makefile in makefiles:
+        makefile_path = path_resolver.realpath(os.path.dirname(makefile))
+        if inventory and makefile in inventory:
+            names = list(inventory[makefile])
+        else:
+            try:
+                names = sorted(os.listdir(makefile_path))
+            except OSError:
+                continue
+        for name in names:
+            match = CASE_REGEX.match(name)
+            if not match:
+                continue
+            cases = strata.setdefault(juliet_cwe.get_cwe_number(name), {})
+            case_key = os.path.join(makefile_path, match.group(1))
+            cases.setdefault(case_key, []).append(os.path.join(makefile_path, name))
+    return strata
+
+#-------------------------------------------------------------------------------
+def create_sample(makefiles, fraction = SAMPLE_FRACTION, seed = SAMPLE_SEED, inventory = None):
+    """ Select a stratified random sample: in every CWE the fraction of the test
+        cases (at least one) is selected randomly, the selection depends only on
+        the list of makefiles, fraction and seed. Returns the sample:
+        {
+            "fraction" : fraction, "seed" : seed,
+            "population" : {cwe_nr : count of test cases, ...},
+            "cases" : {cwe_nr : {case_key : [sources], ...}, ...}  <-- selected cases
+            "makefiles" : [makefiles containing at least one selected case]
+        }
+    """
+    rng = random.Random(seed)
+    sample = {"fraction" : fraction, "seed" : seed, "population" : {}, "cases" : {},\
+              "makefiles" : []}
+    sampled_paths = set()
+    for cwe_nr, cases in sorted(get_cases(makefiles, inventory).items()):
+        case_keys = sorted(cases)
+        sample_cnt = min(len(case_keys), max(1, math.ceil(fraction * len(case_keys))))
+        selected = rng.sample(case_keys, sample_cnt)
+        sample["population"][cwe_nr] = len(case_keys)
+        sample["cases"][cwe_nr] = {case_key : cases[case_key] for case_key in sorted(selected)}
+        sampled_paths.update(os.path.dirname(case_key) for case_key in selected)
+    sample["makefiles"] = [makefile for makefile in makefiles
+                           if path_resolver.realpath(os.path.dirname(makefile)) in sampled_paths]
+    return sample
+
+#-------------------------------------------------------------------------------
+def load_sample(filename):
+    """ Load a sample (saved with results_state.save), the CWE numbers (JSON keys)
+        are converted back to integers. Returns None if the file doesn't exist.
+    """
+    sample = results_state.load(filename)
+    if sample:
+        sample["population"] = {int(cwe_nr) : cnt for cwe_nr, cnt in sample["population"].items()}
+        sample["cases"] = {int(cwe_nr) : cases for cwe_nr, cases in sample["cases"].items()}
+    return sample
+
+#-------------------------------------------------------------------------------
+def get_excluded_modules(makefiles, sample, inventory = None):
+    """ Return the set of sources (modules) not selected in the sample,
+        these modules are ignored when processing the sample.
+    """
+    excluded = set()
+    for cwe_nr, cases in get_cases(makefiles, inventory).items():
+        selected = sample["cases"].get(cwe_nr, {})
+        for case_key, sources in cases.items():
+            if case_key not in selected:
+                excluded.update(sources)
+    return excluded
+
+#-------------------------------------------------------------------------------
+def filter_project_lnt(lnt_filename, sample):
+    """ Remove the modules not selected in the sample from a project configuration
+        (generated by pclp_config.py), so PClint analyzes only the sample. Every
+        module is either a block -env_push ... "module.c" ... -env_pop or a line
+        with the module name, the modules which are not Juliet test cases
+        (example: testcasesupport/io.c) are kept.
+        Returns the count of modules removed.
+    """
+    selected = {os.path.basename(source) for cases in sample["cases"].values()
+                for sources in cases.values() for source in sources}
+
+    def is_excluded(lines):
+        for line in lines:
+            name = os.path.basename(line.strip().strip('"'))
+            if CASE_REGEX.match(name):
+                return name not in selected
+        return False
+
+    with open(lnt_filename, encoding='UTF-8') as file:
+        lines = file.readlines()
+
+    out_lines = []
+    block = None
+    removed_cnt = 0
+    for line in lines:
+        if line.strip().startswith("-env_push"):
+            block = [line]
+        elif block is not None:
+            block.append(line)
+            if line.strip().startswith("-env_pop"):
+                if is_excluded(block):
+                    removed_cnt += 1
+                else:
+                    out_lines.extend(block)
+                block = None
+        elif is_excluded([line]):
+            removed_cnt += 1
+        else:
+            out_lines.append(line)
+    if block:
+        out_lines.extend(block)
+
+    with open(lnt_filename, "w", encoding='UTF-8') as file:
+        file.writelines(out_lines)
+    return removed_cnt
+
+#-------------------------------------------------------------------------------
+def get_case_counts(results_modules, sample, issue_nr):
+    """ Return the count of issue_nr per selected test case, per CWE:
+        {cwe_nr : [(count_bad, count_good), ...], ...}
+        (a selected test case without any result has the counts (0, 0))
+    """
+    case_counts = {}
+    for cwe_nr, cases in sample["cases"].items():
+        counts = case_counts.setdefault(cwe_nr, [])
+        for sources in cases.values():
+            count_bad, count_good = 0, 0
+            for source in sources:
+                module_res = results_modules.get(source)
+                if module_res:
+                    count_bad += module_res[0].get(issue_nr, 0)
+                    count_good += module_res[1].get(issue_nr, 0)
+            counts.append((count_bad, count_good))
+    return case_counts
+
+#-------------------------------------------------------------------------------
+def stratified_total(case_values, population):
+    """ Stratified estimate of a total and of its variance:
+            total = sum(N_h * mean_h)
+            variance = sum(N_h^2 * (1 - n_h / N_h) * s_h^2 / n_h)
+        case_values - {cwe_nr : [value per selected case, ...]}
+        population - {cwe_nr : N_h count of all test cases}
+        Returns a tuple (total, variance)
+    """
+    total, variance = 0.0, 0.0
+    for cwe_nr, values in case_values.items():
+        sample_cnt, pop_cnt = len(values), population[cwe_nr]
+        if not sample_cnt:
+            continue
+        mean = sum(values) / sample_cnt
+        total += pop_cnt * mean
+        if sample_cnt > 1:
+            var_h = sum((val - mean) ** 2 for val in values) / (sample_cnt - 1)
+            variance += pop_cnt * pop_cnt * (1.0 - sample_cnt / pop_cnt) * var_h / sample_cnt
+    return (total, variance)
+
+#-------------------------------------------------------------------------------
+def estimate(results_modules, sample, z_value = SAMPLE_Z):
+    """ Estimate the per-message results of the full corpus from the results of
+        the sample (Processor.results_modules), for every message:
+        {
+            issue_nr : ((tp, tp_low, tp_high), (fp, fp_low, fp_high), (prec, prec_low, prec_high)),
+            ...
+        }
+        where tp/fp are the estimated totals of true-positive/false-positive issues
+        and prec = tp / (tp + fp), the confidence intervals are normal approximations
+        of the stratified estimators (linearized for the precision).
+    """
+    issue_numbers = sorted({issue_nr for module_res in results_modules.values()
+                            for issue_nr in (*module_res[0], *module_res[1])})
+    population = sample["population"]
+    estimates = {}
+    for issue_nr in issue_numbers:
+        case_counts = get_case_counts(results_modules, sample, issue_nr)
+        tp_total, tp_var = stratified_total({cwe_nr : [cnt[0] for cnt in counts]\
+            for cwe_nr, counts in case_counts.items()}, population)
+        fp_total, fp_var = stratified_total({cwe_nr : [cnt[1] for cnt in counts]\
+            for cwe_nr, counts in case_counts.items()}, population)
+        if tp_total + fp_total <= 0:
+            continue
+
+        # Precision: ratio estimator, variance of the residuals tp - prec * (tp + fp)
+        prec = tp_total / (tp_total + fp_total)
+        _, res_var = stratified_total({cwe_nr : [cnt[0] - prec * (cnt[0] + cnt[1])\
+            for cnt in counts] for cwe_nr, counts in case_counts.items()}, population)
+        prec_err = z_value * math.sqrt(res_var) / (tp_total + fp_total)
+
+        tp_err = z_value * math.sqrt(tp_var)
+        fp_err = z_value * math.sqrt(fp_var)
+        estimates[issue_nr] = ((tp_total, max(tp_total - tp_err, 0.0), tp_total + tp_err),
+                               (fp_total, max(fp_total - fp_err, 0.0), fp_total + fp_err),
+                               (prec, max(prec - prec_err, 0.0), min(prec + prec_err, 1.0)))
+    return estimates
+
+#-------------------------------------------------------------------------------
+def dump_estimates(estimates, sample, pclp_m, output):
+    """ Dump (to a file or stdout) the estimates (as generated by estimate) """
+    cases_cnt = sum(len(cases) for cases in sample["cases"].values())
+    print(f'Sample estimates (full corpus), {cases_cnt} of {sum(sample["population"].values())} ' + \
+          f'test cases, seed {sample["seed"]}, 95% confidence interval:', file = output)
+    print("   issue       true-positive             false-positive          precision", file = output)
+    for issue_nr, (tp_est, fp_est, prec_est) in sorted(estimates.items()):
+        issue_name = pclp_m.get_message_name(issue_nr) if pclp_m else None
+        if not issue_name:
+            issue_name = str(issue_nr)
+        print(f'{issue_name:>8} {tp_est[0]:8.0f} [{tp_est[1]:8.0f}, {tp_est[2]:8.0f}]' + \
+              f' {fp_est[0]:8.0f} [{fp_est[1]:8.0f}, {fp_est[2]:8.0f}]' + \
+              f' {prec_est[0]:6.3f} [{prec_est[1]:6.3f}, {prec_est[2]:6.3f}]', file = output)
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # Create a sample (list of makefiles of the sample written to stdout):
+    # <---- 0 --->|<------- 1 ----->|<---- 2 ---->|<--- 3 --->|<-- 4 -->|
+    # sampling.py  <makefiles_file>  <sample_file>  [fraction]  [seed]
+    #
+    # Remove the modules not in sample from a project configuration:
+    # <---- 0 --->|<-- 1 -->|<----- 2 ------>|<---- 3 ---->|
+    # sampling.py  --filter  <project.lnt>    <sample_file>
+
+    if len(sys.argv) >= 4 and sys.argv[1] == "--filter":
+
+        sample_arg = load_sample(sys.argv[3])
+        if not sample_arg:
+            print("Error: sample not found:", sys.argv[3], file = sys.stderr)
+            sys.exit(1)
+        print("Modules removed (not in sample):", filter_project_lnt(sys.argv[2], sample_arg),\
+              file = sys.stderr)
+
+    elif len(sys.argv) >= 3:
+
+        with open(sys.argv[1], encoding='UTF-8') as file:
+            makefiles_arg = [line.strip() for line in file if line.strip()]
+        fraction_arg = float(sys.argv[3]) if len(sys.argv) >= 4 else SAMPLE_FRACTION
+        seed_arg = int(sys.argv[4]) if len(sys.argv) >= 5 else SAMPLE_SEED
+
+        sample_arg = create_sample(makefiles_arg, fraction_arg, seed_arg,\
+            discovery.load_inventory(os.path.dirname(os.path.abspath(sys.argv[1]))))
+        results_state.save(sys.argv[2], sample_arg)
+        for makefile_arg in sample_arg["makefiles"]:
+            print(makefile_arg)
+    else:
+        print("Usage: python sampling.py <makefiles_file> <sample_file> [fraction] [seed]")
+        print("       python sampling.py --filter <project.lnt> <sample_file>")
@@ -0,0 +1,169 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" scheduler - orders the makefiles for a parallel analysis (lint_orchestrator.py)
+    longest first, using the durations of the previous runs (history file) or
+    the size of the sources for the makefiles not analyzed yet, and predicts
+    the duration of the run (makespan).
+"""
+import heapq
+import random
+import sys
+
+import results_state
+
+# History file of the durations (in the working directory, outside of the global
+# results folder, so it is not deleted by ig1.sh)
+DURATIONS_FILE = "ig_durations.json"
+
+#-------------------------------------------------------------------------------
+class DurationHistory:
+    """ DurationHistory - the duration of every makefile in the last run:
+            {makefile : {"duration" : seconds, "steps" : {step : seconds},
+                         "sources" : count, "bytes" : size}, ...}
+        The makefiles not in the history are estimated from the size of their
+        sources (bytes) with the average rate (seconds per byte) of the history.
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self, filename):
+        self.filename = filename
+        self.entries = results_state.load(filename) or {}
+
+    #---------------------------------------------------------------------------
+    def update(self, makefile, step_times, sources):
+        """ Record the duration of a makefile.
+                step_times - the duration of every step {step : seconds}
+                sources - the sources of the makefile {source_name : size} (inventory)
+        """
+        self.entries[makefile] = {
+            "duration" : round(sum(step_times.values()), 3),
+            "steps" : {step : round(step_time, 3) for step, step_time in step_times.items()},
+            "sources" : len(sources),
+            "bytes" : sum(sources.values())
+        }
+
+    #---------------------------------------------------------------------------
+    def save(self):
+        """ Write the history file """
+        results_state.save(self.filename, self.entries)
+
+    #---------------------------------------------------------------------------
+    def get_rate(self):
+        """ Return the average duration of a byte of sources (seconds) or None
+            if the history is empty
+        """
+        bytes_total = sum(entry["bytes"] for entry in self.entries.values())
+        if not bytes_total:
+            return None
+        return sum(entry["duration"] for entry in self.entries.values()) / bytes_total
+
+    #---------------------------------------------------------------------------
+    def estimate(self, makefiles, inventory):
+        """ Estimate the duration of every makefile.
+                inventory - {makefile : {source_name : size}} (discovery.py)
+            Returns a tuple (estimates, estimated_cnt) where:
+                estimates - {makefile : seconds} (history without sizes: the
+                    average duration; without history: the size of the sources
+                    in bytes, used only to order the makefiles)
+                estimated_cnt - count of makefiles estimated from the size
+        """
+        rate = self.get_rate()
+        mean_duration = None
+        if rate is None and self.entries:
+            mean_duration = sum(entry["duration"] for entry in self.entries.values()) / len(self.entries)
+        estimates = {}
+        estimated_cnt = 0
+        for makefile in makefiles:
+            entry = self.entries.get(makefile)
+            if entry:
+                estimates[makefile] = entry["duration"]
+            else:
+                size = sum(inventory.get(makefile, {}).values())
+                if rate is not None:
+                    estimates[makefile] = size * rate
+                elif mean_duration is not None:
+                    estimates[makefile] = mean_duration
+                else:
+                    estimates[makefile] = size
+                estimated_cnt += 1
+        return (estimates, estimated_cnt)
+
+#-------------------------------------------------------------------------------
+def schedule(makefiles, estimates):
+    """ Return the makefiles ordered longest first (LPT: longest processing time),
+        the makefiles with the same estimate keep their order
+    """
+    return sorted(makefiles, key = lambda makefile: -estimates[makefile])
+
+#-------------------------------------------------------------------------------
+def simulate(durations, jobs):
+    """ Return the makespan of the tasks (durations in the order of submission)
+        run in a pool of jobs workers: every task starts on the first free worker
+    """
+    workers = [0.0] * max(jobs, 1)
+    for duration in durations:
+        heapq.heappush(workers, heapq.heappop(workers) + duration)
+    return max(workers)
+
+#-------------------------------------------------------------------------------
+def simulate_workload(makefiles_cnt, jobs, seed = 0, noise = 0.2):
+    """ Simulate a Juliet-like workload: most makefiles have few sources, some
+        (CWE121, CWE122) have thousands. The durations are estimated with an
+        error of +/- noise. Returns a tuple of makespans:
+            (naive, lpt, lower_bound) where:
+                naive - the makefiles in the given (alphabetical) order
+                lpt - the makefiles longest first by the estimated durations
+                lower_bound - max(total / jobs, longest makefile)
+    """
+    rand = random.Random(seed)
+    durations = [0.5 + 0.05 * int(rand.lognormvariate(3.0, 1.5)) for _ in range(makefiles_cnt)]
+    estimates = [duration * rand.uniform(1.0 - noise, 1.0 + noise) for duration in durations]
+    lpt_order = sorted(range(makefiles_cnt), key = lambda idx: -estimates[idx])
+    return (simulate(durations, jobs),\
+            simulate([durations[idx] for idx in lpt_order], jobs),\
+            max(sum(durations) / jobs, max(durations)))
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # <---- 0 ---->|<------ 1 ----->|<---- 2 ---->|
+    # scheduler.py  <durations_file>  [--jobs=<N>]
+    # scheduler.py  --simulate        [--jobs=<N>] [--makefiles=<N>] [--seed=<N>]
+    #
+    # Print the predicted makespan of the makefiles of the history file (in the
+    # order of the history and longest first) or of a simulated workload
+
+    args_list = [arg for arg in sys.argv if not arg.startswith("--")]
+    options = dict(arg[2:].partition("=")[::2] for arg in sys.argv if arg.startswith("--"))
+    jobs_arg = int(options.get("jobs") or 8)
+
+    if "simulate" in options:
+        makefiles_arg = int(options.get("makefiles") or 118)
+        seed_arg = int(options.get("seed") or 0)
+        naive_arg, lpt_arg, bound_arg = simulate_workload(makefiles_arg, jobs_arg, seed_arg)
+        print("Simulated:", makefiles_arg, "makefiles, jobs:", jobs_arg, "seed:", seed_arg)
+        print(f'Makespan: naive order {naive_arg:.1f}s, longest first {lpt_arg:.1f}s, ' + \
+              f'lower bound {bound_arg:.1f}s, gain {naive_arg / lpt_arg:.2f}x')
+    elif len(args_list) >= 2:
+        history_arg = DurationHistory(args_list[1])
+        durations_arg = [entry["duration"] for entry in history_arg.entries.values()]
+        print("History:", args_list[1], "-", len(durations_arg), "makefiles,",\
+              f'total {sum(durations_arg):.1f}s, jobs: {jobs_arg}')
+        print(f'Makespan: history order {simulate(durations_arg, jobs_arg):.1f}s, ' + \
+              f'longest first {simulate(sorted(durations_arg, reverse = True), jobs_arg):.1f}s')
+    else:
+        print("Usage: python scheduler.py <durations_file> [--jobs=<N>]")
+        print("       python scheduler.py --simulate [--jobs=<N>] [--makefiles=<N>] [--seed=<N>]")
@@ -0,0 +1,175 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" shard - deterministic partition of the list of makefiles into N shards
+    (balanced by the size of the C sources), used to split a run over
+    several hosts. Every shard produces a partial results artifact, the
+    artifacts are combined by merge_shards.py.
+"""
+import os
+import sys
+
+import results_state
+import discovery
+
+# Shard artifact file name (in the global results folder), example: ig_shard_2of4.json
+SHARD_FILE = "ig_shard_{0}of{1}.json"
+
+# Extensions of the C sources (used to weight a makefile)
+SOURCE_EXTENSIONS = (".c", ".cpp")
+
+# Weight of a makefile: total size of the C sources (bytes) or count of C sources
+WEIGHT_BYTES = "bytes"
+WEIGHT_COUNT = "count"
+
+#-------------------------------------------------------------------------------
+def parse_shard(shard_text):
+    """ Parse the shard text "i/N" (shard i of N, i = 1..N).
+        Returns a tuple (i, N) or None if the text is invalid.
+    """
+    idx_text, _, cnt_text = (shard_text or "").partition("/")
+    if not idx_text.isdigit() or not cnt_text.isdigit():
+        return None
+    shard_idx, shard_cnt = int(idx_text), int(cnt_text)
+    if shard_cnt < 1 or shard_idx < 1 or shard_idx > shard_cnt:
+        return None
+    return (shard_idx, shard_cnt)
+
+#-------------------------------------------------------------------------------
+def get_makefile_weight(makefile, weight_type = WEIGHT_BYTES, inventory = None):
+    """ Return the weight of a makefile: the total size (bytes) or the count of
+        the C sources in the directory of the makefile. The weight depends only
+        on the sources (not on the PClint output), so all the hosts (and the
+        bash script running PClint) compute the same partition.
+        inventory - the inventory of the sources (discovery.py), if None (or the
+            makefile is not in the inventory) the directory is scanned
+    """
+    if inventory and makefile in inventory:
+        sources = inventory[makefile]
+        weight = sum(sources.values()) if weight_type == WEIGHT_BYTES else len(sources)
+        return max(weight, 1)
+
+    weight = 0
+    try:
+        with os.scandir(os.path.dirname(makefile)) as dir_it:
+            for entry in dir_it:
+                if entry.name.endswith(SOURCE_EXTENSIONS) and entry.is_file():
+                    weight += entry.stat().st_size if weight_type == WEIGHT_BYTES else 1
+    except OSError:
+        pass
+    # Every makefile weights at least 1 (a makefile without sources is still processed)
+    return max(weight, 1)
+
+#-------------------------------------------------------------------------------
+def partition(makefiles, shard_cnt, weight_type = WEIGHT_BYTES, inventory = None):
+    """ Partition the makefiles into shard_cnt shards with (approximately) equal weights.
+        The heaviest makefile is assigned first, always to the lightest shard
+        (ties are broken by the makefile name and by the shard index), so the
+        partition is deterministic: the same list gives the same shards on every host.
+        Returns a list of shard_cnt lists of makefiles (every list in the order
+        of the makefiles list).
+    """
+    weights = {makefile : get_makefile_weight(makefile, weight_type, inventory)
+               for makefile in makefiles}
+    shard_loads = [0] * shard_cnt
+    shard_of = {}
+    for makefile in sorted(makefiles, key = lambda name: (-weights[name], name)):
+        shard_nr = min(range(shard_cnt), key = lambda nr: (shard_loads[nr], nr))
+        shard_loads[shard_nr] += weights[makefile]
+        shard_of[makefile] = shard_nr
+
+    shards = [[] for _ in range(shard_cnt)]
+    for makefile in makefiles:
+        shards[shard_of[makefile]].append(makefile)
+    return shards
+
+#-------------------------------------------------------------------------------
+def select_shard(makefiles, shard_idx, shard_cnt, weight_type = WEIGHT_BYTES, inventory = None):
+    """ Return the makefiles of shard shard_idx (1..shard_cnt) """
+    return partition(makefiles, shard_cnt, weight_type, inventory)[shard_idx - 1]
+
+#-------------------------------------------------------------------------------
+def get_shard_filename(gres_path, shard_idx, shard_cnt):
+    """ Return the file name of the artifact of a shard """
+    return os.path.join(gres_path, SHARD_FILE.format(shard_idx, shard_cnt))
+
+#-------------------------------------------------------------------------------
+def save_artifact(filename, shard_idx, shard_cnt, run_key, options, makefile_results):
+    """ Write the partial results artifact of a shard. The artifact is self-contained:
+            shard - [i, N]
+            run_key - key of the whole run (all makefiles, ignore list, options),
+                      only the artifacts of the same run can be merged
+            options - the options of the run (used to merge the results)
+            results - [[makefile_index, makefile, state], ...] the partial results
+                      (Processor.get_state) of every makefile of the shard, where
+                      makefile_index is the position in the list of all makefiles
+    """
+    results_state.save(filename, {"shard" : [shard_idx, shard_cnt],
+                                  "run_key" : run_key,
+                                  "options" : options,
+                                  "results" : makefile_results})
+
+#-------------------------------------------------------------------------------
+def load_artifacts(filenames):
+    """ Load and check the artifacts of all shards of a run.
+        Returns a tuple (artifacts, error) where artifacts is a list sorted
+        by the shard index and error is None or an error string.
+    """
+    artifacts = []
+    for filename in filenames:
+        artifact = results_state.load(filename)
+        if not artifact or "shard" not in artifact:
+            return (None, "Error: invalid shard artifact: " + filename)
+        artifacts.append(artifact)
+    if not artifacts:
+        return (None, "Error: no shard artifacts found")
+
+    artifacts.sort(key = lambda artifact: artifact["shard"][0])
+    shard_cnt = artifacts[0]["shard"][1]
+    run_key = artifacts[0]["run_key"]
+    for artifact in artifacts:
+        if artifact["shard"][1] != shard_cnt or artifact["run_key"] != run_key:
+            return (None, "Error: shard artifacts of different runs")
+    shard_list = [artifact["shard"][0] for artifact in artifacts]
+    if shard_list != list(range(1, shard_cnt + 1)):
+        return (None, "Error: shards missing or duplicated, expected 1.." + str(shard_cnt) + \
+                      ", found: " + str(shard_list))
+    return (artifacts, None)
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # <--- 0 -->|<------ 1 ----->|<- 2 ->|<----- 3 ----->|
+    # shard.py   <makefiles_file>  <i/N>  [bytes|count]
+    #
+    # Print the makefiles of shard i of N (used by ig1.sh)
+
+    if len(sys.argv) >= 3:
+
+        shard_arg = parse_shard(sys.argv[2])
+        if not shard_arg:
+            print("Error: invalid shard (expected i/N):", sys.argv[2], file = sys.stderr)
+            sys.exit(1)
+
+        with open(sys.argv[1], encoding='UTF-8') as file:
+            makefiles_arg = [line.strip() for line in file if line.strip()]
+
+        weight_arg = sys.argv[3] if len(sys.argv) >= 4 else WEIGHT_BYTES
+        inventory_arg = discovery.load_inventory(os.path.dirname(os.path.abspath(sys.argv[1])))
+        for makefile_arg in select_shard(makefiles_arg, shard_arg[0], shard_arg[1], weight_arg,\
+                                         inventory_arg):
+            print(makefile_arg)
+    else:
+        print("Usage: python shard.py <makefiles_file> <i/N> [bytes|count]")
@@ -0,0 +1,90 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" test_stream_memory - checks that the streaming mode of the Processor has
+    bounded memory: processes two synthetic corpora (gen_corpus.py) of different
+    sizes and compares the tracemalloc peak of the streaming run with the limit,
+    with the peak of the smaller corpus and with a non-streaming run.
+    Run: python3 -m unittest test_stream_memory (in the scripts folder)
+"""
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+import gen_corpus
+import path_resolver
+import processor
+
+# Count of modules of the small and of the large synthetic corpus (small enough
+# to run the test routinely)
+CHECK_MODULES_SMALL = 250
+CHECK_MODULES_LARGE = 1000
+# Count of modules per makefile (CWE directory)
+CHECK_MODULES_PER_MAKEFILE = 125
+# Limit of the tracemalloc peak of the streaming run (MB), the measured peak is
+# about 0.15 MB, the non-streaming run of the large corpus needs about 1.3 MB
+CHECK_LIMIT_MB = 1.0
+# Allowed growth of the streaming peak from the small to the large corpus (MB)
+CHECK_GROWTH_MB = 0.25
+
+#-------------------------------------------------------------------------------
+def get_stream_peak(modules_cnt, stream = True):
+    """ Process a synthetic corpus of modules_cnt modules (in streaming mode, if stream
+        is set) and return the tracemalloc peak (MB) of the processing
+    """
+    with tempfile.TemporaryDirectory() as corpus_path:
+        makefiles = [(gen_corpus.get_pclint_out_file(corpus_path, makefile), os.path.dirname(makefile))\
+                     for makefile in gen_corpus.gen_corpus(corpus_path, modules_cnt,\
+                                                           per_makefile = CHECK_MODULES_PER_MAKEFILE)]
+        path_resolver.resolver.clear()
+
+        tracemalloc.start()
+        try:
+            proc = processor.Processor()
+            with open(os.devnull, "w", encoding='UTF-8') as null_output:
+                if stream:
+                    proc.set_results_sink(null_output)
+                for pclint_out_file, makefile_path in makefiles:
+                    res = proc.interpret(pclint_out_file, makefile_path, null_output)
+                    if res:
+                        raise ValueError("Error processing " + res[0] + ", line " + str(res[1]))
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1048576.0
+        finally:
+            tracemalloc.stop()
+            path_resolver.resolver.clear()
+    return peak_mb
+
+#-------------------------------------------------------------------------------
+class TestStreamMemory(unittest.TestCase):
+    """ TestStreamMemory - the memory of the streaming mode doesn't grow with the corpus """
+
+    #---------------------------------------------------------------------------
+    def test_stream_peak_bounded(self):
+        """ The streaming peak is below the limit and doesn't grow with the corpus """
+        peak_small = get_stream_peak(CHECK_MODULES_SMALL)
+        peak_large = get_stream_peak(CHECK_MODULES_LARGE)
+        self.assertLess(peak_large, CHECK_LIMIT_MB)
+        self.assertLess(peak_large - peak_small, CHECK_GROWTH_MB)
+
+    #---------------------------------------------------------------------------
+    def test_stream_below_full(self):
+        """ The streaming peak is below the peak of the non-streaming run """
+        peak_full = get_stream_peak(CHECK_MODULES_LARGE, stream = False)
+        self.assertLess(get_stream_peak(CHECK_MODULES_LARGE), peak_full / 2)
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" tracing - lightweight instrumentation shared by all modules: spans (the
+    duration of a stage, a makefile, a module) and counters (files parsed, bytes
+    scanned, issues classified, cache hits), written as a summary table and as
+    a Chrome trace (trace_event JSON, opened in chrome://tracing or Perfetto).
+    Disabled by default: a span is then a shared empty context manager and a
+    counter a single test, the instrumented code is not measurably slower.
+"""
+import glob
+import json
+import os
+import threading
+import time
+
+#-------------------------------------------------------------------------------
+class NullSpan:
+    """ NullSpan - the span returned when the tracing is disabled (does nothing) """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        return False
+
+#-------------------------------------------------------------------------------
+class Span:
+    """ Span - records the duration of a with-block as a trace event """
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.time_start = 0.0
+
+    def __enter__(self):
+        self.time_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.tracer.events.append((self.name, self.cat, self.time_start, time.perf_counter(),\
+                                   threading.get_ident(), self.args))
+        return False
+
+# Span returned by a disabled tracer
+NULL_SPAN = NullSpan()
+
+#-------------------------------------------------------------------------------
+class Tracer:
+    """ Tracer - the spans and the counters of a process.
+            events - list of spans: (name, cat, time_start, time_end, thread_id, args)
+                (time.perf_counter, the same clock in all processes)
+            counters - {name : value} (updated under lock: the prefetch (--prefetch)
+                counts in its threads too)
+        The worker processes (--jobs) write their spans and counters to a part
+        file (flush), the main process merges the part files (load_parts).
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    #---------------------------------------------------------------------------
+    def enable(self, enabled = True):
+        """ Enable (or disable) the recording of spans and counters """
+        self.enabled = enabled
+
+    #---------------------------------------------------------------------------
+    def span(self, name, cat = "stage", args = None):
+        """ Return a context manager recording the duration of the with-block:
+                name - name of the span (example: "makefile", "c_parse")
+                cat - category of the span (stage, makefile, module, ...)
+                args - dictionary of details shown in the trace viewer or None
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, cat, args)
+
+    #---------------------------------------------------------------------------
+    def count(self, name, value = 1):
+        """ Add value to the counter name """
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    #---------------------------------------------------------------------------
+    def clear(self):
+        """ Remove all spans and counters """
+        self.events.clear()
+        with self.lock:
+            self.counters.clear()
+
+    #---------------------------------------------------------------------------
+    def get_trace_events(self, pid = None):
+        """ Return the spans and the counters as Chrome trace events
+            (complete events "X" and one counter event "C", times in microseconds)
+        """
+        pid = os.getpid() if pid is None else pid
+        trace_events = []
+        for name, cat, time_start, time_end, tid, args in self.events:
+            event = {"name" : name, "cat" : cat, "ph" : "X", "pid" : pid, "tid" : tid,\
+                     "ts" : round(time_start * 1e6, 3), "dur" : round((time_end - time_start) * 1e6, 3)}
+            if args:
+                event["args"] = args
+            trace_events.append(event)
+        with self.lock:
+            counters = dict(self.counters)
+        if counters:
+            time_end = max((event[3] for event in self.events), default = time.perf_counter())
+            trace_events.append({"name" : "counters", "ph" : "C", "pid" : pid, "tid" : 0,\
+                                 "ts" : round(time_end * 1e6, 3), "args" : counters})
+        return trace_events
+
+    #---------------------------------------------------------------------------
+    def flush(self, trace_filename):
+        """ Append the spans and counters to the part file of this process
+            (<trace_filename>.<pid>.part, one trace event per line) and remove them
+        """
+        if not self.enabled or not (self.events or self.counters):
+            return
+        with open(trace_filename + "." + str(os.getpid()) + ".part", "a", encoding='UTF-8') as file:
+            for event in self.get_trace_events():
+                print(json.dumps(event), file = file)
+        self.clear()
+
+    #---------------------------------------------------------------------------
+    def load_parts(self, trace_filename):
+        """ Read and remove the part files of the worker processes.
+            Returns the list of their trace events.
+        """
+        trace_events = []
+        for part_filename in sorted(glob.glob(glob.escape(trace_filename) + ".*.part")):
+            with open(part_filename, encoding='UTF-8') as file:
+                trace_events.extend(json.loads(line) for line in file if line.strip())
+            os.remove(part_filename)
+        return trace_events
+
+    #---------------------------------------------------------------------------
+    def export(self, trace_filename):
+        """ Write the Chrome trace (the spans and counters of this process and of
+            the worker processes). Returns the list of all trace events.
+        """
+        trace_events = self.load_parts(trace_filename) + self.get_trace_events()
+        trace_events.sort(key = lambda event: event["ts"])
+        with open(trace_filename, "w", encoding='UTF-8') as file:
+            json.dump({"traceEvents" : trace_events, "displayTimeUnit" : "ms"}, file)
+        return trace_events
+
+#-------------------------------------------------------------------------------
+def dump_summary(trace_events, output):
+    """ Write the summary table of the trace events: for every span the count,
+        the total, average and maximal duration, and the total of every counter
+        (all processes). The spans are sorted by total duration.
+    """
+    spans = {}
+    counters = {}
+    for event in trace_events:
+        if event["ph"] == "X":
+            span_stats = spans.setdefault(event["name"], [0, 0.0, 0.0])
+            span_stats[0] += 1
+            span_stats[1] += event["dur"]
+            span_stats[2] = max(span_stats[2], event["dur"])
+        elif event["ph"] == "C":
+            for name, value in event["args"].items():
+                counters[name] = counters.get(name, 0) + value
+
+    print(f'{"span":<24}{"count":>10}{"total ms":>12}{"avg ms":>10}{"max ms":>10}', file = output)
+    for name, (span_cnt, total, longest) in sorted(spans.items(), key = lambda item: -item[1][1]):
+        print(f'{name:<24}{span_cnt:>10}{total / 1000:>12.1f}{total / span_cnt / 1000:>10.3f}' + \
+              f'{longest / 1000:>10.1f}', file = output)
+    if counters:
+        print(f'{"counter":<24}{"value":>10}', file = output)
+        for name, value in sorted(counters.items()):
+            print(f'{name:<24}{value:>10}', file = output)
+
+# Tracer shared by all modules
+tracer = Tracer()
+
+#-------------------------------------------------------------------------------
+def span(name, cat = "stage", args = None):
+    """ Return a context manager recording a span with the shared tracer """
+    if not tracer.enabled:
+        return NULL_SPAN
+    return Span(tracer, name, cat, args)
+
+#-------------------------------------------------------------------------------
+def count(name, value = 1):
+    """ Add value to a counter of the shared tracer """
+    tracer.count(name, value)
+
+#-------------------------------------------------------------------------------
+def enabled():
+    """ Return True if the shared tracer is recording """
+    return tracer.enabled
@@ -0,0 +1,134 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" watch - polls the PClint outputs of the makefiles while ig1.sh is running
+    and reports the completed outputs (the marker written by lint_orchestrator.py
+    after every PClint output), used by reduced.py --watch to update the results
+    as the outputs are generated.
+"""
+import os
+import time
+
+# Default interval between two polls (seconds)
+WATCH_INTERVAL = 10.0
+# Default time (seconds) a PClint output without marker must stay unchanged to be
+# considered completed (--watch-settle, outputs not written by lint_orchestrator.py)
+WATCH_SETTLE = 30.0
+# Minimal interval between two refreshes of the charts (seconds)
+WATCH_CHARTS_INTERVAL = 60.0
+# Summary file of the watch mode (in the global results folder)
+WATCH_SUMMARY_FILE = "ig_watch_summary.txt"
+
+#-------------------------------------------------------------------------------
+class OutputWatcher:
+    """ OutputWatcher - watches the PClint outputs of a list of makefiles.
+
+        PClint writes its output while analyzing (block buffered: a partial
+        output can stay unchanged for a long time), an output is completed when
+        its marker exists (written by lint_orchestrator.py after the output was
+        closed). Only with settle (seconds, for outputs written without marker)
+        an output without marker is also completed when its size and modification
+        time didn't change for settle seconds (measured with the local clock, an
+        output older than settle seconds when first seen is completed immediately).
+        Only the pending outputs (not completed yet) are checked, a completed
+        output is reported once and not checked again. A failed or skipped
+        makefile has a marker but no output (see get_status).
+        The watch ends when all outputs were completed or when the marker of
+        the finished run (run_done_filename) exists: the outputs still pending
+        then will not be completed (stopped is set, pending holds them).
+    """
+
+    #---------------------------------------------------------------------------
+    def __init__(self, outputs, settle = None, run_done_filename = None):
+        """ outputs - list of tuples (makefile, pclp_out_filename, done_filename) """
+        self.pending = {makefile : (pclp_out_filename, done_filename)\
+                        for makefile, pclp_out_filename, done_filename in outputs}
+        self.signatures = {}
+        self.settle = settle
+        self.run_done_filename = run_done_filename
+        self.stopped = False
+        self.poll_cnt = 0
+
+    #---------------------------------------------------------------------------
+    def poll(self):
+        """ Check the pending outputs, return the list of the makefiles whose
+            output was completed since the previous poll (in the order of the outputs).
+        """
+        self.poll_cnt += 1
+        time_now = time.time()
+        # Checked first: the markers of all makefiles were written before
+        run_done = self.run_done_filename is not None and os.path.isfile(self.run_done_filename)
+        completed = []
+        for makefile, (pclp_out_filename, done_filename) in self.pending.items():
+            if os.path.isfile(done_filename):
+                completed.append(makefile)
+                continue
+            if self.settle is None:
+                continue
+            try:
+                stat = os.stat(pclp_out_filename)
+            except OSError:
+                # Not generated yet
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            prev_signature = self.signatures.get(makefile)
+            if prev_signature is None and time_now - stat.st_mtime >= self.settle:
+                completed.append(makefile)
+            elif prev_signature is None or prev_signature[0] != signature:
+                # New or still written: check again at the next poll
+                self.signatures[makefile] = (signature, time_now)
+            elif time_now - prev_signature[1] >= self.settle:
+                completed.append(makefile)
+
+        for makefile in completed:
+            del self.pending[makefile]
+            self.signatures.pop(makefile, None)
+        self.stopped = run_done
+        return completed
+
+    #---------------------------------------------------------------------------
+    def is_done(self):
+        """ Return True if all outputs were completed or the run is finished """
+        return not self.pending or self.stopped
+
+#-------------------------------------------------------------------------------
+def get_status(pclp_out_filename, done_filename):
+    """ Return None if the PClint output of a completed makefile exists, otherwise
+        the status of its marker (failed <step>: <error>, skipped)
+    """
+    if os.path.isfile(pclp_out_filename):
+        return None
+    try:
+        with open(done_filename, encoding='UTF-8') as file:
+            return file.read().strip() or "no PClint output"
+    except OSError:
+        return "no PClint output"
+
+#-------------------------------------------------------------------------------
+def dump_summary(proc, processed_cnt, total_cnt, pclp_msg, output):
+    """ Dump the running summary: the progress and the aggregated results of
+        every issue (true-positive, false-positive, other, all), the cost depends
+        only on the count of different issues.
+    """
+    print("Watch:", time.strftime("%Y-%m-%d %H:%M:%S"), "-", processed_cnt, "of", total_cnt,\
+          "makefiles processed", file = output)
+    print("All issues: true-positive", proc.results_all_bad, "false-positive",\
+          proc.results_all_good, "other", proc.results_all_other, file = output)
+    print(f'{"issue":<8}{"TP":>8}{"FP":>8}{"other":>8}{"all":>8}  name', file = output)
+    for issue_nr, issue_cnt_list in sorted(proc.results_issues.items(),\
+                                           key = lambda item: (-item[1][3], item[0])):
+        print(f'{issue_nr:<8}{issue_cnt_list[0]:>8}{issue_cnt_list[1]:>8}' + \
+              f'{issue_cnt_list[2]:>8}{issue_cnt_list[3]:>8}  ' + \
+              (pclp_msg.get_message_name(issue_nr) or str(issue_nr)), file = output)
@@ -0,0 +1,78 @@
+# This file is part of the pclp_juliet_a distribution.
+# Copyright (c) 2024 Igor Marinescu (igor.marinescu@gmail.com).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#-------------------------------------------------------------------------------
+""" pclp_config (stub) - stand-in for pclp_config.py of PC-lint Plus, supports
+    the two invocations of ig1.sh:
+        --generate-compiler-config - writes an empty compiler configuration
+            (.lnt and .h files)
+        --generate-project-config - writes the project configuration from the
+            imposter output: a block -env_push ... -env_pop for every compiled
+            source, with its include folders (-I)
+"""
+import ast
+import sys
+
+# Extensions of the compiled sources
+SOURCE_EXTENSIONS = (".c", ".cpp")
+
+#-------------------------------------------------------------------------------
+def generate_project_config(imposter_filename, output):
+    """ Write the project configuration of the compiler invocations of the
+        imposter output (the link invocations are skipped)
+    """
+    print("+libclass(angle)", file = output)
+    print("", file = output)
+    with open(imposter_filename, encoding='UTF-8') as file:
+        for line in file:
+            try:
+                args = ast.literal_eval(line.strip())
+            except (ValueError, SyntaxError):
+                continue
+            if "-c" not in args:
+                continue
+            include_dirs = [args[idx + 1] for idx, arg in enumerate(args[:-1]) if arg == "-I"]
+            include_dirs += [arg[2:] for arg in args if arg.startswith("-I") and len(arg) > 2]
+            for source in (arg for arg in args if arg.endswith(SOURCE_EXTENSIONS)):
+                print("-env_push", file = output)
+                for include_dir in include_dirs:
+                    print('-i"' + include_dir + '"', file = output)
+                print('"' + source + '"', file = output)
+                print("-env_pop", file = output)
+                print("", file = output)
+
+#-------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # <----- 0 ----->|<--------------------- 1 ---------------------->|
+    # pclp_config.py  --config-output-lnt-file=<lnt> --generate-compiler-config
+    #                 [--config-output-header-file=<h>] [--compiler=gcc] ...
+    # pclp_config.py  --config-output-lnt-file=<lnt> --generate-project-config
+    #                 --imposter-file=<imposter_out> [--compiler=gcc]
+
+    options = dict(arg[2:].partition("=")[::2] for arg in sys.argv if arg.startswith("--"))
+
+    if "generate-project-config" in options and options.get("imposter-file"):
+        with open(options["config-output-lnt-file"], "w", encoding='UTF-8') as lnt_file:
+            generate_project_config(options["imposter-file"], lnt_file)
+    elif "generate-compiler-config" in options and options.get("config-output-lnt-file"):
+        with open(options["config-output-lnt-file"], "w", encoding='UTF-8') as lnt_file:
+            print("// Compiler configuration (pclp_config.py stub)", file = lnt_file)
+        if options.get("config-output-header-file"):
+            with open(options["config-output-header-file"], "w", encoding='UTF-8') as h_file:
+                print("/* Compiler configuration (pclp_config.py stub) */", file = h_file)
+    else:
+        print("Usage: python pclp_config.py --config-output-lnt-file=<lnt> " + \
+              "--generate-compiler-config | --generate-project-config --imposter-file=<file>")
+        sys.exit(1)